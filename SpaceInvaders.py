@@ -20,11 +20,101 @@ while True:
         break
     elif lives == -1:
         break
+
+Headless (no window, no audio device, no real clock):
+
+init_headless()
+game = Game(level=level, headless=True)
+while game.game_over == 0:
+    state = game.step(Actions(left=False, right=True, shoot=True)) # Advances the game by exactly one tick
 """
 
 
+import os
+import numpy
 import pygame
-from random import randint, choice
+from collections import namedtuple
+import random
+import struct
+from array import array
+from assets import assets
+from audio import audio
+from formations import formations, high_in_middle
+from spatial_hash import SpatialHash
+
+FPS = 60 #* The number of game ticks per second of game time. Every speed, cooldown and timer is measured per tick, not per rendered frame
+
+#* The binary layout of `Game.snapshot`: a header, then one record per enemy, enemy bullet and player bullet, then the
+#* fortification cells and the random number generator state
+SNAPSHOT_MAGIC = b"HISS"
+SNAPSHOT_VERSION = 2
+#* magic, version, level, score, lives, game over, tick, seed, enemy direction, enemy cooldown, legendary count,
+#* legendary spawn time, formation rows, formation columns, player present, player can shoot, player x, player y,
+#* player bullet time, legendary present, legendary x, legendary y, legendary speed, enemy count, enemy bullet count,
+#* player bullet count, fortification count
+SNAPSHOT_HEADER = struct.Struct("<4sBiqibIIbiiiHHBBhhdBhhbIHHB")
+SNAPSHOT_SEED = struct.calcsize("<4sBiqibI") #* The position of the seed in the header, an unsigned 32-bit number
+SNAPSHOT_ENEMY = struct.Struct("<BhhbHH") #* type, x, y, health, row, column (`NO_SLOT` when not in the formation)
+NO_SLOT = 0xFFFF
+SNAPSHOT_BULLET = struct.Struct("<hhbB") #* x, y, speed, colour
+SNAPSHOT_RNG = struct.Struct("<BBd") #* version, whether a Gaussian is cached, the cached Gaussian
+SNAPSHOT_RNG_SIZE = SNAPSHOT_RNG.size + 625 * 4 #* The random number generator state at the end of every snapshot, with its 625 words
+BULLET_COLOURS = ["yellow", "red", (255, 196, 0), (255, 128, 0)]
+#* The arrays of an `EnemyFormation`, as (name, dtype)
+FORMATION_COLUMNS = (("x", numpy.int32), ("y", numpy.int32), ("width", numpy.int32), ("height", numpy.int32),
+                     ("health", numpy.int16), ("value", numpy.int32), ("kind", numpy.uint8), ("alive", numpy.bool_),
+                     ("row", numpy.uint16), ("column", numpy.uint16))
+
+
+def init_headless():
+    """Initialises just enough of pygame to run the game without a window or an audio device.
+    
+    The SDL dummy video and audio drivers are selected (unless already set) and only the display and font modules are
+    initialised. The mixer is left uninitialised and the audio manager is disabled, so the game makes no sound.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init()
+    pygame.font.init()
+    audio.enabled = False
+
+
+def run_stage(name, stage, *args):
+    """Runs one stage of a game tick. Used in place of `FrameProfiler.run` when the game is not being profiled.
+    
+    Args:
+        name (str): The name of the stage (unused).
+        stage (callable): The stage to run.
+        *args: The arguments passed to the stage.
+    
+    Returns:
+        object: What the stage returned.
+    """
+    return stage(*args)
+
+
+class Actions(namedtuple("Actions", ["left", "right", "shoot"], defaults=(False, False, False))):
+    """The player's input for one game tick.
+    
+    Attributes:
+        left (bool): Whether the player is moving left.
+        right (bool): Whether the player is moving right.
+        shoot (bool): Whether the player is pressing the fire button.
+    """
+    __slots__ = ()
+    
+    @classmethod
+    def from_keys(cls, keys):
+        """Builds the actions from the keyboard state.
+        
+        Args:
+            keys (pygame.key.ScancodeWrapper): The result of `pygame.key.get_pressed()`.
+        
+        Returns:
+            Actions: The actions held down on the keyboard.
+        """
+        return cls(bool(keys[pygame.K_a] or keys[pygame.K_LEFT]), bool(keys[pygame.K_d] or keys[pygame.K_RIGHT]), bool(keys[pygame.K_SPACE]))
+
 
 class Game:
     """The `Game` class represents the main game logic for the Space Invaders game. It handles the initialization of game state, player and enemy management, 
@@ -32,50 +122,57 @@ class Game:
     
     Attributes:
         level (int): The current level of the game.
+        headless (bool): Whether the game runs without a window or audio, e.g. for simulations.
+        seed (int): The seed of the game's random number generator.
+        rng (random.Random): The game's own random number generator, used for everything random in the game.
+        recorder (InputRecorder): An optional recorder that every tick's input is passed to. Defaults to None.
+        profiler (FrameProfiler): An optional profiler that times every stage of `step` and `draw`. Defaults to None.
+        tick (int): The number of game ticks simulated so far.
         game_over (int): A flag that is set to 1 when the player wins and -1 when the player loses.
-        music (pygame.mixer.Sound): The background music for the game.
-        bullet_sound (pygame.mixer.Sound): The sound played when the enemy fires a bullet.
         font (pygame.font.Font): The font used to display text on the screen.
         
         player (Player): The player object for the game.
+        spaceship (Spaceship): The player's spaceship, kept between levels even after it has been destroyed.
         lives (int): The number of lives the player has.
         score (int): The player's score.
         
         shape (pygame.Surface): The desired shape of the fortifications.
-        blocks (pygame.sprite.Group): The blocks that make up the fortifications.
+        blocks (pygame.sprite.Group): The fortifications, one destructible sprite per bunker.
         fortification_pos (list): The x-position offsets of the fortifications.
         
-        enemies (pygame.sprite.Group): The enemies in the game.
+        enemies (EnemyFormation): The enemies in the game, with their state held in arrays.
         enemy_bullets (pygame.sprite.Group): The bullets fired by the enemies.
+        formation (FormationSpec): The layout and tier odds of the level's enemy formation.
         enemies_lst (list): A list of the enemies in the game in order, used to generate them.
+        formation_shape (tuple): The (rows, columns) of the enemy formation.
         enemy_direction (int): The direction the enemies are moving in.
         enemy_cooldown (int): The cooldown for the enemy bullets.
         legendary (pygame.sprite.Group): The legendary enemy in the game.
         legendary_count (int): The total number of legendary enemies in the whole level.
         legendary_spawn_time (int): The spawn frequency of legendary enemies.
+        
+        broadphase (bool): Whether collisions with the enemy bullets use the spatial-hash broadphase. Set to False to use the
+            brute-force path. Collisions with the enemies are always tested against the formation's arrays.
+        enemy_bullet_grid (SpatialHash): The spatial hash of the enemy bullets, rebuilt every frame.
     """
     
-    def __init__(self, level=0, score=0, lives=1):
+    def __init__(self, level=0, score=0, lives=1, headless=False, seed=None):
         """Initializes the game class.
 
         Args:
             level (int, optional): The current level. Defaults to 0.
             score (int, optional): The current player score. Defaults to 0.
             lives (int, optional): The current player lives. Defaults to 1.
+            headless (bool, optional): Whether to run without a window or audio. Defaults to False.
+            seed (int, optional): The seed of the game's random number generator. Defaults to None (a random seed is picked).
         """
-        self.level = level
-        self.game_over = 0
+        self.headless = headless
+        self.recorder = None
+        self.profiler = None
         
-        self.music = pygame.mixer.Sound("Assets/music.wav")
-        self.music.set_volume(0.2)
-        self.music.play(loops=-1 )
-        self.bullet_sound = pygame.mixer.Sound("Assets/bullet.wav")
-        self.bullet_sound.set_volume(0.1)
-        
-        self.player = pygame.sprite.GroupSingle(Spaceship())
-        self.lives = lives
-        self.score = score
-        self.font = pygame.font.Font("Assets/Pixeled.ttf", 20)
+        self.spaceship = Spaceship()
+        self.player = pygame.sprite.GroupSingle(self.spaceship)
+        self.font = assets.font("Assets/Pixeled.ttf", 20)
         
         self.shape = [
             '  xxxxxxx',
@@ -87,21 +184,180 @@ class Game:
             'xx       xx']
         self.blocks = pygame.sprite.Group()
         self.fortification_pos = [0, 180, 360, 540]
-        self.build_multiple_forts(57, 480, self.fortification_pos)
         
-        self.enemies = pygame.sprite.Group()
+        self.enemies = EnemyFormation()
         self.enemy_bullets = pygame.sprite.Group()
+        self.legendary = pygame.sprite.GroupSingle()
+        
+        self.broadphase = True
+        self.enemy_bullet_grid = SpatialHash(64)
+        self.reset(level, score, lives, seed)
+    
+    def reset(self, level=0, score=0, lives=1, seed=None):
+        """Starts a level, reusing the game's font, spaceship, fortifications and sprite groups.
+        
+        Only the per-level state is rebuilt: the formation is regenerated, the fortifications are repaired, every bullet is
+        returned to the bullet pool and the spaceship is put back at its starting position. A reset game behaves exactly like
+        a new `Game` created with the same arguments. The recorder is detached, since a recording covers a single level.
+        
+        Args:
+            level (int, optional): The level to start. Defaults to 0.
+            score (int, optional): The player's score. Defaults to 0.
+            lives (int, optional): The player's lives. Defaults to 1.
+            seed (int, optional): The seed of the game's random number generator. Defaults to None (a random seed is picked).
+                Seeds outside 0 to 2**32 - 1, the range snapshots store, are wrapped into it, so `seed` and `seed + 2**32`
+                play the same game.
+        """
+        self.level = level
+        self.seed = seed % 2**32 if seed is not None else random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.recorder = None
+        self.tick = 0
+        self.game_over = 0
+        self.lives = lives
+        self.score = score
+        
+        if not self.headless:
+            audio.play_music("Assets/music.wav", 0.2)
+        
+        self.spaceship.reset()
+        self.player.add(self.spaceship)
+        if not self.blocks:
+            self.build_multiple_forts(57, 480, self.fortification_pos)
+        for fort in self.blocks:
+            if fort.blocks_left() != fort.cells_total:
+                fort.restore()
+        
+        for bullet in self.enemy_bullets.sprites():
+            bullet.kill()
+        self.enemies.empty()
+        self.legendary.empty()
+        self.formation = formations.spec(level)
         self.enemies_lst = self.generate_enemies()
         self.enemy_direction = 1
         self.enemy_cooldown = 0
-        self.enemy_setup(6, 8)
-        self.legendary = pygame.sprite.GroupSingle()
+        self.enemy_setup(self.formation.rows, self.formation.columns, self.formation.x_offset, self.formation.y_offset,
+                         self.formation.x_spacing, self.formation.y_spacing)
         try:
             if self.enemies_lst[-1][0] == 4:
                 self.legendary_count = len(self.enemies_lst[-1])
         except IndexError:
             self.legendary_count = 0
-        self.legend_spawn_time = randint(400, 800) #* Once every 400-800 frames
+        self.legend_spawn_time = self.rng.randint(400, 800) #* Once every 400-800 frames
+    
+    def next_level(self):
+        """Starts the next level after a victory, keeping the score and adding a life, like `result` reports. [No Args]"""
+        self.reset(self.level + 1, self.score, self.lives + 1)
+    
+    def snapshot(self):
+        """Packs the whole state of the game into a compact binary blob, e.g. to save the game or to rewind it later.
+        
+        The blob holds the level counters, the spaceship, every enemy with its health, every bullet, the legendary enemy, the
+        damage to every fortification, the cooldowns and timers, and the random number generator state, so a game restored
+        from it continues exactly like the original would have.
+        
+        Returns:
+            bytes: The snapshot (see `SNAPSHOT_HEADER` for the layout).
+        """
+        player = self.player.sprite
+        ship = self.spaceship
+        legendary = self.legendary.sprite
+        player_bullets = ship.bullets.sprites() if player else []
+        forts = self.blocks.sprites()
+        parts = [SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.level, self.score, self.lives, self.game_over, self.tick, self.seed,
+            self.enemy_direction, self.enemy_cooldown, self.legendary_count, self.legend_spawn_time,
+            self.formation_shape[0], self.formation_shape[1],
+            player is not None, ship.can_shoot, ship.rect.x, ship.rect.y, ship.bullet_time,
+            legendary is not None, legendary.rect.x if legendary else 0, legendary.rect.y if legendary else 0,
+            legendary.speed if legendary else 0,
+            len(self.enemies), len(self.enemy_bullets), len(player_bullets), len(forts))]
+        pack_enemy = SNAPSHOT_ENEMY.pack
+        enemy_rect = self.enemies.rect
+        for enemy in self.enemies:
+            row, column = enemy.slot if enemy.slot is not None else (NO_SLOT, NO_SLOT)
+            rect = enemy_rect(enemy.index)
+            parts.append(pack_enemy(ENEMY_CODES[type(enemy)], rect.x, rect.y, enemy.health, row, column))
+        pack_bullet = SNAPSHOT_BULLET.pack
+        for bullets in (self.enemy_bullets, player_bullets):
+            for bullet in bullets:
+                parts.append(pack_bullet(bullet.rect.x, bullet.rect.y, bullet.speed, BULLET_COLOURS.index(bullet.colour)))
+        for fort in forts:
+            parts.append(fort.cells)
+        version, internal, gauss = self.rng.getstate()
+        parts.append(SNAPSHOT_RNG.pack(version, gauss is not None, gauss or 0.0))
+        parts.append(array("I", internal).tobytes())
+        return b"".join(parts)
+    
+    def restore(self, blob):
+        """Puts the game back into the state saved by `snapshot`.
+        
+        Args:
+            blob (bytes): The snapshot.
+        
+        Raises:
+            ValueError: If the blob is not a snapshot of this version.
+        """
+        if blob[:4] != SNAPSHOT_MAGIC or blob[4] != SNAPSHOT_VERSION:
+            raise ValueError("not a version " + str(SNAPSHOT_VERSION) + " game snapshot")
+        (_, _, self.level, self.score, self.lives, self.game_over, self.tick, self.seed,
+         self.enemy_direction, self.enemy_cooldown, self.legendary_count, self.legend_spawn_time, rows, columns,
+         player_present, can_shoot, player_x, player_y, bullet_time,
+         legendary_present, legendary_x, legendary_y, legendary_speed,
+         enemy_count, enemy_bullet_count, player_bullet_count, fort_count) = SNAPSHOT_HEADER.unpack_from(blob)
+        offset = SNAPSHOT_HEADER.size
+        self.formation_shape = (rows, columns)
+        
+        ship = self.spaceship
+        ship.reset()
+        ship.rect.topleft = (player_x, player_y)
+        ship.can_shoot = bool(can_shoot)
+        ship.bullet_time = bullet_time
+        if player_present:
+            self.player.add(ship)
+        else:
+            self.player.empty()
+        
+        self.legendary.empty()
+        if legendary_present:
+            legendary = Legendary_Enemy("left")
+            legendary.rect.topleft = (legendary_x, legendary_y)
+            legendary.speed = legendary_speed
+            self.legendary.add(legendary)
+        
+        self.enemies.empty()
+        for _ in range(enemy_count):
+            code, x, y, health, row, column = SNAPSHOT_ENEMY.unpack_from(blob, offset)
+            offset += SNAPSHOT_ENEMY.size
+            enemy = ENEMY_TYPES[code](x, y)
+            enemy.health = health
+            enemy.slot = (row, column) if row != NO_SLOT else None
+            self.enemies.add(enemy)
+        
+        for bullet in self.enemy_bullets.sprites():
+            bullet.kill()
+        for group, count in ((self.enemy_bullets, enemy_bullet_count), (ship.bullets, player_bullet_count)):
+            for _ in range(count):
+                x, y, speed, colour = SNAPSHOT_BULLET.unpack_from(blob, offset)
+                offset += SNAPSHOT_BULLET.size
+                bullet = bullet_pool.acquire((0, 0), speed, BULLET_COLOURS[colour])
+                bullet.rect.topleft = (x, y)
+                group.add(bullet)
+        
+        forts = self.blocks.sprites()
+        if len(forts) != fort_count:
+            raise ValueError("the snapshot has " + str(fort_count) + " fortifications, but the game has " + str(len(forts)))
+        for fort in forts:
+            end = offset + len(fort.cells)
+            if fort.cells != blob[offset:end]:
+                fort.set_cells(blob[offset:end])
+            offset = end
+        
+        version, has_gauss, gauss = SNAPSHOT_RNG.unpack_from(blob, offset)
+        offset += SNAPSHOT_RNG.size
+        internal = array("I")
+        internal.frombytes(blob[offset:])
+        self.rng.setstate((version, tuple(internal), gauss if has_gauss else None))
     
     def build_fortification(self, x_offset, y_offset, offset):
         """Builds a fortification at the specified x and y offsets, using the predefined shape.
@@ -111,13 +367,7 @@ class Game:
             y_offset (int): The y-coordinate offset for the fortification.
             offset (int): The additional x-coordinate offset from the left for the fortification.
         """
-        for row_index, row in enumerate(self.shape):
-            for column_index, column in enumerate(row):
-                if column == "x":
-                    x_coordinate = column_index * 6 + x_offset + offset
-                    y_coordinate = row_index * 6 + y_offset
-                    block = Fortification(6, (241, 79, 80), x_coordinate, y_coordinate)
-                    self.blocks.add(block)
+        self.blocks.add(Fortification(self.shape, 6, (241, 79, 80), x_offset + offset, y_offset))
     
     def build_multiple_forts(self, start_x, start_y, nums):
         """Builds multiple fortifications at the specified starting x and y coordinates, using the offsets provided in the `nums` list.
@@ -141,42 +391,29 @@ class Game:
         Returns:
             list: The sorted list with the highest values in the middle.
         """
-        out = inp.copy()
-        out.sort()
-        return out[len(out)%2::2] + out[::-2]
+        return high_in_middle(inp)
     
     def generate_enemies(self):
-        """Generates a list of enemies with varying difficulty levels, sorted with the highest values in the middle.
+        """Generates the enemies of the level's formation, sorted with the highest values in the middle.
         
-        The method generates a list of 48 enemies, where the difficulty level of each enemy is determined by a random 
-        number between 1 and 100 multiplied by the current game level. The enemies are then sorted into 6 rows, with the 
-        highest values in the middle of each row.
+        The difficulty of each of the `self.formation.rows` x `self.formation.columns` enemies is determined by a random
+        number between 1 and 100 multiplied by the current game level, and compared with the formation's thresholds (see
+        the 'formations' file). The enemies are then sorted into rows, with the highest values in the top rows and in the
+        middle of each row. The formation is memoised per level and seed, and the game's random number generator continues
+        from the state it would have reached by rolling the formation itself.
         
         Additionally, the method generates a list of legendary enemies, which are the most difficult enemies (level 4).
         These extra enemies are added to the end of the output list.
         
         Returns:
-            list: A list of 6 rows of enemies, with the highest values in the middle of each row, and a list of extra enemies at the end.
-        """
-        out = []
-        extra = []
-        for i in range(48):
-            en = randint(1, 100) * self.level/10
-            if en <= 78:
-                out.append(1)
-            elif en <= 93:
-                out.append(2)
-            elif en <= 98:
-                out.append(3)
-            else:
-                out.append(3)
-                extra.append(4)
-        out.sort(reverse=True)
-        output = [self.sort_with_high_in_middle(out[:8]), self.sort_with_high_in_middle(out[8:16]), self.sort_with_high_in_middle(out[16:24]), self.sort_with_high_in_middle(out[24:32]), self.sort_with_high_in_middle(out[32:40]), self.sort_with_high_in_middle(out[40:]), extra]
+            tuple: The rows of enemies, with the highest values in the middle of each row, and a tuple of extra enemies at the end.
+        """
+        output, rng_state = formations.generate(self.level, self.seed, self.formation)
+        self.rng.setstate(rng_state)
         return output
     
-    def enemy_setup(self, rows, columns, x_offset=70, y_offset=100):  
-        """Sets up the enemies on the game screen based on the provided rows, columns, and offsets.
+    def enemy_setup(self, rows, columns, x_offset=70, y_offset=100, x_spacing=60, y_spacing=48):
+        """Sets up the enemies on the game screen based on the provided rows, columns, offsets and spacing.
         
         The method iterates through the rows and columns, calculating the x and y positions for each
         enemy based on the offsets. It then creates an enemy sprite of the appropriate type (Rare_Enemy, 
@@ -187,50 +424,56 @@ class Game:
             columns (int): The number of columns of enemies to create.
             x_offset (int, optional): The horizontal offset for the enemy positions. Defaults to 70.
             y_offset (int, optional): The vertical offset for the enemy positions. Defaults to 100.
+            x_spacing (int, optional): The horizontal distance between neighbouring enemies. Defaults to 60.
+            y_spacing (int, optional): The vertical distance between neighbouring rows. Defaults to 48.
         
         """
+        self.formation_shape = (rows, columns)
+        sprites = []
         for row in range(rows):
             for column in range(columns):
-                x = column * 60 + x_offset
-                y = row * 48 + y_offset
+                x = column * x_spacing + x_offset
+                y = row * y_spacing + y_offset
                 num = self.enemies_lst[row][column]
                 if num == 1: enemy_sprite = Rare_Enemy(x, y)
                 elif num == 2: enemy_sprite = Epic_Enemy(x, y)
                 elif num == 3: enemy_sprite = Mythic_Enemy(x, y)
-                self.enemies.add(enemy_sprite)
+                enemy_sprite.slot = (row, column)
+                sprites.append(enemy_sprite)
+        self.enemies.add(*sprites)
     
     def enemy_move_down(self,distance):
-        """Moves all enemies down by the specified distance.
-        
-        This method iterates through all the enemy sprites in the `self.enemies`
-        group and moves each one down by the specified `distance` value.
+        """Moves all enemies down by the specified distance, with a single array operation on the formation.
         
         Args:
             distance (int): The number of pixels to move the enemies down.
         
         """
-        if self.enemies:
-            for alien in self.enemies.sprites():
-                alien.rect.y += distance
+        self.enemies.drop(distance)
     
     def enemy_position_checker(self):
         """Checks the position of all enemies on the game screen and adjusts their movement direction and vertical position accordingly.
         
-        This method iterates through all the enemy sprites in the `self.enemies` group and checks the position of each one. If an
-        enemy's right edge reaches the right side of the screen (720 pixels), the `self.enemy_direction` is set to -1 to make the 
-        enemies move left, and the `enemy_move_down` method is called to move all enemies down by 2 pixels. If an enemy's left edge 
-        reaches the left side of the screen (0 pixels), the `self.enemy_direction` is set to 1 to make the enemies move right, and 
-        the `enemy_move_down` method is called to move all enemies down by 2 pixels.
-        """
+        If an enemy's right edge reaches the right side of the screen (720 pixels), the `self.enemy_direction` is set to -1 to make the 
+        enemies move left. If an enemy's left edge reaches the left side of the screen (0 pixels), the `self.enemy_direction` is set to 1 
+        to make the enemies move right. Every enemy touching an edge moves the whole formation down by 2 pixels.
         
-        all_enemies = self.enemies.sprites()
-        for enemy in all_enemies:
-            if enemy.rect.right >= 720:
-                self.enemy_direction = -1
-                self.enemy_move_down(2)
-            elif enemy.rect.left <= 0:
-                self.enemy_direction = 1
-                self.enemy_move_down(2)
+        The formation's bounds are found with a single min/max over its arrays, so the usual case where no enemy touches an
+        edge costs two array reductions. Otherwise the direction is set by the last enemy (in formation order) touching an
+        edge, and the drop is applied with a single call to `enemy_move_down`.
+        """
+        enemies = self.enemies
+        live = enemies.live()
+        if not len(live):
+            return
+        left = enemies.x[live]
+        right = left + enemies.width[live]
+        if right.max() < 720 and left.min() > 0:
+            return
+        at_right = right >= 720
+        touching = numpy.flatnonzero(at_right | (left <= 0))
+        self.enemy_direction = -1 if at_right[touching[-1]] else 1
+        self.enemy_move_down(2 * len(touching))
     
     def enemy_shoot(self):
         """Shoots enemy bullets at random intervals.
@@ -242,11 +485,11 @@ class Game:
         """
         self.enemy_cooldown += 1
         if self.enemies.sprites() and self.enemy_cooldown > (60/(self.level+1)): #* The second number is the lasers per second
-            randEnemy = choice(self.enemies.sprites())
+            randEnemy = self.rng.choice(self.enemies.sprites())
             bullet = randEnemy.shoot()
             self.enemy_bullets.add(bullet)
             self.enemy_cooldown = 0
-            self.bullet_sound.play()
+            audio.play("Assets/bullet.wav", 0.1)
     
     def legendary_shoot(self):
         """Shoots a triple-shot from the legendary enemy.
@@ -255,7 +498,7 @@ class Game:
         whether to shoot the triple-shot, and if so, it creates three bullet sprites and adds them to the `self.enemy_bullets` group.
         """
         if self.legendary.sprites() != []:
-            if randint(1,1000) <= 50:
+            if self.rng.randint(1,1000) <= 50:
                 b1, b2, b3 = self.legendary.sprite.shoot()
                 self.enemy_bullets.add(b1)
                 self.enemy_bullets.add(b2)
@@ -272,8 +515,8 @@ class Game:
         """
         self.legend_spawn_time -= 1
         if self.legend_spawn_time <= 0 and self.legendary_count > 0:
-            self.legendary.add(Legendary_Enemy(choice(["right", "left"])))
-            self.legend_spawn_time = randint(400, 800)
+            self.legendary.add(Legendary_Enemy(self.rng.choice(["right", "left"])))
+            self.legend_spawn_time = self.rng.randint(400, 800)
             self.legendary_count -= 1
     
     def display_lives_score(self, screen):
@@ -283,12 +526,56 @@ class Game:
         the `self.font` object to render the text, and positions the score text in the top-left corner and the health 
         text in the top-right corner of the screen.
         """
-        score = self.font.render("Score: " + str(self.score), False, 'white')
-        score_rect = score.get_rect(topleft=(10,0))
-        screen.blit(score, score_rect)
-        score = self.font.render("Health: " + str(self.lives), False, 'white')
-        score_rect = score.get_rect(topright=(710,0))
-        screen.blit(score, score_rect)
+        for text, text_rect in self.hud():
+            screen.blit(text, text_rect)
+    
+    def hud(self):
+        """Renders the score and health text. The text is only rasterised when the score or health has changed.
+        
+        Returns:
+            list: The (surface, rect) pair of the score text and of the health text.
+        """
+        score = assets.text(self.font, "Score: " + str(self.score), False, 'white')
+        health = assets.text(self.font, "Health: " + str(self.lives), False, 'white')
+        return [(score, score.get_rect(topleft=(10,0))), (health, health.get_rect(topright=(710,0)))]
+    
+    def fortification_hit(self, rect):
+        """Erodes every fortification block that overlaps the given rectangle.
+        
+        Args:
+            rect (pygame.Rect): The rectangle of the bullet or enemy hitting the fortifications.
+        
+        Returns:
+            bool: True if at least one block was destroyed.
+        """
+        hit = False
+        for fort in self.blocks:
+            if fort.erode(rect):
+                hit = True
+        return hit
+    
+    def collide(self, sprite, group, dokill, grid=None):
+        """Finds the sprites in a group that collide with a sprite, like `pygame.sprite.spritecollide`.
+        
+        When a spatial hash of the group is given, only the sprites sharing a grid cell with the sprite are checked.
+        
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite to check.
+            group (pygame.sprite.AbstractGroup): The group to check against.
+            dokill (bool): Whether to kill the colliding sprites.
+            grid (SpatialHash, optional): A spatial hash built from the group this frame. Defaults to None (check every sprite).
+        
+        Returns:
+            list: The colliding sprites.
+        """
+        if grid is None:
+            return pygame.sprite.spritecollide(sprite, group, dokill)
+        rect = sprite.rect
+        hits = [other for other in grid.query(rect) if group.has(other) and rect.colliderect(other.rect)]
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
     
     def check_collisions(self):
         """Checks for collisions between various game objects and updates the game state accordingly.
@@ -298,32 +585,45 @@ class Game:
           and updates the score and removes the colliding objects as appropriate.
         - Checks if enemies collide with blocks or the player, and updates the game over state if the player is hit.
         - Checks if enemy bullets collide with blocks or the player, and reduces the player's lives if hit.
+        
+        Collisions with the enemies are tested against the formation's arrays, a whole formation at a time. When
+        `self.broadphase` is set, the enemy bullets are bucketed into a spatial hash once per frame and the player's bullets
+        are only checked against nearby ones.
         """
+        enemies = self.enemies
+        enemy_bullet_grid = None
+        if self.broadphase:
+            enemy_bullet_grid = self.enemy_bullet_grid
+            enemy_bullet_grid.build(self.enemy_bullets)
         if self.player.sprite.bullets:
             for bul in self.player.sprite.bullets:
-                if pygame.sprite.spritecollide(bul, self.blocks, True):
+                if self.fortification_hit(bul.rect):
+                    bul.kill()
+                hits = enemies.colliding(bul.rect)
+                if len(hits):
+                    enemies.health[hits] -= 1
+                    self.score += int(enemies.value[hits].sum())
                     bul.kill()
-                enemy_hit_list = pygame.sprite.spritecollide(bul, self.enemies, False)
-                if enemy_hit_list:
-                    for enemy in enemy_hit_list:
-                        enemy.health -= 1
-                        self.score += enemy.value
-                        bul.kill()
                 if pygame.sprite.spritecollide(bul, self.legendary, True):
                     self.score += 1000
                     bul.kill()
-                if pygame.sprite.spritecollide(bul, self.enemy_bullets, True):
+                if self.collide(bul, self.enemy_bullets, True, enemy_bullet_grid):
                     self.score += 5
                     bul.kill()
-        if self.enemies:
-            for en in self.enemies:
-                pygame.sprite.spritecollide(en, self.blocks, True)
-                if pygame.sprite.spritecollide(en, self.player, True):
-                    self.game_over = -1
-                    self.lives = -1
+        if enemies:
+            forts = [fort.rect for fort in self.blocks]
+            if forts:
+                #* Only the enemies overlapping the area of the fortifications can erode them
+                for index in enemies.colliding(forts[0].unionall(forts[1:])).tolist():
+                    self.fortification_hit(enemies.rect(index))
+            player = self.player.sprite
+            if player is not None and len(enemies.colliding(player.rect)):
+                player.kill()
+                self.game_over = -1
+                self.lives = -1
         if self.enemy_bullets:
             for bul in self.enemy_bullets:
-                if pygame.sprite.spritecollide(bul, self.blocks, True):
+                if self.fortification_hit(bul.rect):
                     bul.kill()
                 if pygame.sprite.spritecollide(bul, self.player, False):
                     bul.kill()
@@ -331,72 +631,153 @@ class Game:
                     if self.lives <= 0:
                         self.game_over = -1
     
-    def victory_message(self, screen):
+    def victory_message(self):
         """Checks if the player has defeated all enemies, and if so, sets the `game_over` flag to 1 to indicate a victory."""
         if not self.enemies.sprites():
             self.game_over = 1
     
-    def update(self, screen):
-        """Updates the game state and draws the game objects on the screen.
+    def step(self, actions=None):
+        """Advances the game by exactly one tick, without drawing anything.
         
         This method is responsible for the following:
-        - Updating the player's position and bullets
+        - Updating the player's position and bullets from the given actions
         - Updating the enemies' positions and shooting
         - Checking for collisions between various game objects
         - Checking if the player has won the game
-        - Drawing the player, enemies, bullets, and blocks on the screen
-        - Displaying the player's lives and score
         
-        If the game is over, this method returns the next level, the player's score, and the player's lives.
+        Nothing is done once the game is over. Game time is measured in ticks, so this never reads the keyboard or the real clock.
+        
+        Args:
+            actions (Actions, optional): The player's input for this tick. Defaults to None (no input).
+        
+        Returns:
+            dict: The state of the game after the tick (see `state`).
         """
         if self.game_over == 0:
-            self.player.update()
-            self.enemies.update(self.enemy_direction)
-            self.enemy_position_checker()
-            self.enemy_shoot()
-            self.enemy_bullets.update()
-            self.enemy_bullets.draw(screen)
-            self.legendary_spawner()
-            self.legendary_shoot()
-            self.legendary.draw(screen)
-            self.legendary.update()
+            actions = actions or NO_ACTIONS
+            if self.recorder is not None:
+                self.recorder.record(actions)
+            run = self.profiler.run if self.profiler is not None else run_stage
+            run("player", self.player.update, actions, self.time())
+            run("enemies", self.enemies.update, self.enemy_direction)
+            run("enemy_position_checker", self.enemy_position_checker)
+            run("enemy_shoot", self.enemy_shoot)
+            run("enemy_bullets", self.enemy_bullets.update)
+            run("legendary_spawner", self.legendary_spawner)
+            run("legendary_shoot", self.legendary_shoot)
+            run("legendary", self.legendary.update)
             
-            self.check_collisions()
-            self.victory_message(screen)
-            
-            self.player.sprite.bullets.draw(screen)
-            self.player.draw(screen)
-            self.display_lives_score(screen)
-            
-            self.blocks.draw(screen)
-            self.enemies.draw(screen)
+            run("check_collisions", self.check_collisions)
+            run("victory_message", self.victory_message)
+            self.tick += 1
+        return self.state()
+    
+    def time(self):
+        """Returns the game time in milliseconds, derived from the tick count.
+        
+        Returns:
+            float: The number of milliseconds of game time that have passed.
+        """
+        return self.tick * 1000 / FPS
+    
+    def state(self):
+        """Returns a summary of the current game state.
+        
+        Returns:
+            dict: The tick, level, score, lives, game over flag, player x-coordinate and the enemy, bullet and legendary counts.
+        """
+        return {
+            "tick": self.tick,
+            "level": self.level,
+            "score": self.score,
+            "lives": self.lives,
+            "game_over": self.game_over,
+            "player_x": self.player.sprite.rect.centerx if self.player.sprite else None,
+            "enemies": len(self.enemies),
+            "enemy_bullets": len(self.enemy_bullets),
+            "player_bullets": len(self.player.sprite.bullets) if self.player.sprite else 0,
+            "legendary": len(self.legendary),
+        }
+    
+    def draw(self, screen):
+        """Draws the player, enemies, bullets, blocks and the player's lives and score on the screen.
+        
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+        """
+        run = self.profiler.run if self.profiler is not None else run_stage
+        run("draw_enemy_bullets", self.enemy_bullets.draw, screen)
+        run("draw_legendary", self.legendary.draw, screen)
+        if self.player.sprite:
+            run("draw_player_bullets", self.player.sprite.bullets.draw, screen)
+        run("draw_player", self.player.draw, screen)
+        run("display_lives_score", self.display_lives_score, screen)
+        
+        run("draw_blocks", self.blocks.draw, screen)
+        run("draw_enemies", self.enemies.draw, screen)
+    
+    def update(self, screen):
+        """Updates the game state from the keyboard and draws the game objects on the screen.
+        
+        This method advances the game by one tick with `step`, using the keys currently held down, then draws everything with `draw`.
+        
+        If the game is over, this method returns the next level, the player's score, and the player's lives.
+        """
+        if self.game_over == 0:
+            self.step(Actions.from_keys(pygame.key.get_pressed()))
+            audio.flush()
+            self.draw(screen)
+            return None, 0, None
+        return self.result()
+    
+    def result(self):
+        """Returns the outcome of the game, stopping the music once the game is over.
+        
+        Returns:
+            tuple (int, int, int): (None, 0, None) while the game is running, otherwise the next level, the player's score, and
+            the player's lives (-1 if the player lost).
+        """
+        if self.game_over == 0:
             return None, 0, None
         elif self.game_over == -1:
-            self.music.stop()
+            audio.stop_music()
             return self.level, self.score, -1
         elif self.game_over == 1:
-            self.music.stop()
+            audio.stop_music()
             return self.level+1, self.score, self.lives+1
 
+    def close(self):
+        """Releases the game's resources once it is no longer needed.
+        
+        The music is stopped, every bullet still in flight is returned to the bullet pool, and all of the sprite groups are emptied.
+        """
+        audio.stop_music()
+        if self.player.sprite:
+            for bullet in self.player.sprite.bullets.sprites():
+                bullet.kill()
+        for bullet in self.enemy_bullets.sprites():
+            bullet.kill()
+        for group in (self.enemies, self.legendary, self.blocks, self.player):
+            group.empty()
+        self.recorder = None
+        self.profiler = None
+
 class Spaceship(pygame.sprite.Sprite):
     """Represents the player's spaceship in the game. The spaceship can move left and right, and shoot bullets.
     
     Attributes:
-        bullet_sound (pygame.mixer.Sound): The sound played when the player fires a bullet.
         image (pygame.Surface): The image of the spaceship.
         rect (pygame.Rect): The bounding box of the spaceship.
         speed (int): The speed at which the spaceship moves.
         can_shoot (bool): A flag indicating whether the player can shoot a bullet.
-        bullet_time (int): The time since the last bullet was fired.
+        bullet_time (float): The game time at which the last bullet was fired, in milliseconds.
         bullet_cooldown (int): The minimum time between each bullet fired.
     """
     
     def __init__(self):
         """Initializes the player's spaceship in the game. [No Args]"""
         super().__init__()
-        self.bullet_sound = pygame.mixer.Sound("Assets/bullet.wav")
-        self.bullet_sound.set_volume(0.5)
-        self.image = pygame.image.load("Assets\player.png").convert_alpha()
+        self.image = assets.image("Assets/player.png")
         self.rect = self.image.get_rect(midbottom=(360,680))
         self.speed = 8
         self.can_shoot = True
@@ -405,38 +786,51 @@ class Spaceship(pygame.sprite.Sprite):
         
         self.bullets = pygame.sprite.Group()
     
-    def update(self):
+    def reset(self):
+        """Puts the spaceship back at its starting position, ready to shoot, and returns its bullets to the pool. [No Args]"""
+        for bullet in self.bullets.sprites():
+            bullet.kill()
+        self.rect.midbottom = (360,680)
+        self.can_shoot = True
+        self.bullet_time = 0
+    
+    def update(self, actions, now):
         """Updates the player's spaceship movement and shooting.
         
         This method is responsible for handling the player's input to move the spaceship left and right, 
-        and to shoot bullets. It checks for key presses and updates the spaceship's position and bullet 
-        firing accordingly.
+        and to shoot bullets, and for moving the bullets already fired.
+        
+        Args:
+            actions (Actions): The player's input for this tick.
+            now (float): The current game time in milliseconds.
         """
-        self.move_shoot()
+        self.move_shoot(actions, now)
         self.bullets.update()
     
-    def move_shoot(self):
+    def move_shoot(self, actions, now):
         """Handles the movement and shooting of the player's spaceship.
         
         This method is responsible for updating the position of the spaceship based on the player's input, and for 
-        firing bullets when the player presses the spacebar.
+        firing bullets when the player presses the fire button.
         The spaceship can move left and right, but is constrained within the game window. The player can only fire
         a bullet if the `can_shoot` flag is set to `True`, which is controlled by a cooldown timer to limit the rate of fire.
-        """
         
-        keys = pygame.key.get_pressed()
-        if (keys[pygame.K_a] or keys[pygame.K_LEFT]) and self.rect.x > 5:
+        Args:
+            actions (Actions): The player's input for this tick.
+            now (float): The current game time in milliseconds.
+        """
+        if actions.left and self.rect.x > 5:
             self.rect.x -= self.speed
-        elif (keys[pygame.K_d] or keys[pygame.K_RIGHT]) and self.rect.x < 655:
+        elif actions.right and self.rect.x < 655:
             self.rect.x += self.speed
         
-        if keys[pygame.K_SPACE] and self.can_shoot:
+        if actions.shoot and self.can_shoot:
             self.shoot()
-            self.bullet_sound.play()
+            audio.play("Assets/bullet.wav", 0.5)
             self.can_shoot = False
-            self.bullet_time = pygame.time.get_ticks()
+            self.bullet_time = now
         
-        if pygame.time.get_ticks() - self.bullet_time >= self.bullet_cooldown:
+        if now - self.bullet_time >= self.bullet_cooldown:
             self.can_shoot = True
     
     def shoot(self):
@@ -444,32 +838,128 @@ class Spaceship(pygame.sprite.Sprite):
         
         This method creates a new Bullet object and adds it to the player's bullets group. The bullet is positioned at the center of the player's spaceship's rectangle.
         """
-        self.bullets.add(Bullet(self.rect.center))
+        self.bullets.add(bullet_pool.acquire(self.rect.center))
     
 
 class Fortification(pygame.sprite.Sprite):
-    """Represents a fortification object in the game.
+    """Represents a single destructible fortification (bunker) in the game.
     
-    The `Fortification` class is a sprite that represents a fortification or barrier in the game. It is used to create obstacles that can be destroyed by enemy fire.
+    The `Fortification` class is a sprite that represents a whole fortification or barrier in the game. It is used to create obstacles 
+    that can be destroyed by enemy fire. The bunker is made up of a grid of square blocks; which blocks are still standing is kept in 
+    a bit array, which collisions are tested against, and destroyed blocks are erased from the bunker's single image.
     
     Attributes:
-        image (pygame.Surface): The "image" of the fortification.
+        shape (list): The rows of the bunker shape, where an "x" marks a block.
+        size (int): The width and height of one block, in pixels.
+        colour (tuple/str): The colour of the blocks.
+        rows (int): The number of block rows in the shape.
+        columns (int): The number of block columns in the shape.
+        cells (bytearray): One byte per block, 1 while the block is standing and 0 once it has been destroyed.
+        image (pygame.Surface): The image of the whole fortification.
         rect (pygame.Rect): The rectangle that defines the position and size of the fortification.
+        version (int): A counter that goes up every time the image changes, so renderers know when to redraw it.
+        intact (bytes): The cells of the undamaged fortification.
+        cells_total (int): The number of blocks in the undamaged fortification.
     """
     
-    def __init__(self, size, colour, x, y):
-        """Initializes a new Bullet object with the specified size, color, and starting position.
+    def __init__(self, shape, size, colour, x, y):
+        """Initializes a new Fortification object with the specified shape, block size, color, and position.
         
         Args:
-            size (int): The size of the fortification.
-            colour (tuple/str): The RGB color of the bullet or the string name of the bullet.
-            x (int): The x-coordinate of the bullet's starting position.
-            y (int): The y-coordinate of the bullet's starting position.
+            shape (list): The rows of the bunker shape, where an "x" marks a block.
+            size (int): The size of one block of the fortification.
+            colour (tuple/str): The RGB color of the blocks or the string name of the colour.
+            x (int): The x-coordinate of the fortification's top-left corner.
+            y (int): The y-coordinate of the fortification's top-left corner.
         """
         super().__init__()
-        self.image = pygame.Surface((size, size))
-        self.image.fill(colour)
-        self.rect = self.image.get_rect(topleft=(x,y))
+        self.shape = shape
+        self.size = size
+        self.colour = colour
+        self.rows = len(shape)
+        self.columns = max(len(row) for row in shape)
+        self.rect = pygame.Rect(x, y, self.columns * size, self.rows * size)
+        self.version = 0
+        cells = bytearray(self.rows * self.columns)
+        for row_index, row in enumerate(shape):
+            for column_index, column in enumerate(row):
+                if column == "x":
+                    cells[row_index * self.columns + column_index] = 1
+        self.intact = bytes(cells)
+        self.cells_total = sum(cells)
+        self.restore()
+    
+    def restore(self):
+        """Rebuilds every block of the fortification, undoing all damage. [No Args]"""
+        self.set_cells(self.intact)
+    
+    def render(self, cells):
+        """Draws the image of a set of standing blocks, without changing the fortification.
+        
+        Only the fortification's shape, block size and colour are read, so this can run on a worker thread while the
+        fortification itself is in use.
+        
+        Args:
+            cells (bytes): One byte per block, 1 for a standing block and 0 for a destroyed one.
+        
+        Returns:
+            pygame.Surface: The image.
+        """
+        size = self.size
+        image = pygame.Surface((self.columns * size, self.rows * size), pygame.SRCALPHA)
+        for index, cell in enumerate(cells):
+            if cell:
+                row, column = divmod(index, self.columns)
+                image.fill(self.colour, (column * size, row * size, size, size))
+        return image
+    
+    def set_cells(self, cells, rendered=None):
+        """Replaces which blocks are standing, redrawing the image to match, e.g. to restore a snapshot.
+        
+        Args:
+            cells (bytes): One byte per block, 1 for a standing block and 0 for a destroyed one.
+            rendered (pygame.Surface, optional): The image of the cells, already drawn with `render`. Defaults to None (it is
+                drawn now).
+        """
+        self.cells = bytearray(cells)
+        self.image = rendered if rendered is not None else self.render(self.cells)
+        self.version += 1
+    
+    def erode(self, rect):
+        """Destroys every standing block that overlaps the given rectangle.
+        
+        Args:
+            rect (pygame.Rect): The rectangle of the bullet or enemy hitting the fortification.
+        
+        Returns:
+            bool: True if at least one block was destroyed.
+        """
+        if not self.rect.colliderect(rect):
+            return False
+        size = self.size
+        first_column = max(0, (rect.left - self.rect.left) // size)
+        last_column = min(self.columns - 1, (rect.right - self.rect.left - 1) // size)
+        first_row = max(0, (rect.top - self.rect.top) // size)
+        last_row = min(self.rows - 1, (rect.bottom - self.rect.top - 1) // size)
+        hit = False
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                index = row * self.columns + column
+                if self.cells[index]:
+                    self.cells[index] = 0
+                    self.image.fill((0, 0, 0, 0), (column * size, row * size, size, size))
+                    hit = True
+        if hit:
+            self.version += 1
+        return hit
+    
+    def blocks_left(self):
+        """Returns the number of blocks still standing in the fortification.
+        
+        Returns:
+            int: The number of standing blocks.
+        """
+        return sum(self.cells)
     
 
 class Enemy(pygame.sprite.Sprite):
@@ -478,12 +968,17 @@ class Enemy(pygame.sprite.Sprite):
     The `Enemy` class is a sprite that represents an abstract enemy character in the game. It has attributes 
     for its image, position, health, and value. The class also includes methods for shooting a bullet and handling the enemy's death.
     
+    While the enemy is in an `EnemyFormation`, its position and health live in the formation's arrays and the sprite is a
+    view of them: `rect` is then an `EnemyRect`, which writes every change made to it back into the arrays.
+    
     Attributes:
         image (pygame.Surface): The image of the enemy character.
         rect (pygame.Rect): The rectangle that defines the position and size of the enemy character.
         value (int): The score value of the enemy character.
         health (int): The health of the enemy character.
-        explosion_sound (pygame.mixer.Sound): The sound effect played when the enemy character is destroyed.
+        slot (tuple): The (row, column) of the enemy in the formation. Defaults to None (not part of a formation).
+        formation (EnemyFormation): The formation holding the enemy's state, or None.
+        index (int): The element of the enemy in the formation's arrays, or None.
     """
 
     def __init__(self, type, x, y, health=1, val=10):
@@ -498,12 +993,48 @@ class Enemy(pygame.sprite.Sprite):
             val (int, optional): The score value of the enemy character. Defaults to 10.
         """
         super().__init__()
-        self.image = pygame.image.load("Assets/Alien_" + type + ".png").convert_alpha()
-        self.rect = self.image.get_rect(topleft=(x,y))
+        self.formation = None
+        self.index = None
+        self.image = assets.image("Assets/Alien_" + type + ".png")
+        self._rect = self.image.get_rect(topleft=(x,y))
         self.value = val
-        self.health = health
-        self.explosion_sound = pygame.mixer.Sound("Assets/explosion.wav")
-        self.explosion_sound.set_volume(0.3)
+        self._health = health
+        self._slot = None
+    
+    @property
+    def rect(self):
+        """pygame.Rect: The bounding box of the enemy. An `EnemyRect` while the enemy is in a formation."""
+        if self.formation is None:
+            return self._rect
+        return EnemyRect(self)
+    
+    @property
+    def health(self):
+        """int: The health of the enemy."""
+        if self.formation is None:
+            return self._health
+        return int(self.formation.health[self.index])
+    
+    @health.setter
+    def health(self, health):
+        if self.formation is None:
+            self._health = health
+        else:
+            self.formation.health[self.index] = health
+    
+    @property
+    def slot(self):
+        """tuple (int, int) or None: The (row, column) of the enemy in the level's layout, or None if it has none."""
+        if self.formation is None:
+            return self._slot
+        return self.formation.slot(self.index)
+    
+    @slot.setter
+    def slot(self, slot):
+        if self.formation is None:
+            self._slot = slot
+        else:
+            self.formation.row[self.index], self.formation.column[self.index] = slot if slot is not None else (NO_SLOT, NO_SLOT)
     
     def shoot(self):
         """Shoots a red bullet from the center of the enemy's rectangle.
@@ -511,18 +1042,23 @@ class Enemy(pygame.sprite.Sprite):
         Returns:
             Bullet: A new bullet object with the specified properties.
         """
-        bullet = Bullet(self.rect.center, -6, "red")
+        bullet = bullet_pool.acquire(self.rect.center, -6, "red")
         return bullet
     
     def update(self, direction):
         """Updates the position of the enemy based on the given direction, and plays the explosion sound effect if the enemy's health is 0 or less, then removes the enemy from the game.
         
+        The enemies of a formation are all updated at once by `EnemyFormation.update` instead.
+        
         Args:
             direction (int): The horizontal direction to move the enemy, where a positive value moves the enemy to the right and a negative value moves the enemy to the left.
         """
-        self.rect.x += direction
+        if self.formation is None:
+            self._rect.x += direction
+        else:
+            self.formation.x[self.index] += direction
         if self.health <= 0:
-            self.explosion_sound.play()
+            audio.play("Assets/explosion.wav", 0.3)
             self.kill()
     
 
@@ -551,7 +1087,7 @@ class Rare_Enemy(Enemy):
         Returns:
             Bullet: A new bullet object with the specified properties.
         """
-        bullet = Bullet(self.rect.center, -6, (255, 196, 0))
+        bullet = bullet_pool.acquire(self.rect.center, -6, (255, 196, 0))
         return bullet
     
 
@@ -579,7 +1115,7 @@ class Epic_Enemy(Enemy):
         Returns:
             Bullet: A new bullet object with the specified properties.
         """
-        bullet = Bullet(self.rect.center, -6, (255, 128, 0))
+        bullet = bullet_pool.acquire(self.rect.center, -6, (255, 128, 0))
         return bullet
     
 
@@ -608,10 +1144,239 @@ class Mythic_Enemy(Enemy):
         Returns:
             Bullet: A new bullet object with the specified properties.
         """
-        bullet = Bullet(self.rect.center, -6, "red")
+        bullet = bullet_pool.acquire(self.rect.center, -6, "red")
         return bullet
     
 
+def writing_back(name):
+    """Returns a `pygame.Rect` method that changes the rectangle in place and then writes it back to its enemy.
+    
+    Args:
+        name (str): The name of the in-place method.
+    
+    Returns:
+        callable: The method.
+    """
+    method = getattr(pygame.Rect, name)
+    def in_place(self, *args):
+        method(self, *args)
+        self.write_back()
+    in_place.__name__ = name
+    return in_place
+
+
+class EnemyRect(pygame.Rect):
+    """The rectangle of an enemy in a formation: a copy of the enemy's element of the formation's arrays that writes every
+    change back, so code like `enemy.rect.x += 1` or `enemy.rect.move_ip(0, 2)` moves the enemy as it would a plain sprite.
+    
+    Rectangles made from it (e.g. by `move` or `copy`) are detached and change nothing.
+    
+    Attributes:
+        enemy (Enemy): The enemy the rectangle belongs to, or None once detached.
+    """
+    
+    def __init__(self, enemy):
+        """Initializes the rectangle from the enemy's element of its formation.
+        
+        Args:
+            enemy (Enemy): The enemy, which must be in a formation.
+        """
+        formation, index = enemy.formation, enemy.index
+        super().__init__(formation.x[index], formation.y[index], formation.width[index], formation.height[index])
+        self.__dict__["enemy"] = enemy
+    
+    def __setattr__(self, name, value):
+        """Sets an attribute (e.g. `x`, `center` or `size`), then writes the rectangle back to the enemy.
+        
+        Args:
+            name (str): The name of the attribute.
+            value (object): The new value.
+        """
+        super().__setattr__(name, value)
+        self.write_back()
+    
+    def write_back(self):
+        """Copies the rectangle into the enemy's formation arrays, or into the enemy itself if it has left the formation. [No Args]"""
+        enemy = self.__dict__.get("enemy")
+        if enemy is None:
+            return
+        formation = enemy.formation
+        if formation is None:
+            enemy._rect.update(self)
+            return
+        index = enemy.index
+        formation.x[index], formation.y[index], formation.width[index], formation.height[index] = self
+    
+    move_ip = writing_back("move_ip")
+    inflate_ip = writing_back("inflate_ip")
+    scale_by_ip = writing_back("scale_by_ip")
+    update = writing_back("update")
+    clamp_ip = writing_back("clamp_ip")
+    union_ip = writing_back("union_ip")
+    unionall_ip = writing_back("unionall_ip")
+    normalize = writing_back("normalize")
+
+
+class EnemyFormation(pygame.sprite.Group):
+    """The group of the enemies of a level, with their state held in NumPy arrays (one element per enemy), so the whole
+    formation is moved, dropped, hit-tested and culled with array operations instead of a Python loop over the sprites.
+    
+    An enemy added to the formation gets an element in every array and its sprite becomes a view of that element; an enemy
+    leaving the formation (killed, removed or emptied out) takes its state back. Elements are only reused once the formation
+    is empty, so they stay in the order the enemies were added in, which is also the order of the group.
+    
+    Attributes:
+        x (numpy.ndarray): The x-coordinate of the left edge of every enemy.
+        y (numpy.ndarray): The y-coordinate of the top edge of every enemy.
+        width (numpy.ndarray): The width of every enemy.
+        height (numpy.ndarray): The height of every enemy.
+        health (numpy.ndarray): The health of every enemy.
+        value (numpy.ndarray): The score value of every enemy.
+        kind (numpy.ndarray): The type of every enemy, as its code in `ENEMY_TYPES`.
+        alive (numpy.ndarray): Whether every enemy is still in the formation.
+        row (numpy.ndarray): The row of every enemy's slot in the level's layout, `NO_SLOT` for an enemy without one.
+        column (numpy.ndarray): The column of every enemy's slot in the level's layout, `NO_SLOT` for an enemy without one.
+        views (list): The sprite of every enemy.
+        count (int): The number of elements in use. The arrays may be longer.
+    """
+    
+    def __init__(self, *sprites):
+        """Initializes the formation.
+        
+        Args:
+            *sprites (Enemy): The enemies to add.
+        """
+        for name, dtype in FORMATION_COLUMNS:
+            setattr(self, name, numpy.zeros(0, dtype))
+        self.views = []
+        self.count = 0
+        super().__init__(*sprites)
+    
+    def grow(self):
+        """Doubles the length of the arrays, keeping their contents. [No Args]"""
+        capacity = max(64, 2 * len(self.x))
+        for name, dtype in FORMATION_COLUMNS:
+            column = numpy.zeros(capacity, dtype)
+            old = getattr(self, name)
+            column[:len(old)] = old
+            setattr(self, name, column)
+    
+    def add_internal(self, sprite, layer=None):
+        """Adds an enemy to the group, moving its state into a new element of the arrays.
+        
+        Args:
+            sprite (Enemy): The enemy.
+            layer (int, optional): Unused. Defaults to None.
+        
+        Raises:
+            ValueError: If the enemy is already in another formation.
+        """
+        if sprite.formation is not None:
+            raise ValueError("an enemy can only be in one formation")
+        super().add_internal(sprite)
+        index = self.count
+        if index == len(self.x):
+            self.grow()
+        rect = sprite.rect
+        self.x[index] = rect.x
+        self.y[index] = rect.y
+        self.width[index] = rect.width
+        self.height[index] = rect.height
+        self.health[index] = sprite.health
+        self.value[index] = sprite.value
+        self.kind[index] = ENEMY_CODES.get(type(sprite), 0)
+        self.alive[index] = True
+        self.row[index], self.column[index] = sprite.slot if sprite.slot is not None else (NO_SLOT, NO_SLOT)
+        self.views.append(sprite)
+        sprite.formation, sprite.index = self, index
+        self.count += 1
+    
+    def remove_internal(self, sprite):
+        """Removes an enemy from the group, handing its state back to the sprite.
+        
+        Args:
+            sprite (Enemy): The enemy.
+        """
+        super().remove_internal(sprite)
+        index = sprite.index
+        sprite._rect = self.rect(index)
+        sprite._health = int(self.health[index])
+        sprite._slot = self.slot(index)
+        sprite.formation = sprite.index = None
+        self.alive[index] = False
+        self.views[index] = None
+        if not self.spritedict:
+            self.views = []
+            self.count = 0
+    
+    def rect(self, index):
+        """Returns the bounding box of an enemy.
+        
+        Args:
+            index (int): The element of the enemy.
+        
+        Returns:
+            pygame.Rect: A new rectangle with the enemy's position and size.
+        """
+        return pygame.Rect(self.x[index], self.y[index], self.width[index], self.height[index])
+    
+    def slot(self, index):
+        """Returns the slot of an enemy.
+        
+        Args:
+            index (int): The element of the enemy.
+        
+        Returns:
+            tuple (int, int) or None: The (row, column) of the enemy in the level's layout, or None if it has no slot.
+        """
+        if self.row[index] == NO_SLOT:
+            return None
+        return int(self.row[index]), int(self.column[index])
+    
+    def live(self):
+        """Returns the elements of the enemies still in the formation.
+        
+        Returns:
+            numpy.ndarray: The indices of the live elements, in formation order.
+        """
+        return numpy.flatnonzero(self.alive[:self.count])
+    
+    def colliding(self, rect):
+        """Returns the enemies that overlap a rectangle, like `pygame.Rect.colliderect` on every enemy at once.
+        
+        Args:
+            rect (pygame.Rect): The rectangle.
+        
+        Returns:
+            numpy.ndarray: The indices of the elements of the overlapping enemies, in formation order.
+        """
+        count = self.count
+        x = self.x[:count]
+        y = self.y[:count]
+        return numpy.flatnonzero(self.alive[:count] & (x < rect.right) & (x + self.width[:count] > rect.left)
+                                 & (y < rect.bottom) & (y + self.height[:count] > rect.top))
+    
+    def update(self, direction):
+        """Moves every enemy horizontally, then removes the enemies with no health left, playing the explosion sound for each.
+        
+        Args:
+            direction (int): The number of pixels to move the enemies right (negative to move them left).
+        """
+        count = self.count
+        self.x[:count] += direction
+        for index in numpy.flatnonzero(self.alive[:count] & (self.health[:count] <= 0)).tolist():
+            audio.play("Assets/explosion.wav", 0.3)
+            self.views[index].kill()
+    
+    def drop(self, distance):
+        """Moves every enemy down.
+        
+        Args:
+            distance (int): The number of pixels to move the enemies down.
+        """
+        self.y[:self.count] += distance
+
+
 #* The behaviour of this enemy is so different to the normal enemies
 #* that it is not worth inheriting from the base class.
 class Legendary_Enemy(pygame.sprite.Sprite):
@@ -633,7 +1398,7 @@ class Legendary_Enemy(pygame.sprite.Sprite):
             side (str): Specifies whether the enemy should start on the right or left side of the screen. Can be either "right" or "left".
         """
         super().__init__()
-        self.image = pygame.image.load("Assets/UFO_Legendary.png").convert_alpha()
+        self.image = assets.image("Assets/UFO_Legendary.png")
         if side == "right":
             x = 770
             self.speed = -2
@@ -653,21 +1418,24 @@ class Legendary_Enemy(pygame.sprite.Sprite):
             tuple (Bullet, Bullet, Bullet): A tuple of three new bullet objects with the specified properties.
         """
         x, y = self.rect.center
-        bullet1 = Bullet((x-20, y), -6, "red")
-        bullet2 = Bullet((x, y), -6, "red")
-        bullet3 = Bullet((x+20, y), -6, "red")
+        bullet1 = bullet_pool.acquire((x-20, y), -6, "red")
+        bullet2 = bullet_pool.acquire((x, y), -6, "red")
+        bullet3 = bullet_pool.acquire((x+20, y), -6, "red")
         return bullet1, bullet2, bullet3
 
 class Bullet(pygame.sprite.Sprite):
     """Represents a bullet in the Space Invaders game.
     
     The `Bullet` class is a sprite that represents a bullet fired by the player or an enemy in the Space Invaders game.
-    It has a fixed size and color, and moves vertically at a specified speed.
+    It has a fixed size and color, and moves vertically at a specified speed. Bullets are recycled through the `bullet_pool`,
+    so a killed bullet is handed back to the pool and reused by a later shot.
     
     Attributes:
-        image (pygame.Surface): The image of the bullet.
+        image (pygame.Surface): The image of the bullet, shared with every other bullet of the same colour.
         rect (pygame.Rect): The rectangle representing the bullet's position and size.
         speed (int): The vertical speed of the bullet.
+        colour (tuple/str): The colour of the bullet.
+        pooled (bool): Whether the bullet is currently sitting unused in the pool.
     """
     def __init__(self, position, speed=8, colour="yellow"):
         """Initializes a new instance of the Bullet class.
@@ -678,13 +1446,130 @@ class Bullet(pygame.sprite.Sprite):
             colour (str, optional): The color of the bullet. Defaults to "yellow".
         """
         super().__init__()
-        self.image = pygame.Surface((4,20))
-        self.image.fill(colour)
-        self.rect = self.image.get_rect(center=position)
+        self.rect = pygame.Rect(0, 0, 4, 20)
+        self.pooled = False
+        self.reset(position, speed, colour)
+    
+    def reset(self, position, speed=8, colour="yellow"):
+        """Re-initializes the bullet so it can be fired again.
+        
+        Args:
+            position (tuple): The new position of the bullet as a (x, y) tuple.
+            speed (int, optional): The vertical speed of the bullet. Defaults to 8.
+            colour (str, optional): The color of the bullet. Defaults to "yellow".
+        """
+        self.image = bullet_pool.surface(colour)
+        self.rect.center = position
         self.speed = speed
+        self.colour = colour
     
     def update(self):
         """Updates the y-coordinate of the bullet's rectangle by the current speed value. If the bullet goes off the top or bottom of the screen, it is removed from the game."""
         self.rect.y -= self.speed
         if self.rect.y <= -50 or self.rect.y >= 770:
             self.kill()
+    
+    def kill(self):
+        """Removes the bullet from all of its groups and returns it to the bullet pool."""
+        super().kill()
+        if not self.pooled:
+            bullet_pool.release(self)
+
+
+class BulletPool:
+    """Recycles `Bullet` objects and shares one pre-rendered surface per bullet colour.
+    
+    Attributes:
+        surfaces (dict): The pre-rendered bullet surfaces, keyed on colour.
+        free (list): The bullets that are ready to be reused.
+        created (int): The number of bullets that have been constructed.
+        reused (int): The number of shots that were served by a recycled bullet.
+        in_use (int): The number of bullets currently in flight.
+        high_water (int): The largest number of bullets that have been in flight at once.
+    """
+    
+    def __init__(self):
+        """Initializes an empty bullet pool. [No Args]"""
+        self.surfaces = {}
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.in_use = 0
+        self.high_water = 0
+    
+    def surface(self, colour):
+        """Returns the shared 4x20 surface for bullets of the given colour, rendering it on first use.
+        
+        Args:
+            colour (tuple/str): The colour of the bullet.
+        
+        Returns:
+            pygame.Surface: The shared bullet surface.
+        """
+        key = colour if isinstance(colour, str) else tuple(colour)
+        image = self.surfaces.get(key)
+        if image is None:
+            image = pygame.Surface((4,20))
+            image.fill(colour)
+            self.surfaces[key] = image
+        return image
+    
+    def acquire(self, position, speed=8, colour="yellow"):
+        """Returns a bullet ready to be fired, reusing a free one when possible.
+        
+        Args:
+            position (tuple): The initial position of the bullet as a (x, y) tuple.
+            speed (int, optional): The vertical speed of the bullet. Defaults to 8.
+            colour (str, optional): The color of the bullet. Defaults to "yellow".
+        
+        Returns:
+            Bullet: The bullet.
+        """
+        if self.free:
+            bullet = self.free.pop()
+            bullet.pooled = False
+            bullet.reset(position, speed, colour)
+            self.reused += 1
+        else:
+            bullet = Bullet(position, speed, colour)
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return bullet
+    
+    def release(self, bullet):
+        """Returns a bullet to the pool. Called by `Bullet.kill`, so releasing an already pooled bullet does nothing.
+        
+        Args:
+            bullet (Bullet): The bullet to recycle.
+        """
+        if bullet.pooled:
+            return
+        bullet.pooled = True
+        self.free.append(bullet)
+        self.in_use = max(0, self.in_use - 1)
+    
+    def stats(self):
+        """Returns the pool counters.
+        
+        Returns:
+            dict: The number of free, in-flight, created and reused bullets, and the high-water mark.
+        """
+        return {
+            "free": len(self.free),
+            "in_use": self.in_use,
+            "created": self.created,
+            "reused": self.reused,
+            "high_water": self.high_water,
+        }
+
+
+NO_ACTIONS = Actions()
+
+#* The codes that enemy types are stored as in snapshots and in `EnemyFormation.kind`
+ENEMY_TYPES = {1: Rare_Enemy, 2: Epic_Enemy, 3: Mythic_Enemy}
+ENEMY_CODES = {enemy_type: code for code, enemy_type in ENEMY_TYPES.items()}
+
+#* The one bullet pool shared by the player and every enemy
+bullet_pool = BulletPool()
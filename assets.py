@@ -0,0 +1,296 @@
+"""This file contains the shared asset registry used by every sprite, the `Game` class and the menus.
+
+Images, sounds and fonts are decoded from disk exactly once per process and the same `pygame.Surface`, `pygame.mixer.Sound`
+and `pygame.font.Font` objects are handed out to every caller that asks for them afterwards.
+
+Usage:
+
+from assets import assets
+
+image = assets.image("Assets/Alien_Rare.png")
+sound = assets.sound("Assets/explosion.wav", volume=0.3)
+font = assets.font("Assets/Pixeled.ttf", 20)
+text = assets.text(font, "Score: 10", False, "white")
+print(assets.stats())
+
+When a packed asset bundle is attached with `assets.use_bundle` (see the 'bundle' file), every asset in it is served from the
+bundle instead of the loose files.
+"""
+
+
+import time
+from collections import OrderedDict
+import pygame
+
+
+class SilentSound:
+    """A stand-in for `pygame.mixer.Sound` that is handed out when the mixer is not initialised, e.g. in headless runs.
+
+    It accepts the same calls as a real sound and does nothing.
+    """
+
+    def play(self, loops=0, maxtime=0, fade_ms=0):
+        """Does nothing and returns no channel."""
+        return None
+
+    def stop(self):
+        """Does nothing."""
+
+    def set_volume(self, value):
+        """Does nothing."""
+
+    def get_volume(self):
+        """Returns a volume of 0."""
+        return 0.0
+
+
+class TextCache:
+    """A least-recently-used cache of rendered text surfaces.
+
+    Text is keyed on the font, string, antialiasing and colours, so the same text is only rasterised once while it stays in use.
+
+    Attributes:
+        size (int): The largest number of surfaces kept; the least recently used one is dropped beyond that.
+        surfaces (collections.OrderedDict): The rendered surfaces, least recently used first.
+        hits (int): The number of requests served from the cache.
+        misses (int): The number of requests that had to be rendered.
+    """
+
+    def __init__(self, size=256):
+        """Initializes an empty text cache.
+
+        Args:
+            size (int, optional): The largest number of surfaces kept. Defaults to 256.
+        """
+        self.size = size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, string, antialias, colour, background=None):
+        """Returns the rendered text, rendering it with `font.render` if it is not cached.
+
+        Args:
+            font (pygame.font.Font): The font to render with.
+            string (str): The text.
+            antialias (bool): Whether to antialias the text.
+            colour (tuple/str): The colour of the text.
+            background (tuple/str, optional): The background colour. Defaults to None (transparent).
+
+        Returns:
+            pygame.Surface: The rendered text.
+        """
+        key = (font, string, antialias, colour if isinstance(colour, str) else tuple(colour),
+               background if background is None or isinstance(background, str) else tuple(background))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(string, antialias, colour, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached surfaces.
+        """
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.surfaces)}
+
+
+class AssetRegistry:
+    """A process-wide cache of decoded game assets.
+
+    Each asset is keyed on everything that changes the decoded object (the path, plus the volume for sounds and the size for fonts),
+    so two callers asking for the same key always share one object. Hit/miss counters and the total time spent loading from disk
+    are kept so the savings can be measured.
+
+    Attributes:
+        images (dict): The cached surfaces, keyed on path.
+        sounds (dict): The cached sounds, keyed on (path, volume).
+        fonts (dict): The cached fonts, keyed on (path, size).
+        hits (int): The number of requests served from the cache.
+        misses (int): The number of requests that had to be loaded from disk.
+        load_time (float): The total time spent loading assets from disk, in seconds.
+        texts (TextCache): The cache of rendered text.
+        bundle (Bundle): The packed asset bundle assets are loaded from, or None to load every asset from its own file.
+    """
+
+    def __init__(self):
+        """Initializes an empty asset registry. [No Args]"""
+        self.bundle = None
+        self.images = {}
+        self.sounds = {}
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.texts = TextCache()
+
+    def _fetch(self, cache, key, loader):
+        """Returns the cached asset for `key`, calling `loader` to create it on the first request.
+
+        Args:
+            cache (dict): The cache the asset belongs in.
+            key (hashable): The cache key of the asset.
+            loader (callable): A function with no arguments that loads the asset from disk.
+
+        Returns:
+            object: The shared asset.
+        """
+        asset = cache.get(key)
+        if asset is not None:
+            self.hits += 1
+            return asset
+        self.misses += 1
+        start = time.perf_counter()
+        asset = loader()
+        self.load_time += time.perf_counter() - start
+        cache[key] = asset
+        return asset
+
+    def image(self, path):
+        """Returns the shared surface for the image at `path`.
+
+        The image is converted to the display format (with per-pixel alpha) when a display surface exists, so blits stay fast.
+        Images from a bundle that are already in that format are used as they are, so they keep pointing into the mapped file.
+
+        Args:
+            path (str): The path of the image file.
+
+        Returns:
+            pygame.Surface: The shared image. Callers must not draw onto it.
+        """
+        def load():
+            if self.bundle is not None and path in self.bundle:
+                image = self.bundle.image(path)
+            else:
+                image = pygame.image.load(path)
+            if pygame.display.get_surface() is not None and not in_display_format(image):
+                image = image.convert_alpha()
+            return image
+        return self._fetch(self.images, path, load)
+
+    def sound(self, path, volume=1.0):
+        """Returns the shared sound for the audio file at `path`, at the given volume.
+
+        If the mixer is not initialised (no audio device, or a headless run) a `SilentSound` is returned instead and nothing is loaded.
+
+        Args:
+            path (str): The path of the audio file.
+            volume (float, optional): The volume of the sound, between 0 and 1. Defaults to 1.0.
+
+        Returns:
+            pygame.mixer.Sound: The shared sound.
+        """
+        if not pygame.mixer.get_init():
+            return SILENT_SOUND
+        def load():
+            sound = None
+            if self.bundle is not None and path in self.bundle:
+                sound = self.bundle.sound(path)
+            if sound is None:
+                sound = pygame.mixer.Sound(path)
+            sound.set_volume(volume)
+            return sound
+        return self._fetch(self.sounds, (path, volume), load)
+
+    def font(self, path, size):
+        """Returns the shared font for the font file at `path`, at the given size.
+
+        Args:
+            path (str): The path of the font file.
+            size (int): The point size of the font.
+
+        Returns:
+            pygame.font.Font: The shared font.
+        """
+        def load():
+            if self.bundle is not None and path in self.bundle:
+                return self.bundle.font(path, size)
+            return pygame.font.Font(path, size)
+        return self._fetch(self.fonts, (path, size), load)
+
+    def text(self, font, string, antialias, colour, background=None):
+        """Returns the rendered text for the given font, string and colour, rendering it only if it is not cached.
+
+        Args:
+            font (pygame.font.Font): The font to render with.
+            string (str): The text.
+            antialias (bool): Whether to antialias the text.
+            colour (tuple/str): The colour of the text.
+            background (tuple/str, optional): The background colour. Defaults to None (transparent).
+
+        Returns:
+            pygame.Surface: The shared rendered text. Callers must not draw onto it.
+        """
+        return self.texts.render(font, string, antialias, colour, background)
+
+    def stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached assets, the total load time in milliseconds, and the text cache counters.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "cached": len(self.images) + len(self.sounds) + len(self.fonts),
+            "load_time_ms": self.load_time * 1000,
+            "text": self.texts.stats(),
+        }
+
+    def add(self, kind, key, asset):
+        """Caches an asset that was decoded elsewhere, e.g. by the preloader's worker threads, unless it is already cached.
+
+        Args:
+            kind (str): The kind of asset: "image", "sound" or "font".
+            key (hashable): The cache key of the asset: the path of an image, the (path, volume) of a sound or the (path, size)
+                of a font.
+            asset (object): The asset, ready to use (images already converted, sounds already at their volume).
+
+        Returns:
+            object: The shared asset, which is the one that was already cached if there was one.
+        """
+        cache = {"image": self.images, "sound": self.sounds, "font": self.fonts}[kind]
+        return cache.setdefault(key, asset)
+
+    def use_bundle(self, bundle):
+        """Loads the assets found in a packed bundle from it from now on, instead of from their own files.
+
+        Args:
+            bundle (Bundle): The open bundle, or None to go back to the loose files.
+        """
+        self.bundle = bundle
+
+    def clear(self):
+        """Drops every cached asset and resets the counters. Needed after `pygame.quit()`, which invalidates all loaded assets.
+        The attached bundle, if any, is kept."""
+        bundle = self.bundle
+        self.__init__()
+        self.bundle = bundle
+
+
+def in_display_format(image):
+    """Returns whether an image already has the pixel format `convert_alpha` would convert it to.
+
+    Args:
+        image (pygame.Surface): The image. A display surface must exist.
+
+    Returns:
+        bool: True if converting the image would only copy it.
+    """
+    display = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+    return (image.get_flags() & pygame.SRCALPHA and image.get_bitsize() == display.get_bitsize()
+            and image.get_masks() == display.get_masks())
+
+
+SILENT_SOUND = SilentSound()
+
+#* The one registry shared by the whole process
+assets = AssetRegistry()
@@ -0,0 +1,192 @@
+"""This file contains the audio manager that plays every sound of the game.
+
+Game code never calls `Sound.play` itself; it asks the shared `audio` manager to play a sound, which only queues the request.
+Once per frame, `flush` plays the queued sounds through a fixed set of reserved mixer channels:
+- identical sounds requested in the same frame (e.g. three enemies dying to one volley) are played once
+- each sound has a limit on how many copies of it can be playing at the same time; requests over the limit are dropped
+- when every channel is busy, the sound that started the longest ago is cut off
+
+The music gets a reserved channel of its own, so effects never cut it off. When the mixer is not initialised (e.g. headless
+runs) or `enabled` is False, every call does nothing, so the game code does not need to know whether there is any audio.
+
+Usage:
+
+from audio import audio
+
+audio.play_music("Assets/music.wav", 0.2)
+audio.play("Assets/explosion.wav", 0.3)
+audio.flush() # Once per frame
+print(audio.stats())
+"""
+
+
+import pygame
+from assets import assets
+
+
+class AudioManager:
+    """Owns the mixer channels and decides which of the requested sounds are played.
+
+    Attributes:
+        channel_count (int): The number of channels reserved for sound effects.
+        max_voices (int): The default number of copies of one sound that can play at the same time.
+        limits (dict): The voice limits of particular sounds, keyed on path, overriding `max_voices`.
+        enabled (bool): Whether any sound is played. Set to False to mute the game completely.
+        pending (dict): The sounds requested since the last flush, keyed on (path, volume), with the number of requests.
+        channels (list): The reserved sound effect channels, or None until the mixer has been set up.
+        music_channel (pygame.mixer.Channel): The reserved music channel, or None until the mixer has been set up.
+        voices (list): The (path, volume) each effect channel was last used for.
+        started (list): The flush count at which each effect channel last started a sound.
+        flushes (int): The number of flushes so far.
+        requested (int): The number of sounds requested.
+        coalesced (int): The number of requests merged into an identical request of the same frame.
+        dropped (int): The number of sounds not played because they were over their voice limit.
+        stolen (int): The number of sounds cut off to free a channel.
+        played (int): The number of sounds played.
+    """
+
+    def __init__(self, channels=8, max_voices=2, limits=None):
+        """Initializes the audio manager. The mixer channels are only set up when the first sound is played.
+
+        Args:
+            channels (int, optional): The number of channels reserved for sound effects. Defaults to 8.
+            max_voices (int, optional): The default number of copies of one sound that can play at once. Defaults to 2.
+            limits (dict, optional): The voice limits of particular sounds, keyed on path. Defaults to None.
+        """
+        self.channel_count = channels
+        self.max_voices = max_voices
+        self.limits = dict(limits or {})
+        self.enabled = True
+        self.pending = {}
+        self.channels = None
+        self.music_channel = None
+        self.voices = []
+        self.started = []
+        self.flushes = 0
+        self.requested = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.stolen = 0
+        self.played = 0
+
+    def ready(self):
+        """Sets up the reserved channels the first time it is called with the mixer initialised.
+
+        Returns:
+            bool: True if sounds can be played.
+        """
+        if not self.enabled or not pygame.mixer.get_init():
+            return False
+        if self.channels is None:
+            total = self.channel_count + 1
+            if pygame.mixer.get_num_channels() < total:
+                pygame.mixer.set_num_channels(total)
+            #* Reserved channels are never picked by a plain Sound.play(), so nothing else can steal them
+            pygame.mixer.set_reserved(total)
+            self.music_channel = pygame.mixer.Channel(0)
+            self.channels = [pygame.mixer.Channel(index) for index in range(1, total)]
+            self.voices = [None] * self.channel_count
+            self.started = [0] * self.channel_count
+        return True
+
+    def play(self, path, volume=1.0):
+        """Queues a sound effect to be played at the next flush.
+
+        Args:
+            path (str): The path of the audio file.
+            volume (float, optional): The volume of the sound, between 0 and 1. Defaults to 1.0.
+        """
+        if not self.enabled:
+            return
+        key = (path, volume)
+        self.requested += 1
+        if key in self.pending:
+            self.pending[key] += 1
+            self.coalesced += 1
+        else:
+            self.pending[key] = 1
+
+    def flush(self):
+        """Plays the sounds queued since the last flush. Call this once per frame. [No Args]"""
+        self.flushes += 1
+        if not self.pending:
+            return
+        pending = self.pending
+        self.pending = {}
+        if not self.ready():
+            return
+        for key in pending:
+            path = key[0]
+            limit = self.limits.get(path, self.max_voices)
+            playing = 0
+            for index, channel in enumerate(self.channels):
+                if self.voices[index] == key and channel.get_busy():
+                    playing += 1
+            if playing >= limit:
+                self.dropped += 1
+                continue
+            index = self.free_channel()
+            self.channels[index].play(assets.sound(path, key[1]))
+            self.voices[index] = key
+            self.started[index] = self.flushes
+            self.played += 1
+
+    def free_channel(self):
+        """Returns an idle effect channel, or the one whose sound started the longest ago if they are all busy.
+
+        Returns:
+            int: The index of the channel in `channels`.
+        """
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+        self.stolen += 1
+        return min(range(len(self.channels)), key=self.started.__getitem__)
+
+    def play_music(self, path, volume=1.0, loops=-1):
+        """Starts the music on its reserved channel, from the beginning.
+
+        Args:
+            path (str): The path of the audio file.
+            volume (float, optional): The volume of the music, between 0 and 1. Defaults to 1.0.
+            loops (int, optional): The number of times to repeat the music after the first play. Defaults to -1 (forever).
+        """
+        if self.ready():
+            self.music_channel.play(assets.sound(path, volume), loops=loops)
+
+    def stop_music(self):
+        """Stops the music. [No Args]"""
+        if self.music_channel is not None and pygame.mixer.get_init():
+            self.music_channel.stop()
+
+    def stop(self):
+        """Stops every sound and the music, and drops the queued sounds. [No Args]"""
+        self.pending = {}
+        if self.channels is not None and pygame.mixer.get_init():
+            for channel in self.channels:
+                channel.stop()
+        self.stop_music()
+
+    def reset(self):
+        """Forgets the mixer channels, so they are set up again. Needed after `pygame.quit()` or re-initialising the mixer. [No Args]"""
+        self.pending = {}
+        self.channels = None
+        self.music_channel = None
+
+    def stats(self):
+        """Returns the audio counters.
+
+        Returns:
+            dict: The number of sounds requested, coalesced, dropped over their voice limit, cut off and played.
+        """
+        return {
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "stolen": self.stolen,
+            "played": self.played,
+        }
+
+
+#* The one audio manager shared by the whole process. The explosions of a multi-kill are allowed a few more voices
+audio = AudioManager(limits={"Assets/explosion.wav": 3})
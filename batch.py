@@ -0,0 +1,220 @@
+"""This file contains the command-line batch runner used to balance the game.
+
+The runner spreads independent headless games across a pool of worker processes, one game per (level, seed) pair, each played
+by a scripted or random player, and aggregates the survival time, score and simulation speed of every run into a summary table
+and, optionally, a CSV file.
+
+Usage:
+
+py -3 batch.py --levels 0-9 --seeds 20 --workers 8 --player tracker --csv results.csv
+py -3 batch.py --levels 0-9 --formations Levels/swarm.json
+"""
+
+
+import argparse
+import csv
+import multiprocessing
+import random
+import sys
+import time
+from SpaceInvaders import Game, Actions, FPS, init_headless
+from formations import formations
+from replay import random_player
+
+
+def sweep_player(game, rng):
+    """A scripted player that sweeps across the screen, firing whenever it can.
+
+    Args:
+        game (Game): The game being played.
+        rng (random.Random): The player's random number generator (unused).
+
+    Returns:
+        Actions: The player's input for this tick.
+    """
+    going_right = (game.tick // 90) % 2 == 0
+    return Actions(left=not going_right, right=going_right, shoot=True)
+
+
+def tracker_player(game, rng):
+    """A scripted player that lines up under the lowest enemy and fires.
+
+    Args:
+        game (Game): The game being played.
+        rng (random.Random): The player's random number generator (unused).
+
+    Returns:
+        Actions: The player's input for this tick.
+    """
+    if not game.enemies or not game.player.sprite:
+        return Actions(shoot=True)
+    target = max(game.enemies, key=lambda enemy: enemy.rect.bottom).rect.centerx
+    x = game.player.sprite.rect.centerx
+    return Actions(left=target < x - 4, right=target > x + 4, shoot=True)
+
+
+def make_random_player():
+    """Returns a random player that holds each input for a quarter of a second.
+
+    Returns:
+        callable: The player, taking the game and a random number generator and returning the input for this tick.
+    """
+    held = {}
+    def play(game, rng):
+        if game.tick % 15 == 0 or "actions" not in held:
+            held["actions"] = random_player(rng)
+        return held["actions"]
+    return play
+
+
+PLAYERS = {
+    "random": make_random_player,
+    "sweep": lambda: sweep_player,
+    "tracker": lambda: tracker_player,
+}
+
+
+def init_worker(formation_file=None):
+    """Prepares a process to run games: starts pygame headless and loads the level file of the enemy formations, since the
+    formations loaded in the main process are not shared with the worker processes.
+
+    Args:
+        formation_file (str, optional): The path of the level file. Defaults to None (the built-in formations).
+    """
+    init_headless()
+    if formation_file:
+        formations.load(formation_file)
+
+
+def run_game(job):
+    """Plays one headless game to the end (or the frame limit). Runs inside a worker process.
+
+    Args:
+        job (tuple): The (level, seed, player name, lives, frame limit) of the run.
+
+    Returns:
+        dict: The result of the run.
+    """
+    level, seed, player_name, lives, max_frames = job
+    game = Game(level=level, lives=lives, headless=True, seed=seed)
+    player = PLAYERS[player_name]()
+    player_rng = random.Random(seed)
+    start = time.perf_counter()
+    while game.game_over == 0 and game.tick < max_frames:
+        game.step(player(game, player_rng))
+    elapsed = time.perf_counter() - start
+    return {
+        "level": level,
+        "seed": seed,
+        "player": player_name,
+        "result": {1: "win", -1: "loss", 0: "timeout"}[game.game_over],
+        "ticks": game.tick,
+        "survival_s": round(game.tick / FPS, 2),
+        "score": game.score,
+        "lives_left": max(game.lives, 0),
+        "enemies_left": len(game.enemies),
+        "fps": round(game.tick / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def parse_levels(text):
+    """Parses a level range such as "0-9" or a list such as "0,2,5".
+
+    Args:
+        text (str): The levels to run.
+
+    Returns:
+        list: The level numbers.
+    """
+    levels = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            levels.extend(range(int(first), int(last) + 1))
+        else:
+            levels.append(int(part))
+    return levels
+
+
+def summarise(results):
+    """Aggregates the runs of each level.
+
+    Args:
+        results (list): The result of every run.
+
+    Returns:
+        list: One summary row per level, sorted by level.
+    """
+    rows = []
+    for level in sorted({result["level"] for result in results}):
+        runs = [result for result in results if result["level"] == level]
+        count = len(runs)
+        rows.append({
+            "level": level,
+            "runs": count,
+            "win_rate": round(sum(run["result"] == "win" for run in runs) / count, 3),
+            "mean_survival_s": round(sum(run["survival_s"] for run in runs) / count, 2),
+            "mean_score": round(sum(run["score"] for run in runs) / count, 1),
+            "mean_fps": round(sum(run["fps"] for run in runs) / count, 1),
+        })
+    return rows
+
+
+def print_table(rows):
+    """Prints rows of dictionaries as an aligned text table.
+
+    Args:
+        rows (list): The rows to print. Every row must have the same keys.
+    """
+    if not rows:
+        return
+    columns = list(rows[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(column.rjust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths)))
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 batch.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Simulate many headless Space Invaders games in parallel.")
+    parser.add_argument("--levels", default="0-9", help="The levels to run, e.g. 0-9 or 0,2,5. Defaults to 0-9.")
+    parser.add_argument("--seeds", type=int, default=10, help="The number of seeds to run per level. Defaults to 10.")
+    parser.add_argument("--first-seed", type=int, default=0, help="The first seed. Defaults to 0.")
+    parser.add_argument("--player", choices=sorted(PLAYERS), default="tracker", help="The player to use. Defaults to tracker.")
+    parser.add_argument("--lives", type=int, default=1, help="The starting lives of every run. Defaults to 1.")
+    parser.add_argument("--frames", type=int, default=FPS * 300, help="The frame limit of every run. Defaults to 5 minutes.")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="The number of worker processes. Defaults to one per core.")
+    parser.add_argument("--formations", help="The level file of the enemy formations (see formations.py). Defaults to the built-in ones.")
+    parser.add_argument("--csv", help="Write the result of every run to this CSV file.")
+    args = parser.parse_args(argv)
+
+    jobs = [(level, seed, args.player, args.lives, args.frames)
+            for level in parse_levels(args.levels)
+            for seed in range(args.first_seed, args.first_seed + args.seeds)]
+    start = time.perf_counter()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers, initializer=init_worker, initargs=(args.formations,)) as pool:
+            results = list(pool.imap_unordered(run_game, jobs, chunksize=max(1, len(jobs) // (args.workers * 4))))
+            #* Let the workers exit on their own: SDL handles SIGTERM in them, so the pool could not terminate them
+            pool.close()
+            pool.join()
+    else:
+        init_worker(args.formations)
+        results = [run_game(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: (result["level"], result["seed"]))
+
+    print_table(summarise(results))
+    total_ticks = sum(result["ticks"] for result in results)
+    print(f"\n{len(results)} runs, {total_ticks} ticks in {elapsed:.2f}s on {args.workers} worker(s): {total_ticks / elapsed:.0f} ticks/s overall")
+    if args.csv and results:
+        with open(args.csv, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""This file contains the frame-time benchmark suite for `Game`.
+
+Every scenario runs a headless game for a fixed number of frames, timing the simulation (`Game.step`) and the drawing
+(`Game.draw`, onto an off-screen 720x720 surface) of every frame, which together are the work `Game.update` does. The results
+(mean/p95/p99 frame times, allocations per frame and sprite counts) are printed and can be saved as JSON and compared
+against a saved baseline.
+
+Scenarios:
+- level-N: a normal game at each level from 0 to --levels
+- dense_bullets: the enemies fire several bullets every frame
+- legendary_storm: a new legendary enemy spawns as soon as the last one leaves, and fires constantly
+- fortifications_intact: the fortifications are rebuilt every frame, so every bullet is checked against whole bunkers
+- big_formation: a 10x11 formation instead of 6x8
+
+With --transitions N, the level-transition latency is measured as well: the time to build a new `Game` for the next level,
+against the time to `Game.reset` the existing one. With --snapshots, the size of `Game.snapshot` and the time taken by
+`Game.snapshot` and `Game.restore` are measured over a level-3 game, taking a snapshot every frame. With --formations, the
+time to generate formations of up to 10,000 enemies (cold and memoised) and to create their sprites is measured.
+
+Usage:
+
+py -3 benchmark.py --frames 1200 --output results.json
+py -3 benchmark.py --frames 1200 --baseline results.json --threshold 10
+py -3 benchmark.py --only none --transitions 200
+py -3 benchmark.py --only none --snapshots
+py -3 benchmark.py --only none --formations
+"""
+
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import pygame
+from SpaceInvaders import Game, init_headless
+from batch import tracker_player
+from formations import formations, FormationSpec
+
+
+def fire_volley(game):
+    """Makes three random enemies shoot this frame."""
+    for _ in range(3):
+        game.enemy_cooldown = 10**6
+        game.enemy_shoot()
+
+
+def summon_legendary(game):
+    """Keeps a legendary enemy on screen at all times, firing more often than usual."""
+    game.legendary_count = 10**6
+    if not game.legendary:
+        game.legend_spawn_time = 0
+    elif game.tick % 10 == 0:
+        game.enemy_bullets.add(*game.legendary.sprite.shoot())
+
+
+def rebuild_fortifications(game):
+    """Undoes all damage to the fortifications."""
+    for fort in game.blocks:
+        fort.restore()
+
+
+def big_formation(game):
+    """Replaces the formation with a 10x11 one."""
+    for enemy in game.enemies:
+        enemy.kill()
+    game.enemies_lst = [[game.rng.choice([1, 1, 1, 2, 2, 3]) for _ in range(11)] for _ in range(10)] + [[]]
+    game.enemy_setup(10, 11, x_offset=10, y_offset=60)
+
+
+#* name: (level, setup hook run once, hook run before every frame)
+SCENARIOS = {
+    "dense_bullets": (3, None, fire_volley),
+    "legendary_storm": (3, None, summon_legendary),
+    "fortifications_intact": (3, None, rebuild_fortifications),
+    "big_formation": (3, big_formation, None),
+}
+
+
+def percentile(ordered, fraction):
+    """Returns a percentile of a sorted list.
+
+    Args:
+        ordered (list): The sorted values.
+        fraction (float): The percentile, between 0 and 1.
+
+    Returns:
+        float: The value at that percentile.
+    """
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(level, setup, hook, frames, seed, track_allocations):
+    """Runs one scenario and measures every frame.
+
+    Args:
+        level (int): The level of the game.
+        setup (callable): A function run on the game once before the first frame, or None.
+        hook (callable): A function run on the game before every frame (not timed), or None.
+        frames (int): The number of frames to run.
+        seed (int): The seed of the game.
+        track_allocations (bool): Whether to measure the bytes allocated per frame with tracemalloc (slower).
+
+    Returns:
+        dict: The measurements.
+    """
+    screen = pygame.Surface((720, 720))
+    game = Game(level=level, lives=10**9, headless=True, seed=seed)
+    if setup:
+        setup(game)
+    step_times, draw_times, frame_times, blocks, peaks = [], [], [], [], []
+    sprites = {"enemies": 0, "enemy_bullets": 0, "player_bullets": 0, "legendary": 0, "fortifications": 0}
+    max_sprites = dict(sprites)
+    if track_allocations:
+        tracemalloc.start()
+    for _ in range(frames):
+        if game.game_over:
+            break
+        if hook:
+            hook(game)
+        actions = tracker_player(game, None)
+        if track_allocations:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        allocated = sys.getallocatedblocks()
+        start = time.perf_counter()
+        game.step(actions)
+        middle = time.perf_counter()
+        screen.fill((30, 30, 30))
+        game.draw(screen)
+        end = time.perf_counter()
+        blocks.append(sys.getallocatedblocks() - allocated)
+        if track_allocations:
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        step_times.append((middle - start) * 1000)
+        draw_times.append((end - middle) * 1000)
+        frame_times.append((end - start) * 1000)
+        counts = {
+            "enemies": len(game.enemies),
+            "enemy_bullets": len(game.enemy_bullets),
+            "player_bullets": len(game.player.sprite.bullets) if game.player.sprite else 0,
+            "legendary": len(game.legendary),
+            "fortifications": len(game.blocks),
+        }
+        for key, value in counts.items():
+            sprites[key] += value
+            max_sprites[key] = max(max_sprites[key], value)
+    if track_allocations:
+        tracemalloc.stop()
+    count = len(frame_times)
+    ordered = sorted(frame_times)
+    result = {
+        "frames": count,
+        "mean_ms": sum(frame_times) / count,
+        "p95_ms": percentile(ordered, 0.95),
+        "p99_ms": percentile(ordered, 0.99),
+        "max_ms": ordered[-1],
+        "step_mean_ms": sum(step_times) / count,
+        "draw_mean_ms": sum(draw_times) / count,
+        "net_blocks_per_frame": sum(blocks) / count,
+        "mean_sprites": {key: value / count for key, value in sprites.items()},
+        "max_sprites": max_sprites,
+    }
+    if track_allocations:
+        result["alloc_peak_bytes_per_frame"] = sum(peaks) / count
+    return result
+
+
+def measure_transitions(count, seed):
+    """Measures the level-transition latency, building a new game for every level against resetting one game.
+
+    Each level is played for 120 frames first, so the fortifications are damaged and bullets are in flight, like at the end
+    of a real level.
+
+    Args:
+        count (int): The number of transitions to measure with each method.
+        seed (int): The seed of the first level; each level after it uses the next seed.
+
+    Returns:
+        dict: The mean, p95 and max latency in milliseconds of the "construct" and "reset" methods.
+    """
+    results = {}
+    for method in ("construct", "reset"):
+        game = Game(level=0, lives=10**9, headless=True, seed=seed)
+        times = []
+        for index in range(count):
+            for _ in range(120):
+                game.step(tracker_player(game, None))
+            level = (index + 1) % 10
+            start = time.perf_counter()
+            if method == "construct":
+                game.close()
+                game = Game(level=level, lives=10**9, headless=True, seed=seed + index + 1)
+            else:
+                game.reset(level, 0, 10**9, seed + index + 1)
+            times.append((time.perf_counter() - start) * 1000)
+        game.close()
+        ordered = sorted(times)
+        results[method] = {"mean_ms": sum(times) / count, "p95_ms": percentile(ordered, 0.95), "max_ms": ordered[-1]}
+    return results
+
+
+def measure_snapshots(frames, seed):
+    """Measures the size and speed of game snapshots, taking one every frame and restoring one every 10 frames.
+
+    Args:
+        frames (int): The number of frames to run.
+        seed (int): The seed of the game.
+
+    Returns:
+        dict: The mean and largest snapshot size in bytes, and the mean time of `snapshot` and `restore` in microseconds.
+    """
+    game = Game(level=3, lives=10**9, headless=True, seed=seed)
+    sizes, snapshot_times, restore_times = [], [], []
+    for frame in range(frames):
+        game.step(tracker_player(game, None))
+        start = time.perf_counter()
+        blob = game.snapshot()
+        snapshot_times.append((time.perf_counter() - start) * 10**6)
+        sizes.append(len(blob))
+        if frame % 10 == 0:
+            start = time.perf_counter()
+            game.restore(blob)
+            restore_times.append((time.perf_counter() - start) * 10**6)
+    game.close()
+    return {
+        "mean_bytes": sum(sizes) / len(sizes),
+        "max_bytes": max(sizes),
+        "snapshot_mean_us": sum(snapshot_times) / len(snapshot_times),
+        "restore_mean_us": sum(restore_times) / len(restore_times),
+    }
+
+
+def measure_formations(seed):
+    """Measures how long formations of different sizes take to generate and to set up.
+
+    Args:
+        seed (int): The seed of the formations.
+
+    Returns:
+        dict: For each formation size, the time in milliseconds to generate it, to fetch it again from the cache, and to
+        create its sprites.
+    """
+    game = Game(level=7, lives=10**9, headless=True, seed=seed)
+    results = {}
+    for rows, columns in ((6, 8), (12, 20), (20, 50), (50, 100), (100, 100)):
+        spec = FormationSpec(rows=rows, columns=columns, x_spacing=7, y_spacing=5, x_offset=5, y_offset=40)
+        start = time.perf_counter()
+        formations.generate(game.level, seed, spec)
+        cold = time.perf_counter()
+        game.enemies_lst = formations.generate(game.level, seed, spec)[0]
+        cached = time.perf_counter()
+        game.enemies.empty()
+        game.enemy_setup(rows, columns, spec.x_offset, spec.y_offset, spec.x_spacing, spec.y_spacing)
+        end = time.perf_counter()
+        results[f"{rows}x{columns}"] = {"generate_ms": (cold - start) * 1000, "cached_ms": (cached - cold) * 1000, "setup_ms": (end - cached) * 1000}
+    game.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints the change of every scenario's frame times against a baseline.
+
+    Args:
+        results (dict): The scenario results of this run.
+        baseline (dict): The scenario results of the baseline run.
+        threshold (float): The slowdown, in percent, above which a scenario counts as a regression.
+
+    Returns:
+        list: The names of the scenarios that regressed.
+    """
+    regressions = []
+    print("\nscenario                    metric    baseline     current    change")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for metric in ("mean_ms", "p95_ms", "p99_ms"):
+            old, new = baseline[name][metric], result[metric]
+            change = (new - old) / old * 100 if old else 0.0
+            flag = ""
+            if metric == "mean_ms" and change > threshold:
+                regressions.append(name)
+                flag = "  REGRESSION"
+            print(f"{name:26}  {metric:8}  {old:9.3f}  {new:9.3f}  {change:+7.1f}%{flag}")
+    return regressions
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 benchmark.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Benchmark Game frame times across levels and stress scenarios.")
+    parser.add_argument("--levels", type=int, default=5, help="Benchmark normal games at levels 0 to N. Defaults to 5.")
+    parser.add_argument("--frames", type=int, default=1200, help="The number of frames per scenario. Defaults to 1200.")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of every game. Defaults to 0.")
+    parser.add_argument("--only", help="Only run the scenarios whose names contain this text.")
+    parser.add_argument("--allocations", action="store_true", help="Also measure the bytes allocated per frame, in a second run of each scenario.")
+    parser.add_argument("--transitions", type=int, default=0, help="Also measure the latency of N level transitions, building a new Game against resetting one.")
+    parser.add_argument("--snapshots", action="store_true", help="Also measure the size of Game snapshots and the time to take and restore them.")
+    parser.add_argument("--formations", action="store_true", help="Also measure the time to generate and set up formations of up to 10,000 enemies.")
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results against this JSON file.")
+    parser.add_argument("--threshold", type=float, default=10.0, help="The mean slowdown in percent that counts as a regression. Defaults to 10.")
+    args = parser.parse_args(argv)
+
+    init_headless()
+    scenarios = {f"level-{level}": (level, None, None) for level in range(args.levels + 1)}
+    scenarios.update(SCENARIOS)
+    results = {}
+    print("scenario                    frames   mean ms    p95 ms    p99 ms  sprites")
+    for name, (level, setup, hook) in scenarios.items():
+        if args.only and args.only not in name:
+            continue
+        result = run_scenario(level, setup, hook, args.frames, args.seed, False)
+        if args.allocations:
+            #* tracemalloc slows everything down, so allocations are measured in a second, untimed run
+            tracked = run_scenario(level, setup, hook, args.frames, args.seed, True)
+            result["alloc_peak_bytes_per_frame"] = tracked["alloc_peak_bytes_per_frame"]
+        results[name] = result
+        print(f"{name:26}  {result['frames']:6}  {result['mean_ms']:8.3f}  {result['p95_ms']:8.3f}  {result['p99_ms']:8.3f}  {sum(result['mean_sprites'].values()):7.1f}")
+
+    transitions = None
+    if args.transitions:
+        transitions = measure_transitions(args.transitions, args.seed)
+        print("\ntransition   mean ms    p95 ms    max ms")
+        for method, result in transitions.items():
+            print(f"{method:10}  {result['mean_ms']:8.3f}  {result['p95_ms']:8.3f}  {result['max_ms']:8.3f}")
+
+    snapshots = None
+    if args.snapshots:
+        snapshots = measure_snapshots(args.frames, args.seed)
+        print(f"\nsnapshot  mean {snapshots['mean_bytes']:.0f} bytes  max {snapshots['max_bytes']} bytes  "
+              f"snapshot {snapshots['snapshot_mean_us']:.1f} us  restore {snapshots['restore_mean_us']:.1f} us")
+
+    formation_times = None
+    if args.formations:
+        formation_times = measure_formations(args.seed)
+        print("\nformation   generate ms   cached ms   setup ms")
+        for size, result in formation_times.items():
+            print(f"{size:10}  {result['generate_ms']:11.3f}  {result['cached_ms']:10.4f}  {result['setup_ms']:9.3f}")
+
+    if args.output:
+        report = {
+            "meta": {"python": platform.python_version(), "pygame": pygame.version.ver, "platform": platform.platform(),
+                     "frames": args.frames, "seed": args.seed, "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+            "scenarios": results,
+        }
+        if transitions:
+            report["transitions"] = transitions
+        if snapshots:
+            report["snapshots"] = snapshots
+        if formation_times:
+            report["formations"] = formation_times
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["scenarios"]
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
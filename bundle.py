@@ -0,0 +1,327 @@
+"""This file contains the packed asset bundle: a build step that decodes every asset into one file, and a loader that maps it.
+
+Loading the loose files in `Assets/` means opening every file and decoding every PNG and WAV at startup. The bundle stores the
+assets already decoded (raw BGRA pixels for images, PCM samples in the mixer's format for sounds, and the font files as they
+are) in a single file with an index. The loader memory-maps that file and builds surfaces straight on top of the mapped
+pixels with `pygame.image.frombuffer`, so startup is one open and one read of the index, and the pixel data is only paged in
+when it is used. The pixels are stored in the byte order of SDL's usual 32-bit display format with alpha, so when the display
+uses that format the asset registry uses the mapped surfaces as they are instead of converting them into copies.
+
+File layout:
+- 8 bytes: the magic number b"HINVBNDL"
+- 4 bytes: the format version (little-endian unsigned int)
+- 4 bytes: the length of the index (little-endian unsigned int)
+- the index, as UTF-8 JSON: the mixer format the sounds were decoded for, and the kind, offset and size (plus the width and
+  height of images) of every asset, keyed on its path
+- the asset data, every blob starting on a 16-byte boundary
+
+Once a bundle is attached to the asset registry, `assets.image`, `assets.sound` and `assets.font` serve every path found in it
+from the bundle and fall back to the loose files for everything else (and for the sounds, if the mixer was opened with a
+different format than the one the bundle was built for).
+
+Usage:
+
+py -3 bundle.py build                # Packs Assets/ into Assets.bundle
+py -3 bundle.py bench --repeat 20    # Compares the startup time of the loose files and the bundle
+
+from assets import assets
+from bundle import Bundle
+
+assets.use_bundle(Bundle("Assets.bundle"))
+
+with Bundle("Assets.bundle") as bundle:   # A bundle that is only needed for a while
+    font = bundle.font("Assets/Pixeled.ttf", 20)
+"""
+
+
+import argparse
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+import pygame
+
+MAGIC = b"HINVBNDL"
+VERSION = 2
+HEADER = struct.Struct("<8sII")
+ALIGNMENT = 16
+BUNDLE_PATH = "Assets.bundle"
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".bmp")
+SOUND_EXTENSIONS = (".wav", ".ogg")
+FONT_EXTENSIONS = (".ttf", ".otf")
+#* ARGB8888 on little-endian machines, the format `convert_alpha` gives images on most displays
+PIXEL_FORMAT = "BGRA"
+
+
+def asset_key(path):
+    """Returns the key an asset path is stored under, so "Assets\\player.png" and "Assets/player.png" find the same asset.
+
+    Args:
+        path (str): The path of the asset.
+
+    Returns:
+        str: The path with forward slashes.
+    """
+    return path.replace("\\", "/")
+
+
+def build(directory="Assets", output=BUNDLE_PATH):
+    """Decodes every image, sound and font in a directory and packs them into a bundle file.
+
+    Sounds are decoded to the format of the mixer, which is initialised with pygame's defaults if it is not already.
+
+    Args:
+        directory (str, optional): The directory of the loose assets. Defaults to "Assets".
+        output (str, optional): The path of the bundle file. Defaults to "Assets.bundle".
+
+    Returns:
+        dict: The index of the bundle.
+    """
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    blobs = []
+    entries = {}
+    offset = 0
+    for name in sorted(os.listdir(directory)):
+        path = asset_key(os.path.join(directory, name))
+        extension = os.path.splitext(name)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            image = pygame.image.load(path)
+            data = pygame.image.tobytes(image, PIXEL_FORMAT)
+            entry = {"kind": "image", "width": image.get_width(), "height": image.get_height()}
+        elif extension in SOUND_EXTENSIONS:
+            data = pygame.mixer.Sound(path).get_raw()
+            entry = {"kind": "sound"}
+        elif extension in FONT_EXTENSIONS:
+            with open(path, "rb") as file:
+                data = file.read()
+            entry = {"kind": "font"}
+        else:
+            continue
+        padding = -offset % ALIGNMENT
+        blobs.append(bytes(padding))
+        offset += padding
+        entry.update(offset=offset, size=len(data))
+        entries[path] = entry
+        blobs.append(data)
+        offset += len(data)
+    index = {"mixer": list(pygame.mixer.get_init()), "assets": entries}
+    encoded = json.dumps(index, separators=(",", ":")).encode()
+    #* The data offsets in the index are relative to the end of the header and index, padded to the alignment
+    start = HEADER.size + len(encoded)
+    padding = -start % ALIGNMENT
+    with open(output, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(encoded) + padding))
+        file.write(encoded + b" " * padding)
+        for blob in blobs:
+            file.write(blob)
+    return index
+
+
+class Bundle:
+    """A memory-mapped asset bundle.
+
+    The surfaces created from the bundle point straight into the mapped file, so the bundle must be kept open for as long as
+    they are in use. The file is mapped copy-on-write, so drawing onto one of them could never change the file.
+
+    Attributes:
+        path (str): The path of the bundle file.
+        file (io.BufferedReader): The open bundle file.
+        map (mmap.mmap): The mapped bundle file.
+        view (memoryview): A view of the whole mapped file.
+        data_start (int): The position of the first asset in the file.
+        mixer (tuple): The (frequency, size, channels) mixer format the sounds were decoded for.
+        entries (dict): The index entry of every asset, keyed on path.
+    """
+
+    def __init__(self, path=BUNDLE_PATH):
+        """Opens and maps a bundle file and reads its index.
+
+        Args:
+            path (str, optional): The path of the bundle file. Defaults to "Assets.bundle".
+
+        Raises:
+            ValueError: If the file is not a bundle, or was built by an incompatible version of this file.
+        """
+        self.path = path
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.view = memoryview(self.map)
+        magic, version, index_size = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} asset bundle")
+        self.data_start = HEADER.size + index_size
+        index = json.loads(bytes(self.view[HEADER.size:self.data_start]))
+        self.mixer = tuple(index["mixer"])
+        self.entries = index["assets"]
+
+    def __contains__(self, path):
+        """Returns whether the bundle contains an asset.
+
+        Args:
+            path (str): The path of the asset.
+
+        Returns:
+            bool: True if the asset is in the bundle.
+        """
+        return asset_key(path) in self.entries
+
+    def data(self, path):
+        """Returns a view of the raw data of an asset, without copying it.
+
+        Args:
+            path (str): The path of the asset.
+
+        Returns:
+            memoryview: The data.
+        """
+        entry = self.entries[asset_key(path)]
+        start = self.data_start + entry["offset"]
+        return self.view[start:start + entry["size"]]
+
+    def image(self, path):
+        """Returns a surface whose pixels are the mapped image data.
+
+        Args:
+            path (str): The path of the image.
+
+        Returns:
+            pygame.Surface: The image.
+        """
+        entry = self.entries[asset_key(path)]
+        return pygame.image.frombuffer(self.data(path), (entry["width"], entry["height"]), PIXEL_FORMAT)
+
+    def sound(self, path):
+        """Returns a sound made from the mapped PCM samples, if the mixer uses the format they were decoded for.
+
+        Args:
+            path (str): The path of the sound.
+
+        Returns:
+            pygame.mixer.Sound: The sound, or None if the mixer's format does not match the bundle's.
+        """
+        if pygame.mixer.get_init() != self.mixer:
+            return None
+        return pygame.mixer.Sound(buffer=self.data(path))
+
+    def font(self, path, size):
+        """Returns a font read from the bundled font file.
+
+        Args:
+            path (str): The path of the font.
+            size (int): The point size of the font.
+
+        Returns:
+            pygame.font.Font: The font.
+        """
+        return pygame.font.Font(io.BytesIO(self.data(path)), size)
+
+    def close(self):
+        """Unmaps and closes the bundle file. [No Args]
+
+        Raises:
+            BufferError: If surfaces made from the bundle are still alive.
+        """
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        """Returns the bundle, so it can be used in a `with` statement. [No Args]"""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Closes the bundle at the end of a `with` statement.
+
+        Args:
+            *exc_info: The exception raised in the `with` block, if any. Unused.
+        """
+        self.close()
+
+
+def load_everything(registry, directory):
+    """Loads every asset the game uses at startup through the asset registry.
+
+    Args:
+        registry (AssetRegistry): The registry to load through.
+        directory (str): The directory of the loose assets.
+    """
+    for name in sorted(os.listdir(directory)):
+        path = asset_key(os.path.join(directory, name))
+        extension = os.path.splitext(name)[1].lower()
+        if extension in IMAGE_EXTENSIONS:
+            registry.image(path)
+        elif extension in SOUND_EXTENSIONS:
+            registry.sound(path)
+        elif extension in FONT_EXTENSIONS:
+            registry.font(path, 20)
+            registry.font(path, 40)
+
+
+def bench(directory, path, repeat):
+    """Measures how long loading every asset takes from the loose files and from the bundle.
+
+    Each run starts from an empty asset registry. The bundle runs include opening and mapping the bundle, and the bundle is
+    closed again once the run's assets are dropped.
+
+    Args:
+        directory (str): The directory of the loose assets.
+        path (str): The path of the bundle file.
+        repeat (int): The number of runs of each method.
+
+    Returns:
+        dict: The mean and best time in milliseconds of the "loose" and "bundle" methods.
+    """
+    from assets import AssetRegistry
+    results = {}
+    for method in ("loose", "bundle"):
+        times = []
+        for _ in range(repeat):
+            registry = AssetRegistry()
+            start = time.perf_counter()
+            if method == "bundle":
+                with Bundle(path) as bundle:
+                    registry.use_bundle(bundle)
+                    load_everything(registry, directory)
+                    times.append((time.perf_counter() - start) * 1000)
+                    #* The surfaces point into the mapped file, so they have to go before it is closed
+                    registry.clear()
+                    registry.use_bundle(None)
+            else:
+                load_everything(registry, directory)
+                times.append((time.perf_counter() - start) * 1000)
+        results[method] = {"mean_ms": sum(times) / repeat, "best_ms": min(times)}
+        print(f"{method:7} mean {results[method]['mean_ms']:8.3f} ms  best {results[method]['best_ms']:8.3f} ms")
+    return results
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 bundle.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Pack the game's assets into one pre-decoded, memory-mappable bundle.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Pack the assets into a bundle.")
+    bench_parser = commands.add_parser("bench", help="Compare the startup time of the loose files and the bundle.")
+    for command in (build_parser, bench_parser):
+        command.add_argument("--assets", default="Assets", help="The directory of the loose assets. Defaults to Assets.")
+        command.add_argument("--bundle", default=BUNDLE_PATH, help="The path of the bundle file. Defaults to Assets.bundle.")
+    bench_parser.add_argument("--repeat", type=int, default=20, help="The number of runs of each method. Defaults to 20.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    if args.command == "build":
+        index = build(args.assets, args.bundle)
+        print(f"Packed {len(index['assets'])} assets into {args.bundle} ({os.path.getsize(args.bundle) / 1024:.1f} KB)")
+    else:
+        bench(args.assets, args.bundle, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 #! Credit: https://github.com/baraltech/
 
+from assets import assets
+
 class Button():
 	def __init__(self, image, pos, text_input, font, base_color, hovering_color):
 		self.image = image
@@ -8,7 +10,10 @@ class Button():
 		self.font = font
 		self.base_color, self.hovering_color = base_color, hovering_color
 		self.text_input = text_input
-		self.text = self.font.render(self.text_input, True, self.base_color)
+		#* Both states are rendered once up front, so hovering only swaps surfaces
+		self.base_text = assets.text(self.font, self.text_input, True, self.base_color)
+		self.hovering_text = assets.text(self.font, self.text_input, True, self.hovering_color)
+		self.text = self.base_text
 		if self.image is None:
 			self.image = self.text
 		self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
@@ -26,6 +31,6 @@ class Button():
 
 	def changeColor(self, position):
 		if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-			self.text = self.font.render(self.text_input, True, self.hovering_color)
+			self.text = self.hovering_text
 		else:
-			self.text = self.font.render(self.text_input, True, self.base_color)
\ No newline at end of file
+			self.text = self.base_text
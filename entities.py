@@ -0,0 +1,470 @@
+"""This file contains a data-oriented entity store: an alternative to one `pygame.sprite.Sprite` per enemy and bullet.
+
+Every `Sprite` carries its own `__dict__`, `Rect` and a dictionary of the groups it belongs to. `EntityStore` keeps the same
+information as one compact array per component (position, velocity, health, value, kind, age and whether the slot is alive),
+indexed by entity. Entities are plain indices; `EntityHandle` is a small `__slots__` object for code that wants to treat one
+entity like an object. Behaviour lives in system functions that run over whole arrays at once (`move`, `age`, `cull`,
+`reap`), and `draw` batch-blits every entity from one shared image per kind.
+
+The `Game` class is unchanged and keeps using sprites. `mirror` copies a game's sprites into a store, so the store can be
+compared with, or drawn in place of, the sprite version.
+
+Run `py -3 entities.py --count 10000` for a report of the bytes per entity and the update and draw times of both versions.
+
+Usage:
+
+store = EntityStore()
+bullet = store.spawn(RED_BULLET, x, y, vy=6)
+move(store)
+cull(store)
+draw(store, screen)
+"""
+
+
+import argparse
+import sys
+import time
+import tracemalloc
+from array import array
+from operator import add
+import pygame
+from assets import assets
+
+#* The kinds of entity, each drawn with its own shared image
+RARE, EPIC, MYTHIC, LEGENDARY, PLAYER, PLAYER_BULLET, RED_BULLET, RARE_BULLET, EPIC_BULLET = range(1, 10)
+ENEMY_KINDS = frozenset((RARE, EPIC, MYTHIC))
+BULLET_KINDS = frozenset((PLAYER_BULLET, RED_BULLET, RARE_BULLET, EPIC_BULLET))
+KIND_IMAGES = {
+    RARE: "Assets/Alien_Rare.png",
+    EPIC: "Assets/Alien_Epic.png",
+    MYTHIC: "Assets/Alien_Mythic.png",
+    LEGENDARY: "Assets/UFO_Legendary.png",
+    PLAYER: "Assets/player.png",
+}
+BULLET_COLOURS = {PLAYER_BULLET: "yellow", RED_BULLET: "red", RARE_BULLET: (255, 196, 0), EPIC_BULLET: (255, 128, 0)}
+#* The order kinds are drawn in, matching `Game.draw` (minus the score and fortifications)
+DRAW_ORDER = (RED_BULLET, RARE_BULLET, EPIC_BULLET, LEGENDARY, PLAYER_BULLET, PLAYER, RARE, EPIC, MYTHIC)
+DRAW_RANK = {kind: rank for rank, kind in enumerate(DRAW_ORDER)}
+
+
+class EntityStore:
+    """Stores every entity as a row across a set of component arrays.
+
+    Dead rows are recycled by later spawns, and the arrays double in size when they are full.
+
+    Attributes:
+        capacity (int): The number of rows the arrays have room for.
+        size (int): The number of rows that have ever been used; rows from `size` on are untouched.
+        x (array.array): The x-coordinate of each entity's top-left corner.
+        y (array.array): The y-coordinate of each entity's top-left corner.
+        vx (array.array): The horizontal velocity of each entity, in pixels per tick.
+        vy (array.array): The vertical velocity of each entity, in pixels per tick (positive is down).
+        health (array.array): The health of each entity.
+        value (array.array): The score each entity is worth.
+        kind (array.array): The kind of each entity (see `KIND_IMAGES` and `BULLET_COLOURS`).
+        age (array.array): The number of ticks each entity has been alive.
+        generation (array.array): How many times each row has been recycled, so stale handles can be detected.
+        alive (bytearray): 1 for every row holding a live entity.
+        free (list): The dead rows below `size`, ready to be reused.
+    """
+
+    def __init__(self, capacity=256):
+        """Initializes an empty store.
+
+        Args:
+            capacity (int, optional): The number of rows to allocate up front. Defaults to 256.
+        """
+        self.capacity = 0
+        self.size = 0
+        self.x = array("i")
+        self.y = array("i")
+        self.vx = array("i")
+        self.vy = array("i")
+        self.health = array("b")
+        self.value = array("i")
+        self.kind = array("B")
+        self.age = array("I")
+        self.generation = array("I")
+        self.alive = bytearray()
+        self.free = []
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """Enlarges every component array.
+
+        Args:
+            capacity (int): The new number of rows.
+        """
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        for component in (self.x, self.y, self.vx, self.vy, self.health, self.value, self.kind, self.age, self.generation):
+            component.extend([0] * extra)
+        self.alive.extend(bytes(extra))
+        self.capacity = capacity
+
+    def spawn(self, kind, x, y, vx=0, vy=0, health=1, value=0):
+        """Adds an entity.
+
+        Args:
+            kind (int): The kind of the entity.
+            x (int): The x-coordinate of its top-left corner.
+            y (int): The y-coordinate of its top-left corner.
+            vx (int, optional): Its horizontal velocity. Defaults to 0.
+            vy (int, optional): Its vertical velocity. Defaults to 0.
+            health (int, optional): Its health. Defaults to 1.
+            value (int, optional): The score it is worth. Defaults to 0.
+
+        Returns:
+            int: The row of the new entity.
+        """
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow(max(16, self.capacity * 2))
+            index = self.size
+            self.size += 1
+        self.x[index] = x
+        self.y[index] = y
+        self.vx[index] = vx
+        self.vy[index] = vy
+        self.health[index] = health
+        self.value[index] = value
+        self.kind[index] = kind
+        self.age[index] = 0
+        self.alive[index] = 1
+        return index
+
+    def despawn(self, index):
+        """Removes an entity. Removing a dead entity does nothing.
+
+        Args:
+            index (int): The row of the entity.
+        """
+        if self.alive[index]:
+            self.alive[index] = 0
+            self.vx[index] = self.vy[index] = 0
+            self.generation[index] += 1
+            self.free.append(index)
+
+    def clear(self):
+        """Removes every entity, keeping the arrays allocated. [No Args]"""
+        for index in range(self.size):
+            if self.alive[index]:
+                self.generation[index] += 1
+        self.alive[:] = bytes(self.capacity)
+        self.vx[:] = array("i", [0]) * self.capacity
+        self.vy[:] = array("i", [0]) * self.capacity
+        self.size = 0
+        self.free = []
+
+    def live(self):
+        """Returns the rows of every live entity, in row order.
+
+        Returns:
+            list: The rows.
+        """
+        alive = self.alive
+        return [index for index in range(self.size) if alive[index]]
+
+    def count(self):
+        """Returns the number of live entities.
+
+        Returns:
+            int: The number of live entities.
+        """
+        return self.alive.count(1, 0, self.size)
+
+    def handle(self, index):
+        """Returns an object view of one entity.
+
+        Args:
+            index (int): The row of the entity.
+
+        Returns:
+            EntityHandle: The handle.
+        """
+        return EntityHandle(self, index)
+
+    def nbytes(self):
+        """Returns the memory used by the component arrays.
+
+        Returns:
+            int: The number of bytes allocated for all rows.
+        """
+        total = len(self.alive)
+        for component in (self.x, self.y, self.vx, self.vy, self.health, self.value, self.kind, self.age, self.generation):
+            total += component.itemsize * len(component)
+        return total
+
+
+class EntityHandle:
+    """A lightweight reference to one entity of a store, which notices if the entity has since been removed.
+
+    Attributes:
+        store (EntityStore): The store the entity lives in.
+        index (int): The row of the entity.
+        generation (int): The generation of the row when the handle was made.
+    """
+
+    __slots__ = ("store", "index", "generation")
+
+    def __init__(self, store, index):
+        """Initializes the handle.
+
+        Args:
+            store (EntityStore): The store the entity lives in.
+            index (int): The row of the entity.
+        """
+        self.store = store
+        self.index = index
+        self.generation = store.generation[index]
+
+    @property
+    def alive(self):
+        """Whether the entity still exists."""
+        return self.store.generation[self.index] == self.generation and bool(self.store.alive[self.index])
+
+    @property
+    def position(self):
+        """The (x, y) of the entity's top-left corner."""
+        return self.store.x[self.index], self.store.y[self.index]
+
+    @position.setter
+    def position(self, position):
+        self.store.x[self.index], self.store.y[self.index] = position
+
+    @property
+    def health(self):
+        """The health of the entity."""
+        return self.store.health[self.index]
+
+    @health.setter
+    def health(self, health):
+        self.store.health[self.index] = health
+
+    @property
+    def kind(self):
+        """The kind of the entity."""
+        return self.store.kind[self.index]
+
+    def kill(self):
+        """Removes the entity from its store. [No Args]"""
+        if self.alive:
+            self.store.despawn(self.index)
+
+
+def move(store):
+    """Moves every entity by its velocity, one whole component array at a time.
+
+    Dead rows have no velocity, so they can be moved along with the live ones instead of being skipped one by one.
+
+    Args:
+        store (EntityStore): The entities.
+    """
+    store.x[:] = array("i", map(add, store.x, store.vx))
+    store.y[:] = array("i", map(add, store.y, store.vy))
+
+
+def age(store):
+    """Adds one tick to the age of every live entity.
+
+    Args:
+        store (EntityStore): The entities.
+    """
+    store.age[:] = array("I", map(add, store.age, store.alive))
+
+
+def cull(store, top=-50, bottom=770):
+    """Removes the bullets that have left the screen, like `Bullet.update` does.
+
+    Args:
+        store (EntityStore): The entities.
+        top (int, optional): Bullets at or above this y-coordinate are removed. Defaults to -50.
+        bottom (int, optional): Bullets at or below this y-coordinate are removed. Defaults to 770.
+
+    Returns:
+        int: The number of bullets removed.
+    """
+    kinds, alive = store.kind, store.alive
+    gone = [index for index, y in enumerate(store.y[:store.size]) if (y <= top or y >= bottom)
+            and alive[index] and kinds[index] in BULLET_KINDS]
+    for index in gone:
+        store.despawn(index)
+    return len(gone)
+
+
+def reap(store):
+    """Removes every enemy whose health has run out, like `Enemy.update` does.
+
+    Args:
+        store (EntityStore): The entities.
+
+    Returns:
+        list: The rows of the enemies removed.
+    """
+    health, kinds, alive = store.health, store.kind, store.alive
+    dead = [index for index in range(store.size) if alive[index] and kinds[index] in ENEMY_KINDS and health[index] <= 0]
+    for index in dead:
+        store.despawn(index)
+    return dead
+
+
+def kind_images():
+    """Returns the shared image of every kind of entity.
+
+    Returns:
+        dict: The images, keyed on kind.
+    """
+    from SpaceInvaders import bullet_pool
+    images = {kind: assets.image(path) for kind, path in KIND_IMAGES.items()}
+    images.update({kind: bullet_pool.surface(colour) for kind, colour in BULLET_COLOURS.items()})
+    return images
+
+
+def draw(store, screen, images=None):
+    """Draws every live entity with a single batched blit, in the same order as `Game.draw`.
+
+    Args:
+        store (EntityStore): The entities.
+        screen (pygame.Surface): The surface to draw on.
+        images (dict, optional): The image of every kind. Defaults to None (`kind_images()`).
+    """
+    if images is None:
+        images = kind_images()
+    x, y, kinds = store.x, store.y, store.kind
+    rows = store.live()
+    rows.sort(key=lambda index: DRAW_RANK[kinds[index]])
+    screen.blits([(images[kinds[index]], (x[index], y[index])) for index in rows], doreturn=False)
+
+
+def bullet_kind(bullet):
+    """Returns the kind a game bullet is stored as.
+
+    Args:
+        bullet (Bullet): The bullet.
+
+    Returns:
+        int: The kind.
+    """
+    for kind, colour in BULLET_COLOURS.items():
+        if colour == bullet.colour:
+            return kind
+    raise ValueError("no entity kind for bullets of colour " + str(bullet.colour))
+
+
+def mirror(game, store=None):
+    """Copies the enemies, bullets, legendary enemy and spaceship of a game into an entity store.
+
+    Args:
+        game (Game): The game.
+        store (EntityStore, optional): The store to fill, which is cleared first. Defaults to None (a new store).
+
+    Returns:
+        EntityStore: The store.
+    """
+    from SpaceInvaders import Rare_Enemy, Epic_Enemy, Mythic_Enemy
+    kinds = {Rare_Enemy: RARE, Epic_Enemy: EPIC, Mythic_Enemy: MYTHIC}
+    if store is None:
+        store = EntityStore()
+    else:
+        store.clear()
+    for bullet in game.enemy_bullets:
+        store.spawn(bullet_kind(bullet), bullet.rect.x, bullet.rect.y, vy=-bullet.speed)
+    for legendary in game.legendary:
+        store.spawn(LEGENDARY, legendary.rect.x, legendary.rect.y, vx=legendary.speed)
+    player = game.player.sprite
+    if player:
+        for bullet in player.bullets:
+            store.spawn(PLAYER_BULLET, bullet.rect.x, bullet.rect.y, vy=-bullet.speed)
+        store.spawn(PLAYER, player.rect.x, player.rect.y)
+    for enemy in game.enemies:
+        store.spawn(kinds[type(enemy)], enemy.rect.x, enemy.rect.y, vx=game.enemy_direction, health=enemy.health, value=enemy.value)
+    return store
+
+
+def measure(count):
+    """Compares the memory use and speed of sprites and of an entity store with the same enemies and bullets.
+
+    Half of the entities are rare enemies and half are red bullets. The memory is what tracemalloc sees allocated while
+    the entities are created and put in their groups (sprites) or spawned (store).
+
+    Args:
+        count (int): The number of entities.
+
+    Returns:
+        dict: The bytes per entity, and the time in milliseconds of 100 ticks of movement and of the best of five draws, of each version.
+    """
+    from SpaceInvaders import Bullet, Rare_Enemy
+    enemies_count = count // 2
+    bullets_count = count - enemies_count
+    screen = pygame.Surface((720, 720))
+    images = kind_images()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    enemies = pygame.sprite.Group(*[Rare_Enemy(index % 700, index % 600) for index in range(enemies_count)])
+    bullets = pygame.sprite.Group(*[Bullet((index % 700, index % 700), -6, "red") for index in range(bullets_count)])
+    sprite_bytes = tracemalloc.get_traced_memory()[0] - before
+    before = tracemalloc.get_traced_memory()[0]
+    store = EntityStore(count)
+    for index in range(enemies_count):
+        store.spawn(RARE, index % 700, index % 600, vx=1, value=10)
+    for index in range(bullets_count):
+        store.spawn(RED_BULLET, index % 700, index % 700, vy=6)
+    store_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        enemies.update(1)
+        bullets.update()
+    sprite_update = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for _ in range(100):
+        move(store)
+        cull(store)
+    store_update = (time.perf_counter() - start) * 1000
+
+    sprite_draw = store_draw = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        bullets.draw(screen)
+        enemies.draw(screen)
+        sprite_draw = min(sprite_draw, (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        draw(store, screen, images)
+        store_draw = min(store_draw, (time.perf_counter() - start) * 1000)
+    for bullet in bullets.sprites():
+        bullet.kill()
+    return {
+        "sprite_bytes_per_entity": sprite_bytes / count,
+        "store_bytes_per_entity": store_bytes / count,
+        "store_array_bytes_per_entity": store.nbytes() / store.capacity,
+        "sprite_update_ms": sprite_update,
+        "store_update_ms": store_update,
+        "sprite_draw_ms": sprite_draw,
+        "store_draw_ms": store_draw,
+    }
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 entities.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Compare the memory use and speed of sprites and of the entity store.")
+    parser.add_argument("--count", type=int, default=10000, help="The number of entities. Defaults to 10000.")
+    args = parser.parse_args(argv)
+
+    from SpaceInvaders import init_headless
+    init_headless()
+    pygame.display.set_mode((720, 720))
+    result = measure(args.count)
+    print(f"bytes per entity     sprite {result['sprite_bytes_per_entity']:8.1f}   store {result['store_bytes_per_entity']:8.1f}"
+          f"   (component arrays alone {result['store_array_bytes_per_entity']:.1f})")
+    print(f"100 ticks of motion  sprite {result['sprite_update_ms']:8.2f}   store {result['store_update_ms']:8.2f} ms")
+    print(f"one draw             sprite {result['sprite_draw_ms']:8.2f}   store {result['store_draw_ms']:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
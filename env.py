@@ -0,0 +1,273 @@
+"""This file contains a reinforcement-learning style environment around the headless `Game`, and a vectorised variant.
+
+`InvadersEnv` follows the classic Gym API: `reset(seed)` returns the first observation and `step(action)` returns
+(observation, reward, done, info), where the reward is the change in `Game.score` and `done` is set once `Game.game_over` is.
+`VectorInvadersEnv` steps K games in lockstep and returns their observations stacked into batched NumPy arrays.
+
+Observations are dictionaries of NumPy arrays, with every coordinate scaled to 0-1 by the 720 pixel screen size:
+- "player": (x, lives, can shoot)
+- "enemies": the health of every slot of the formation, 0 where the enemy is dead
+- "enemy_bullets" / "player_bullets": up to `max_bullets` (x, y, present) rows, padded with zeros
+- "legendary": (present, x)
+- "frame": an optional downsampled RGB frame of the game, as uint8
+
+Usage:
+
+init_headless()
+env = VectorInvadersEnv(8, level=0, frame_shape=(84, 84))
+observations = env.reset(seed=0)
+observations, rewards, dones, infos = env.step(numpy.zeros(8, dtype=int))
+"""
+
+
+import numpy
+import pygame
+from SpaceInvaders import Game, Actions, NO_SLOT, init_headless
+
+SCREEN_SIZE = 720
+
+#* The discrete action space
+ACTIONS = [
+    Actions(),                           #* 0: Do nothing
+    Actions(left=True),                  #* 1: Move left
+    Actions(right=True),                 #* 2: Move right
+    Actions(shoot=True),                 #* 3: Shoot
+    Actions(left=True, shoot=True),      #* 4: Move left and shoot
+    Actions(right=True, shoot=True),     #* 5: Move right and shoot
+]
+
+
+def observation_buffers(count=None, formation_shape=(6, 8), max_bullets=32, frame_shape=None):
+    """Allocates the arrays an observation is written into.
+
+    Args:
+        count (int, optional): The number of environments to allocate a batch for. Defaults to None (a single observation).
+        formation_shape (tuple, optional): The (rows, columns) of the enemy formation. Defaults to (6, 8).
+        max_bullets (int, optional): The number of bullets of each side that are observed. Defaults to 32.
+        frame_shape (tuple, optional): The (width, height) of the downsampled frame. Defaults to None (no frame).
+
+    Returns:
+        dict: The zeroed observation arrays.
+    """
+    batch = () if count is None else (count,)
+    buffers = {
+        "player": numpy.zeros(batch + (3,), numpy.float32),
+        "enemies": numpy.zeros(batch + tuple(formation_shape), numpy.float32),
+        "enemy_bullets": numpy.zeros(batch + (max_bullets, 3), numpy.float32),
+        "player_bullets": numpy.zeros(batch + (max_bullets, 3), numpy.float32),
+        "legendary": numpy.zeros(batch + (2,), numpy.float32),
+    }
+    if frame_shape is not None:
+        buffers["frame"] = numpy.zeros(batch + (frame_shape[1], frame_shape[0], 3), numpy.uint8)
+    return buffers
+
+
+def write_bullets(out, bullets):
+    """Writes the positions of a group of bullets into an observation array, padding the unused rows with zeros.
+
+    Args:
+        out (numpy.ndarray): The (max_bullets, 3) array to write into.
+        bullets (pygame.sprite.Group): The bullets.
+    """
+    out.fill(0)
+    for index, bullet in zip(range(len(out)), bullets):
+        out[index] = (bullet.rect.centerx / SCREEN_SIZE, bullet.rect.centery / SCREEN_SIZE, 1)
+
+
+class InvadersEnv:
+    """A single-game environment with a discrete action space (see `ACTIONS`).
+
+    Attributes:
+        level (int): The level every episode starts on.
+        lives (int): The lives every episode starts with.
+        frame_skip (int): The number of game ticks each action is repeated for.
+        max_bullets (int): The number of bullets of each side that are observed.
+        frame_shape (tuple): The (width, height) of the downsampled frame, or None to leave the frame out.
+        max_ticks (int): The episode length limit in ticks, or None for no limit.
+        game (Game): The game of the current episode.
+        canvas (pygame.Surface): The full-size surface frames are drawn onto before downsampling.
+        small (pygame.Surface): The downsampled frame surface.
+    """
+
+    def __init__(self, level=0, lives=1, frame_skip=1, max_bullets=32, frame_shape=None, max_ticks=None):
+        """Initializes the environment. Call `reset` before stepping.
+
+        Args:
+            level (int, optional): The level every episode starts on. Defaults to 0.
+            lives (int, optional): The lives every episode starts with. Defaults to 1.
+            frame_skip (int, optional): The number of game ticks each action is repeated for. Defaults to 1.
+            max_bullets (int, optional): The number of bullets of each side that are observed. Defaults to 32.
+            frame_shape (tuple, optional): The (width, height) of the downsampled frame. Defaults to None (no frame).
+            max_ticks (int, optional): The episode length limit in ticks. Defaults to None (no limit).
+        """
+        self.level = level
+        self.lives = lives
+        self.frame_skip = frame_skip
+        self.max_bullets = max_bullets
+        self.frame_shape = frame_shape
+        self.max_ticks = max_ticks
+        self.game = None
+        self.canvas = pygame.Surface((SCREEN_SIZE, SCREEN_SIZE)) if frame_shape is not None else None
+        self.small = pygame.Surface(frame_shape) if frame_shape is not None else None
+
+    def reset(self, seed=None):
+        """Starts a new episode, reusing the game of the previous episode through `Game.reset`.
+
+        Args:
+            seed (int, optional): The seed of the new game. Defaults to None (a random seed).
+
+        Returns:
+            dict: The first observation.
+        """
+        if self.game is None:
+            self.game = Game(level=self.level, lives=self.lives, headless=True, seed=seed)
+        else:
+            self.game.reset(self.level, 0, self.lives, seed)
+        return self.observe()
+
+    def advance(self, action):
+        """Applies an action for `frame_skip` ticks without building an observation.
+
+        Args:
+            action (int): The index of the action in `ACTIONS`.
+
+        Returns:
+            tuple (float, bool, dict): The reward, whether the episode is over, and extra information.
+        """
+        game = self.game
+        actions = ACTIONS[action]
+        score = game.score
+        for _ in range(self.frame_skip):
+            game.step(actions)
+            if game.game_over:
+                break
+        truncated = self.max_ticks is not None and game.tick >= self.max_ticks
+        info = {"tick": game.tick, "score": game.score, "lives": game.lives, "game_over": game.game_over, "truncated": truncated}
+        return float(game.score - score), bool(game.game_over) or truncated, info
+
+    def step(self, action):
+        """Applies an action and returns the result.
+
+        Args:
+            action (int): The index of the action in `ACTIONS`.
+
+        Returns:
+            tuple (dict, float, bool, dict): The observation, the reward (the change in score), whether the episode is over, and extra information.
+        """
+        reward, done, info = self.advance(action)
+        return self.observe(), reward, done, info
+
+    def observe(self, out=None):
+        """Builds the observation of the current game state.
+
+        Args:
+            out (dict, optional): The arrays to write the observation into, e.g. one row of a batch. Defaults to None (new arrays).
+
+        Returns:
+            dict: The observation.
+        """
+        game = self.game
+        if out is None:
+            out = observation_buffers(None, game.formation_shape, self.max_bullets, self.frame_shape)
+        player = game.player.sprite
+        if player:
+            out["player"][:] = (player.rect.centerx / SCREEN_SIZE, max(game.lives, 0), player.can_shoot)
+            write_bullets(out["player_bullets"], player.bullets)
+        else:
+            out["player"].fill(0)
+            out["player_bullets"].fill(0)
+        enemies = out["enemies"]
+        enemies.fill(0)
+        formation = game.enemies
+        count = formation.count
+        health, row, column = formation.health[:count], formation.row[:count], formation.column[:count]
+        placed = formation.alive[:count] & (health > 0) & (row != NO_SLOT)
+        enemies[row[placed], column[placed]] = health[placed]
+        write_bullets(out["enemy_bullets"], game.enemy_bullets)
+        legendary = game.legendary.sprite
+        out["legendary"][:] = (1, legendary.rect.centerx / SCREEN_SIZE) if legendary else (0, 0)
+        if self.frame_shape is not None:
+            out["frame"][:] = self.render_frame()
+        return out
+
+    def render_frame(self):
+        """Draws the game and downsamples it to `frame_shape`.
+
+        Returns:
+            numpy.ndarray: The (height, width, 3) RGB frame.
+        """
+        self.canvas.fill((30, 30, 30))
+        self.game.draw(self.canvas)
+        pygame.transform.scale(self.canvas, self.frame_shape, self.small)
+        return pygame.surfarray.pixels3d(self.small).swapaxes(0, 1)
+
+
+class VectorInvadersEnv:
+    """Steps several `InvadersEnv` games in lockstep, returning batched observations.
+
+    Finished games are reset automatically; the last observation of the finished episode is put in its info dictionary
+    under "final_observation".
+
+    Attributes:
+        envs (list): The environments.
+        buffers (dict): The batched observation arrays, reused every step.
+        rows (list): The views of each environment's row in the batched arrays.
+        seeds (list): The seed of each environment's current episode.
+    """
+
+    def __init__(self, count, **kwargs):
+        """Initializes the environments. Call `reset` before stepping.
+
+        Args:
+            count (int): The number of games to run.
+            **kwargs: The arguments passed to every `InvadersEnv`.
+        """
+        self.envs = [InvadersEnv(**kwargs) for _ in range(count)]
+        self.buffers = None
+        self.rows = []
+        self.seeds = [None] * count
+
+    def reset(self, seed=None):
+        """Starts a new episode in every game.
+
+        Args:
+            seed (int, optional): The seed of the first game; the others get the following seeds. Defaults to None (random seeds).
+
+        Returns:
+            dict: The batched first observations.
+        """
+        self.seeds = [None if seed is None else seed + index for index in range(len(self.envs))]
+        for env, env_seed in zip(self.envs, self.seeds):
+            env.reset(env_seed)
+        first = self.envs[0]
+        self.buffers = observation_buffers(len(self.envs), first.game.formation_shape, first.max_bullets, first.frame_shape)
+        self.rows = [{key: value[index] for key, value in self.buffers.items()} for index in range(len(self.envs))]
+        for env, row in zip(self.envs, self.rows):
+            env.observe(row)
+        return self.buffers
+
+    def step(self, actions):
+        """Applies one action to every game.
+
+        Args:
+            actions (sequence): The index of the action of every game.
+
+        Returns:
+            tuple (dict, numpy.ndarray, numpy.ndarray, list): The batched observations, rewards and done flags, and the info of every game.
+        """
+        count = len(self.envs)
+        rewards = numpy.zeros(count, numpy.float32)
+        dones = numpy.zeros(count, bool)
+        infos = []
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            reward, done, info = env.advance(int(action))
+            rewards[index] = reward
+            dones[index] = done
+            if done:
+                info["final_observation"] = env.observe()
+                if self.seeds[index] is not None:
+                    self.seeds[index] += count
+                env.reset(self.seeds[index])
+            env.observe(self.rows[index])
+            infos.append(info)
+        return self.buffers, rewards, dones, infos
@@ -0,0 +1,260 @@
+"""This file contains the enemy formation generator and the registry of per-level formation definitions.
+
+A formation is described by a `FormationSpec`: its rows and columns, the spacing and offset of the grid, and the roll
+thresholds of each enemy tier. Every enemy rolls a number from 1 to 100, which is scaled by the level (`roll * level / 10`);
+rolls up to the first threshold make a rare enemy, up to the second an epic one, up to the third a mythic one, and anything
+higher makes a mythic enemy plus a legendary enemy that flies over the formation later in the level. The highest tiers are
+placed in the top rows, closest to the middle of each row.
+
+Formations can be defined per level in a JSON file and loaded with `formations.load`:
+
+{
+    "default": {"rows": 6, "columns": 8},
+    "levels": {
+        "5": {"rows": 20, "columns": 40, "x_spacing": 16, "y_spacing": 12, "x_offset": 40, "y_offset": 60},
+        "6": {"thresholds": [50, 80, 95]}
+    }
+}
+
+Levels that are not listed use the default. Every field that is left out keeps the value of the built-in default formation
+(6 rows of 8, the original game's layout).
+
+Generated formations are memoised on (level, seed, spec), so restarting or replaying a level does not roll it again. The
+formation rolls come from their own generator seeded with the game's seed, and the game's generator carries on from where the
+formation's left off, so a seed always gives the same game. The rolls are drawn in one batch by a NumPy generator seeded from
+the game's generator, so a seed gives a different formation than it did before the rolls were batched.
+
+Usage:
+
+from formations import formations
+
+formations.load("Levels/swarm.json")
+spec = formations.spec(level)
+rows, rng_state = formations.generate(level, seed, spec)
+"""
+
+
+import json
+import random
+from array import array
+from collections import OrderedDict, namedtuple
+import numpy
+
+#* The most rows or columns a formation can have, since game snapshots store an enemy's row and column as 16-bit numbers
+#* and use 0xFFFF for enemies outside the formation
+MAX_SIZE = 0xFFFE
+
+
+class FormationSpec(namedtuple("FormationSpec", ["rows", "columns", "x_spacing", "y_spacing", "x_offset", "y_offset", "thresholds"],
+                               defaults=(6, 8, 60, 48, 70, 100, (78, 93, 98)))):
+    """The layout and tier odds of an enemy formation.
+
+    Attributes:
+        rows (int): The number of rows of enemies.
+        columns (int): The number of enemies in each row.
+        x_spacing (int): The horizontal distance between neighbouring enemies, in pixels.
+        y_spacing (int): The vertical distance between neighbouring rows, in pixels.
+        x_offset (int): The x-coordinate of the left column.
+        y_offset (int): The y-coordinate of the top row.
+        thresholds (tuple): The highest scaled roll that makes a rare, an epic and a mythic enemy.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_dict(cls, data, base=None):
+        """Creates a spec from a level definition, taking every field that is left out from another spec.
+
+        Args:
+            data (dict): The fields of the spec.
+            base (FormationSpec, optional): The spec the missing fields are taken from. Defaults to None (the built-in default).
+
+        Returns:
+            FormationSpec: The spec.
+
+        Raises:
+            ValueError: If a field is unknown, or the formation is empty or has more than `MAX_SIZE` rows or columns, or the
+                thresholds are not three increasing numbers.
+        """
+        unknown = set(data) - set(cls._fields)
+        if unknown:
+            raise ValueError("unknown formation fields: " + ", ".join(sorted(unknown)))
+        spec = (base or cls())._replace(**data)
+        spec = spec._replace(thresholds=tuple(spec.thresholds))
+        if spec.rows < 1 or spec.columns < 1:
+            raise ValueError("a formation needs at least one row and one column")
+        if spec.rows > MAX_SIZE or spec.columns > MAX_SIZE:
+            raise ValueError("a formation can have at most " + str(MAX_SIZE) + " rows and columns")
+        if len(spec.thresholds) != 3 or list(spec.thresholds) != sorted(spec.thresholds):
+            raise ValueError("the thresholds must be three increasing numbers")
+        return spec
+
+
+def high_in_middle(values):
+    """Sorts a list so the highest values are in the middle and the lowest at both ends.
+
+    Args:
+        values (list): The values.
+
+    Returns:
+        list: The sorted values.
+    """
+    out = sorted(values)
+    return out[len(out)%2::2] + out[::-2]
+
+
+class FormationRegistry:
+    """The formation definitions of every level, and a cache of the formations generated from them.
+
+    Attributes:
+        default (FormationSpec): The formation of every level without a definition of its own.
+        levels (dict): The formations of particular levels, keyed on level.
+        cache (collections.OrderedDict): The generated formations, keyed on (level, seed, spec), least recently used first.
+        cache_size (int): The largest number of formations kept in the cache.
+        hits (int): The number of formations served from the cache.
+        misses (int): The number of formations that had to be generated.
+    """
+
+    def __init__(self, cache_size=64):
+        """Initializes the registry with the built-in default formation for every level.
+
+        Args:
+            cache_size (int, optional): The largest number of formations kept in the cache. Defaults to 64.
+        """
+        self.default = FormationSpec()
+        self.levels = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        """Loads the formation definitions from a JSON level file, replacing the current ones.
+
+        Args:
+            path (str): The path of the level file.
+        """
+        with open(path) as file:
+            data = json.load(file)
+        self.default = FormationSpec.from_dict(data.get("default", {}))
+        self.levels = {int(level): FormationSpec.from_dict(fields, self.default) for level, fields in data.get("levels", {}).items()}
+
+    def spec(self, level):
+        """Returns the formation of a level.
+
+        Args:
+            level (int): The level.
+
+        Returns:
+            FormationSpec: The formation.
+        """
+        return self.levels.get(level, self.default)
+
+    def generate(self, level, seed, spec=None):
+        """Returns the enemy tiers of a level's formation, generating them if they are not cached.
+
+        Args:
+            level (int): The level, which scales the rolls.
+            seed (int): The seed of the game.
+            spec (FormationSpec, optional): The formation. Defaults to None (the level's formation).
+
+        Returns:
+            tuple (tuple, tuple): The formation, as a tuple of rows of tiers (1 rare, 2 epic, 3 mythic) followed by a tuple with
+            a 4 for every legendary enemy, and the state of the random number generator after the rolls. The formation is
+            shared with every other caller and must not be modified.
+        """
+        if spec is None:
+            spec = self.spec(level)
+        key = (level, seed, spec)
+        formation = self.cache.get(key)
+        if formation is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        else:
+            self.misses += 1
+            formation = roll_formation(level, random.Random(seed), spec)
+            self.cache[key] = formation
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        rows, state = formation
+        return rows, unpack_state(state)
+
+    def add(self, level, seed, spec, formation):
+        """Caches a formation that was generated elsewhere, e.g. by the preloader's worker threads.
+
+        Args:
+            level (int): The level.
+            seed (int): The seed of the game.
+            spec (FormationSpec): The formation.
+            formation (tuple): The formation and packed generator state, as returned by `roll_formation`.
+        """
+        self.cache[(level, seed, spec)] = formation
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def stats(self):
+        """Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached formations.
+        """
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.cache)}
+
+
+def roll_formation(level, rng, spec):
+    """Rolls the tier of every enemy of a formation in one batch.
+
+    All the rolls are drawn at once by a NumPy generator seeded with 64 bits of `rng`. The scaled roll grows with the roll,
+    so each threshold is turned into the highest roll under it once, and every roll is binned against those edges with
+    `numpy.searchsorted`. Since the enemies are sorted by tier, the sorted formation is built straight from the tier counts
+    instead of sorting every enemy.
+
+    Args:
+        level (int): The level, which scales the rolls.
+        rng (random.Random): The generator to roll with.
+        spec (FormationSpec): The formation.
+
+    Returns:
+        tuple (tuple, tuple): The rows of tiers followed by the legendary enemies, and the generator's state after the rolls,
+        packed with `pack_state`.
+    """
+    rolls = numpy.random.default_rng(rng.getrandbits(64)).integers(1, 101, spec.rows * spec.columns)
+    edges = [sum(1 for roll in range(1, 101) if roll * level/10 <= threshold) for threshold in spec.thresholds]
+    #* 0 rare, 1 epic, 2 mythic, 3 a mythic enemy and a legendary one
+    rare, epic, mythic, legendary = numpy.bincount(numpy.searchsorted(edges, rolls), minlength=4).tolist()
+    ordered = [3] * (mythic + legendary) + [2] * epic + [1] * rare
+    columns = spec.columns
+    rows = tuple(tuple(high_in_middle(ordered[start:start + columns])) for start in range(0, len(ordered), columns))
+    return rows + ((4,) * legendary,), pack_state(rng.getstate())
+
+
+def pack_state(state):
+    """Packs the state of a random number generator into a compact form for the cache.
+
+    `random.Random.getstate` returns 625 separate ints, about 25 KB, while the same words packed into an array take 2.5 KB.
+
+    Args:
+        state (tuple): The state, as returned by `random.Random.getstate`.
+
+    Returns:
+        tuple (int, bytes, float): The version, the internal state as packed 32-bit words and the cached Gaussian (or None).
+    """
+    version, internal, gauss = state
+    return version, array("I", internal).tobytes(), gauss
+
+
+def unpack_state(packed):
+    """Rebuilds the state of a random number generator packed by `pack_state`.
+
+    Args:
+        packed (tuple): The packed state.
+
+    Returns:
+        tuple: The state, ready for `random.Random.setstate`.
+    """
+    version, internal, gauss = packed
+    return version, tuple(array("I", internal)), gauss
+
+
+#* The one registry shared by the whole process
+formations = FormationRegistry()
@@ -0,0 +1,694 @@
+"""This file contains the networked spectator and versus mode: a headless server that streams the game to clients over TCP.
+
+The server runs the one authoritative `Game` headlessly at `FPS` ticks per second. Every `send_every` ticks it sends each
+client the state of the game in the fixed binary encoding of `Game.snapshot`: the player, every enemy with its health, the
+bullets, the legendary enemy, the damage to every fortification, and the score and lives. The seed and the random number
+generator state are blanked out, so clients cannot predict the game.
+
+Each state is sent as a delta against the last state the client acknowledged. The two snapshots are XORed together, so every
+byte that did not change becomes zero, and the result is compressed with zlib. A client that has not acknowledged anything yet,
+or whose last acknowledged state is too old, gets a keyframe (a delta against nothing). Clients that acknowledged the same
+state share one encoded frame, so a tournament with many spectators costs one encode per distinct base state, not one per
+client.
+
+Clients rebuild every state, restore it into a local headless `Game` and draw it with the dirty-rectangle renderer,
+interpolating the moving sprites between the last two states. One client can connect as the player: the input it sends with
+its acknowledgements drives the server's game. Without a player, the scripted `tracker_player` plays.
+
+Wire format (all little-endian):
+- client hello: `HELLO` (b"HINP", the protocol version, the role: 0 spectator, 1 player)
+- server frame: `FRAME_HEADER` (sequence number, base sequence number or `NO_BASE`, snapshot length, CRC-32 of the snapshot,
+  payload length, server send time), followed by the zlib-compressed XOR delta
+- client acknowledgement: `ACK` (sequence number, input packed as in the 'replay' file)
+
+Usage:
+
+py -3 netplay.py serve --port 5555
+py -3 netplay.py watch --port 5555        # Add --play to control the spaceship
+py -3 netplay.py bench --clients 16 --ticks 600
+"""
+
+
+import argparse
+import selectors
+import socket
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+import pygame
+from SpaceInvaders import FPS, Game, Actions, NO_ACTIONS, SNAPSHOT_RNG, SNAPSHOT_RNG_SIZE, SNAPSHOT_SEED, init_headless
+from batch import tracker_player
+from renderer import DirtyRenderer
+from replay import encode_actions, decode_actions, xor_delta
+
+MAGIC = b"HINP"
+PROTOCOL_VERSION = 1
+SPECTATOR, PLAYER = 0, 1
+DEFAULT_PORT = 5555
+HELLO = struct.Struct("<4sBB")
+FRAME_HEADER = struct.Struct("<IIIIId")
+ACK = struct.Struct("<IB")
+NO_BASE = 0xFFFFFFFF
+#* The number of sent states kept as delta bases, by the server and by each client
+HISTORY = 64
+#* Clients with more than this many bytes still waiting to be sent are skipped until they catch up
+MAX_BACKLOG = 256 * 1024
+#* What the random number generator state at the end of every snapshot is replaced with in the states sent to clients
+BLANK_RNG = SNAPSHOT_RNG.pack(3, 0, 0.0) + array("I", [0] * 624 + [624]).tobytes()
+
+
+def public_snapshot(game):
+    """Returns the snapshot of a game with its seed and random number generator state blanked out.
+
+    Args:
+        game (Game): The game.
+
+    Returns:
+        bytes: The snapshot, which restores into a game that looks the same but cannot be used to predict the original.
+    """
+    snapshot = game.snapshot()
+    return snapshot[:SNAPSHOT_SEED] + bytes(4) + snapshot[SNAPSHOT_SEED + 4:-SNAPSHOT_RNG_SIZE] + BLANK_RNG
+
+
+def encode_frame(sequence, snapshot, base_sequence=NO_BASE, base=b"", sent=0.0, level=6):
+    """Encodes one state as a frame.
+
+    Args:
+        sequence (int): The sequence number of the state.
+        snapshot (bytes): The state.
+        base_sequence (int, optional): The sequence number of the base state. Defaults to `NO_BASE` (a keyframe).
+        base (bytes, optional): The base state. Defaults to b"" (a keyframe).
+        sent (float, optional): The `time.perf_counter` reading when the frame is sent. Defaults to 0.0.
+        level (int, optional): The zlib compression level. Defaults to 6.
+
+    Returns:
+        bytes: The frame.
+    """
+    payload = zlib.compress(xor_delta(snapshot, base), level)
+    return FRAME_HEADER.pack(sequence, base_sequence, len(snapshot), zlib.crc32(snapshot), len(payload), sent) + payload
+
+
+class Connection:
+    """A client connected to the server.
+
+    Attributes:
+        socket (socket.socket): The client's socket.
+        inbox (bytearray): The bytes received that have not been handled yet.
+        outbox (bytearray): The bytes waiting to be sent.
+        role (int): `SPECTATOR` or `PLAYER`, or None until the client's hello arrives.
+        acked (int): The sequence number of the latest state the client acknowledged, or None.
+        actions (Actions): The latest input sent by the client.
+        frames (int): The number of frames sent to the client.
+        skipped (int): The number of states not sent because the client had fallen behind.
+    """
+
+    def __init__(self, sock):
+        """Initializes the connection.
+
+        Args:
+            sock (socket.socket): The client's socket.
+        """
+        self.socket = sock
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+        self.role = None
+        self.acked = None
+        self.actions = NO_ACTIONS
+        self.frames = 0
+        self.skipped = 0
+
+
+class NetServer:
+    """Runs the authoritative game and streams its state to every connected client.
+
+    Attributes:
+        game (Game): The headless game being played.
+        listener (socket.socket): The listening socket.
+        address (tuple): The (host, port) the server listens on.
+        selector (selectors.BaseSelector): The selector watching every socket.
+        connections (list): The connected clients.
+        history (collections.OrderedDict): The last `HISTORY` states sent, keyed on sequence number.
+        sequence (int): The sequence number of the latest state sent.
+        send_every (int): The number of ticks between two states sent.
+        compression (int): The zlib compression level.
+        bot (callable): The scripted player used while no client is playing, taking the game and a random number generator.
+        ticks (int): The number of ticks played.
+        frames_encoded (int): The number of frames encoded.
+        bytes_sent (int): The number of frame bytes queued for the clients.
+        snapshot_bytes (int): The number of bytes the same states would have taken as uncompressed snapshots.
+        encode_time (float): The total time spent taking and encoding the states, in seconds.
+    """
+
+    def __init__(self, game=None, host="127.0.0.1", port=DEFAULT_PORT, send_every=1, compression=6):
+        """Initializes the server and starts listening.
+
+        Args:
+            game (Game, optional): The headless game to play. Defaults to None (a new headless game at level 0).
+            host (str, optional): The address to listen on. Defaults to "127.0.0.1".
+            port (int, optional): The port to listen on, or 0 for any free port. Defaults to `DEFAULT_PORT`.
+            send_every (int, optional): The number of ticks between two states sent. Defaults to 1.
+            compression (int, optional): The zlib compression level. Defaults to 6.
+        """
+        self.game = game if game is not None else Game(headless=True)
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.address = self.listener.getsockname()[:2]
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.connections = []
+        self.history = OrderedDict()
+        self.sequence = 0
+        self.send_every = send_every
+        self.compression = compression
+        self.bot = tracker_player
+        self.ticks = 0
+        self.frames_encoded = 0
+        self.bytes_sent = 0
+        self.snapshot_bytes = 0
+        self.encode_time = 0.0
+
+    def poll(self, timeout=0):
+        """Accepts new clients, reads their hellos and acknowledgements, and sends what is waiting to be sent.
+
+        Args:
+            timeout (float, optional): The longest to wait for a socket to be ready, in seconds. Defaults to 0.
+        """
+        for key, events in self.selector.select(timeout):
+            if key.data is None:
+                self.accept()
+                continue
+            connection = key.data
+            if events & selectors.EVENT_READ:
+                self.read(connection)
+            if events & selectors.EVENT_WRITE and connection in self.connections:
+                self.write(connection)
+
+    def accept(self):
+        """Accepts a waiting client. [No Args]"""
+        try:
+            sock, _ = self.listener.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = Connection(sock)
+        self.connections.append(connection)
+        self.selector.register(sock, selectors.EVENT_READ, connection)
+
+    def read(self, connection):
+        """Reads and handles what a client sent.
+
+        Args:
+            connection (Connection): The client.
+        """
+        try:
+            data = connection.socket.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.drop(connection)
+            return
+        inbox = connection.inbox
+        inbox += data
+        if connection.role is None:
+            if len(inbox) < HELLO.size:
+                return
+            magic, version, role = HELLO.unpack_from(inbox)
+            del inbox[:HELLO.size]
+            if magic != MAGIC or version != PROTOCOL_VERSION or role not in (SPECTATOR, PLAYER):
+                self.drop(connection)
+                return
+            connection.role = role
+        while len(inbox) >= ACK.size:
+            sequence, actions = ACK.unpack_from(inbox)
+            del inbox[:ACK.size]
+            if connection.acked is None or sequence > connection.acked:
+                connection.acked = sequence
+            connection.actions = decode_actions(actions)
+
+    def write(self, connection):
+        """Sends as much of what is waiting for a client as its socket takes.
+
+        Args:
+            connection (Connection): The client.
+        """
+        try:
+            sent = connection.socket.send(connection.outbox)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self.drop(connection)
+            return
+        del connection.outbox[:sent]
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if connection.outbox else selectors.EVENT_READ
+        self.selector.modify(connection.socket, events, connection)
+
+    def drop(self, connection):
+        """Disconnects a client.
+
+        Args:
+            connection (Connection): The client.
+        """
+        self.connections.remove(connection)
+        self.selector.unregister(connection.socket)
+        connection.socket.close()
+
+    def player(self):
+        """Returns the client playing the game.
+
+        Returns:
+            Connection: The first client that connected as the player, or None.
+        """
+        for connection in self.connections:
+            if connection.role == PLAYER:
+                return connection
+        return None
+
+    def step(self):
+        """Plays one tick with the player's latest input (or the bot's), moving on to the next level or starting again at
+        level 0 when the level is over, and sends the state to the clients every `send_every` ticks. [No Args]"""
+        game = self.game
+        player = self.player()
+        game.step(player.actions if player else self.bot(game, None))
+        if game.game_over == 1:
+            game.next_level()
+        elif game.game_over == -1:
+            game.reset(0, 0, 1)
+        self.ticks += 1
+        if self.ticks % self.send_every == 0:
+            self.broadcast()
+
+    def broadcast(self):
+        """Sends the current state to every client, as a delta against the last state each one acknowledged. [No Args]"""
+        start = time.perf_counter()
+        self.sequence += 1
+        snapshot = public_snapshot(self.game)
+        self.history[self.sequence] = snapshot
+        if len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+        frames = {}
+        for connection in self.connections:
+            if connection.role is None:
+                continue
+            if len(connection.outbox) > MAX_BACKLOG:
+                connection.skipped += 1
+                continue
+            base_sequence = connection.acked if connection.acked in self.history else NO_BASE
+            frame = frames.get(base_sequence)
+            if frame is None:
+                base = self.history[base_sequence] if base_sequence != NO_BASE else b""
+                frame = encode_frame(self.sequence, snapshot, base_sequence, base, time.perf_counter(), self.compression)
+                frames[base_sequence] = frame
+                self.frames_encoded += 1
+            connection.outbox += frame
+            connection.frames += 1
+            self.bytes_sent += len(frame)
+            self.snapshot_bytes += len(snapshot)
+        self.encode_time += time.perf_counter() - start
+        for connection in list(self.connections):
+            if connection.outbox:
+                self.write(connection)
+
+    def serve(self, ticks=None):
+        """Plays the game in real time at `FPS` ticks per second, handling the clients between ticks.
+
+        Args:
+            ticks (int, optional): The number of ticks to play. Defaults to None (play forever).
+        """
+        next_tick = time.perf_counter()
+        while ticks is None or self.ticks < ticks:
+            now = time.perf_counter()
+            if now < next_tick:
+                self.poll(next_tick - now)
+                continue
+            self.step()
+            #* Like `FixedTimestep`, time lost to a stall is dropped instead of being caught up in a burst
+            next_tick = max(next_tick + 1 / FPS, now - 5 / FPS)
+
+    def stats(self):
+        """Returns the server counters.
+
+        Returns:
+            dict: The ticks played, states sent, frames encoded, clients connected, frame bytes sent and the uncompressed
+            snapshot bytes they stand for, and the mean time to take and encode a state in milliseconds.
+        """
+        return {
+            "ticks": self.ticks,
+            "states": self.sequence,
+            "frames_encoded": self.frames_encoded,
+            "clients": len(self.connections),
+            "bytes_sent": self.bytes_sent,
+            "snapshot_bytes": self.snapshot_bytes,
+            "encode_ms": self.encode_time * 1000 / max(1, self.sequence),
+        }
+
+    def close(self):
+        """Disconnects every client and stops listening. [No Args]"""
+        for connection in list(self.connections):
+            self.drop(connection)
+        self.selector.unregister(self.listener)
+        self.listener.close()
+        self.selector.close()
+
+
+class NetClient:
+    """Receives the states streamed by a server, and sends back acknowledgements (with the player's input).
+
+    Attributes:
+        socket (socket.socket): The connection to the server.
+        role (int): `SPECTATOR` or `PLAYER`.
+        actions (Actions): The input sent with every acknowledgement. Only used by the server if the client is the player.
+        inbox (bytearray): The bytes received that have not been decoded yet.
+        history (collections.OrderedDict): The last `HISTORY` states received, keyed on sequence number.
+        sequence (int): The sequence number of the latest state received, or None.
+        frames (int): The number of frames received.
+        keyframes (int): How many of them were keyframes.
+        bytes_received (int): The number of bytes received.
+        latencies (list): The time from sending to decoding of every frame, in seconds. Only meaningful when the server runs
+            on the same machine.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, role=SPECTATOR, timeout=5.0):
+        """Connects to a server.
+
+        Args:
+            host (str, optional): The address of the server. Defaults to "127.0.0.1".
+            port (int, optional): The port of the server. Defaults to `DEFAULT_PORT`.
+            role (int, optional): `SPECTATOR` or `PLAYER`. Defaults to `SPECTATOR`.
+            timeout (float, optional): The longest to wait for the connection, in seconds. Defaults to 5.0.
+        """
+        self.socket = socket.create_connection((host, port), timeout)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.sendall(HELLO.pack(MAGIC, PROTOCOL_VERSION, role))
+        self.socket.setblocking(False)
+        self.role = role
+        self.actions = NO_ACTIONS
+        self.inbox = bytearray()
+        self.history = OrderedDict()
+        self.sequence = None
+        self.frames = 0
+        self.keyframes = 0
+        self.bytes_received = 0
+        self.latencies = []
+
+    def poll(self):
+        """Decodes every frame that has arrived and acknowledges the latest one.
+
+        Returns:
+            list: The (sequence number, snapshot) of every new state, oldest first.
+
+        Raises:
+            ConnectionError: If the server closed the connection.
+            ValueError: If a frame does not decode to the state the server sent.
+        """
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except BlockingIOError:
+                break
+            if not data:
+                raise ConnectionError("the server closed the connection")
+            self.inbox += data
+            self.bytes_received += len(data)
+        states = []
+        inbox = self.inbox
+        while len(inbox) >= FRAME_HEADER.size:
+            sequence, base_sequence, size, crc, payload_size, sent = FRAME_HEADER.unpack_from(inbox)
+            end = FRAME_HEADER.size + payload_size
+            if len(inbox) < end:
+                break
+            payload = bytes(inbox[FRAME_HEADER.size:end])
+            del inbox[:end]
+            if base_sequence == NO_BASE:
+                base = b""
+                self.keyframes += 1
+            elif base_sequence in self.history:
+                base = self.history[base_sequence]
+            else:
+                raise ValueError("frame " + str(sequence) + " is a delta against unknown state " + str(base_sequence))
+            snapshot = xor_delta(zlib.decompress(payload), base)
+            if len(snapshot) != size or zlib.crc32(snapshot) != crc:
+                raise ValueError("frame " + str(sequence) + " did not decode to the state the server sent")
+            self.latencies.append(time.perf_counter() - sent)
+            self.history[sequence] = snapshot
+            if len(self.history) > HISTORY:
+                self.history.popitem(last=False)
+            self.frames += 1
+            states.append((sequence, snapshot))
+        if states:
+            self.sequence = states[-1][0]
+            self.acknowledge()
+        return states
+
+    def acknowledge(self):
+        """Tells the server the latest state received, along with the player's input. [No Args]"""
+        try:
+            self.socket.send(ACK.pack(self.sequence or 0, encode_actions(self.actions)))
+        except BlockingIOError:
+            pass #* The next acknowledgement supersedes this one
+
+    def close(self):
+        """Disconnects from the server. [No Args]"""
+        self.socket.close()
+
+
+def moving_sprites(game):
+    """Returns the moving sprites of a game, each with a key that names the same object in every snapshot.
+
+    Enemies are keyed on their formation slot and bullets on their group, column, speed and colour (bullets sharing a key are
+    told apart by position).
+
+    Args:
+        game (Game): The game.
+
+    Returns:
+        list: The (key, sprite) of every moving sprite.
+    """
+    keyed = [(("enemy", enemy.slot), enemy) for enemy in game.enemies if enemy.slot is not None]
+    keyed.extend((("legendary",), sprite) for sprite in game.legendary)
+    keyed.extend((("player",), sprite) for sprite in game.player)
+    for name, group in (("enemy_bullet", game.enemy_bullets), ("player_bullet", game.spaceship.bullets)):
+        keyed.extend(((name, bullet.rect.x, bullet.speed, str(bullet.colour)), bullet) for bullet in group)
+    return keyed
+
+
+class SpectatorView:
+    """Draws the states received by a client, interpolated between the last two.
+
+    `Game.restore` creates new sprites for every state, so before a state is restored the positions of the moving sprites are
+    recorded by key (see `moving_sprites`) and handed to the renderer for the matching new sprites.
+
+    Attributes:
+        game (Game): The local headless game the states are restored into.
+        renderer (DirtyRenderer): The renderer.
+        received (float): The `time.perf_counter` reading when the latest state was applied, or None before the first one.
+        interval (float): The game time between the last two states, in seconds.
+    """
+
+    def __init__(self, screen):
+        """Initializes the view.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+        """
+        self.game = Game(headless=True)
+        self.renderer = DirtyRenderer(screen, (30, 30, 30))
+        self.received = None
+        self.interval = 1 / FPS
+
+    def apply(self, snapshot, now=None):
+        """Shows a new state.
+
+        Args:
+            snapshot (bytes): The state.
+            now (float, optional): The current `time.perf_counter` reading. Defaults to None (read the clock).
+        """
+        game = self.game
+        before = {}
+        for key, sprite in moving_sprites(game):
+            before.setdefault(key, []).append(sprite.rect.topleft)
+        level, tick = game.level, game.tick
+        game.restore(snapshot)
+        if game.level != level or self.received is None:
+            self.renderer.invalidate()
+            before = {}
+        elif game.tick > tick:
+            self.interval = (game.tick - tick) / FPS
+        positions = {}
+        for key, sprite in moving_sprites(game):
+            candidates = before.get(key)
+            if candidates:
+                x, y = sprite.rect.topleft
+                previous = min(candidates, key=lambda position: abs(position[0] - x) + abs(position[1] - y))
+                candidates.remove(previous)
+                positions[sprite] = previous
+        self.renderer.positions = positions
+        self.received = time.perf_counter() if now is None else now
+
+    def alpha(self, now=None):
+        """Returns how far the drawn sprites are between the previous state and the latest one.
+
+        Args:
+            now (float, optional): The current `time.perf_counter` reading. Defaults to None (read the clock).
+
+        Returns:
+            float: A fraction from 0 (the previous state) to 1 (the latest state).
+        """
+        if now is None:
+            now = time.perf_counter()
+        return min(1.0, (now - self.received) / self.interval)
+
+    def draw(self, overlays=()):
+        """Draws the latest state, interpolated.
+
+        Args:
+            overlays (iterable, optional): Extra drawing functions, as taken by `DirtyRenderer.render`. Defaults to ().
+
+        Returns:
+            list: The rectangles of the screen that changed.
+        """
+        return self.renderer.render(self.game, overlays, self.alpha())
+
+
+def watch(host="127.0.0.1", port=DEFAULT_PORT, play=False):
+    """Opens a window showing a server's game, optionally playing it with the keyboard.
+
+    Args:
+        host (str, optional): The address of the server. Defaults to "127.0.0.1".
+        port (int, optional): The port of the server. Defaults to `DEFAULT_PORT`.
+        play (bool, optional): Whether to connect as the player. Defaults to False (spectate).
+    """
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((720, 720))
+    pygame.display.set_caption("Space Invaders - " + ("playing" if play else "watching") + f" {host}:{port}")
+    client = NetClient(host, port, PLAYER if play else SPECTATOR)
+    view = SpectatorView(screen)
+    clock = pygame.time.Clock()
+    try:
+        while not any(event.type == pygame.QUIT for event in pygame.event.get()):
+            if play:
+                client.actions = Actions.from_keys(pygame.key.get_pressed())
+            for _, snapshot in client.poll():
+                view.apply(snapshot)
+            if view.received is not None:
+                rects = view.draw()
+                if rects:
+                    pygame.display.update(rects)
+            clock.tick(FPS)
+    finally:
+        client.close()
+        pygame.quit()
+
+
+def bench(clients=8, ticks=600, send_every=1, level=0, seed=1, compression=6):
+    """Streams a headless game to spectators on localhost and measures the bandwidth and latency.
+
+    The server and the clients run in one loop: every tick, the server steps and sends, and then every client decodes what
+    arrived. One of the clients also restores every state into a `SpectatorView`, to check that every state is usable.
+
+    Args:
+        clients (int, optional): The number of spectators. Defaults to 8.
+        ticks (int, optional): The number of ticks to play. Defaults to 600.
+        send_every (int, optional): The number of ticks between two states sent. Defaults to 1.
+        level (int, optional): The level to play. Defaults to 0.
+        seed (int, optional): The seed of the game. Defaults to 1.
+        compression (int, optional): The zlib compression level. Defaults to 6.
+
+    Returns:
+        dict: The bytes per second sent to each client with the delta encoding, as full snapshots and as raw 720x720 RGB
+        frames, the latency from sending to decoding in milliseconds (mean, 95th percentile and worst), the mean time to
+        take and encode a state in milliseconds, the keyframes and the server's counters.
+    """
+    init_headless()
+    server = NetServer(Game(level, headless=True, seed=seed), port=0, send_every=send_every, compression=compression)
+    spectators = [NetClient(*server.address) for _ in range(clients)]
+    deadline = time.perf_counter() + 5
+    while sum(connection.role is not None for connection in server.connections) < clients:
+        if time.perf_counter() > deadline:
+            raise TimeoutError("the spectators did not connect")
+        server.poll(0.01)
+    view = SpectatorView(pygame.Surface((720, 720)))
+    for _ in range(ticks):
+        server.step()
+        for index, client in enumerate(spectators):
+            for _, snapshot in client.poll():
+                if index == 0:
+                    view.apply(snapshot)
+                    view.draw()
+        server.poll(0)
+    time.sleep(0.05)
+    for client in spectators:
+        client.poll()
+    seconds = ticks / FPS
+    latencies = sorted(latency for client in spectators for latency in client.latencies)
+    stats = server.stats()
+    result = {
+        "delta_bytes_per_second": sum(client.bytes_received for client in spectators) / clients / seconds,
+        "snapshot_bytes_per_second": stats["snapshot_bytes"] / clients / seconds,
+        "frame_bytes_per_second": 720 * 720 * 3 * FPS / send_every,
+        "latency_ms": 1000 * sum(latencies) / len(latencies),
+        "latency_p95_ms": 1000 * latencies[int(len(latencies) * 0.95)],
+        "latency_max_ms": 1000 * latencies[-1],
+        "encode_ms": stats["encode_ms"],
+        "keyframes": sum(client.keyframes for client in spectators),
+        "frames": sum(client.frames for client in spectators),
+        "server": stats,
+    }
+    for client in spectators:
+        client.close()
+    server.close()
+    return result
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 netplay.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Stream a headless game to spectators and a remote player over TCP.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the game and stream it to every client that connects.")
+    watch_parser = commands.add_parser("watch", help="Watch (or play) a server's game in a window.")
+    bench_parser = commands.add_parser("bench", help="Measure the bandwidth and latency of streaming to local spectators.")
+    for command in (serve_parser, watch_parser):
+        command.add_argument("--host", default="127.0.0.1", help="The address to listen on or connect to. Defaults to 127.0.0.1.")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"The port. Defaults to {DEFAULT_PORT}.")
+    for command in (serve_parser, bench_parser):
+        command.add_argument("--level", type=int, default=0, help="The level to start at. Defaults to 0.")
+        command.add_argument("--seed", type=int, default=None, help="The seed of the game. Defaults to a random seed.")
+        command.add_argument("--send-every", type=int, default=1, help="The ticks between two states sent. Defaults to 1.")
+    watch_parser.add_argument("--play", action="store_true", help="Control the spaceship with the keyboard.")
+    bench_parser.add_argument("--clients", type=int, default=8, help="The number of spectators. Defaults to 8.")
+    bench_parser.add_argument("--ticks", type=int, default=600, help="The number of ticks to play. Defaults to 600.")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        init_headless()
+        server = NetServer(Game(args.level, headless=True, seed=args.seed), args.host, args.port, args.send_every)
+        print(f"Serving on {server.address[0]}:{server.address[1]}")
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+    elif args.command == "watch":
+        watch(args.host, args.port, args.play)
+    else:
+        result = bench(args.clients, args.ticks, args.send_every, args.level, 1 if args.seed is None else args.seed)
+        print(f"{args.clients} spectators, {args.ticks} ticks, a state every {args.send_every} tick(s)")
+        print(f"per spectator   delta {result['delta_bytes_per_second'] / 1024:8.1f} KB/s   "
+              f"snapshots {result['snapshot_bytes_per_second'] / 1024:8.1f} KB/s   "
+              f"raw frames {result['frame_bytes_per_second'] / 1024:8.1f} KB/s")
+        print(f"latency         mean {result['latency_ms']:.3f} ms   p95 {result['latency_p95_ms']:.3f} ms   "
+              f"max {result['latency_max_ms']:.3f} ms")
+        print(f"server          {result['encode_ms']:.3f} ms per state, {result['server']['frames_encoded']} frames encoded "
+              f"for {result['frames']} sent, {result['keyframes']} keyframes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,333 @@
+"""This file contains the background preloader that gets the next level ready while a menu is on screen.
+
+Decoding the game's images and sounds, rolling the next level's formation and drawing the repaired fortifications all
+happen on a small pool of worker threads, while the main thread keeps drawing the menu. The main thread then finishes each
+job in `poll`, once per frame: it converts the decoded images to the display format, creates the fonts (font rendering is
+not thread-safe), puts everything into the asset and formation caches and swaps the repaired images into the
+fortifications. By the time PLAY or CONTINUE is clicked, the play scene only has to call `finish` to pick up the prepared
+seed, and building or resetting the game hits the caches for everything.
+
+Whenever a job finishes, the preloader posts a `PRELOAD_EVENT`, so a menu blocked waiting for input wakes up to finish it.
+
+Usage:
+
+preloader = Preloader()
+preloader.preload_assets()
+preloader.prepare_level(level, game)
+while preloader.progress() < 1:
+    preloader.poll() # Once per frame
+seed = preloader.finish(level)
+"""
+
+
+import argparse
+import io
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from assets import assets
+from formations import formations, roll_formation
+
+#* Every asset the game itself uses, as (kind, path, volume or size). The music is left out: it is not shipped with the game,
+#* and it is only decoded once per process anyway
+GAME_ASSETS = [
+    ("image", "Assets/Alien_Rare.png", None),
+    ("image", "Assets/Alien_Epic.png", None),
+    ("image", "Assets/Alien_Mythic.png", None),
+    ("image", "Assets/UFO_Legendary.png", None),
+    ("image", "Assets/player.png", None),
+    ("sound", "Assets/explosion.wav", 0.3),
+    ("sound", "Assets/bullet.wav", 0.1),
+    ("sound", "Assets/bullet.wav", 0.5),
+    ("font", "Assets/Pixeled.ttf", 20),
+    ("font", "Assets/Pixeled.ttf", 40),
+]
+
+#* Posted whenever a preload job finishes
+PRELOAD_EVENT = pygame.event.custom_type()
+
+
+def decode(kind, path, bundle):
+    """Decodes an asset. Runs on a worker thread, so it only does the work that is safe off the main thread.
+
+    Args:
+        kind (str): The kind of asset: "image", "sound" or "font".
+        path (str): The path of the asset.
+        bundle (Bundle): The asset bundle to read from, or None to read the loose file.
+
+    Returns:
+        object: The unconverted surface of an image, the sound at full volume, or the raw bytes of a font file.
+    """
+    bundled = bundle is not None and path in bundle
+    if kind == "image":
+        return bundle.image(path) if bundled else pygame.image.load(path)
+    if kind == "sound":
+        sound = bundle.sound(path) if bundled else None
+        return sound if sound is not None else pygame.mixer.Sound(path)
+    if bundled:
+        return bytes(bundle.data(path))
+    with open(path, "rb") as file:
+        return file.read()
+
+
+class Preloader:
+    """Runs preload jobs on worker threads and finishes them on the main thread.
+
+    Attributes:
+        workers (int): The number of worker threads.
+        executor (concurrent.futures.ThreadPoolExecutor): The worker threads, started by the first job.
+        jobs (list): The (future, finish) of every job that has not been finished yet; `finish` is called on the main
+            thread with the result of the future.
+        total (int): The number of jobs submitted since the preloader was last idle.
+        finished (int): How many of those jobs have been finished.
+        failed (int): The number of jobs that raised an error. Their assets are loaded the usual way when they are needed.
+        seeds (dict): The seed each prepared level will be played with, keyed on level.
+    """
+
+    def __init__(self, workers=2):
+        """Initializes the preloader. No threads are started until the first job is submitted.
+
+        Args:
+            workers (int, optional): The number of worker threads. Defaults to 2.
+        """
+        self.workers = workers
+        self.executor = None
+        self.jobs = []
+        self.total = 0
+        self.finished = 0
+        self.failed = 0
+        self.seeds = {}
+
+    def submit(self, work, finish, *args):
+        """Runs a function on a worker thread, and its finishing step on the main thread once it is done.
+
+        Args:
+            work (callable): The function run on a worker thread.
+            finish (callable): The function called by `poll` on the main thread with the result of `work`.
+            *args: The arguments of `work`.
+        """
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(self.workers, thread_name_prefix="preload")
+        if not self.jobs:
+            self.total = self.finished = 0
+        future = self.executor.submit(work, *args)
+        future.add_done_callback(wake)
+        self.jobs.append((future, finish))
+        self.total += 1
+
+    def preload_assets(self, manifest=GAME_ASSETS):
+        """Decodes every asset of a manifest that is not cached yet.
+
+        Args:
+            manifest (list, optional): The (kind, path, volume or size) of every asset. Defaults to `GAME_ASSETS`.
+        """
+        for kind, path, option in manifest:
+            if kind == "image":
+                if path in assets.images:
+                    continue
+                finish = lambda image, path=path: assets.add("image", path, convert(image))
+            elif kind == "sound":
+                if (path, option) in assets.sounds or not pygame.mixer.get_init():
+                    continue
+                finish = lambda sound, key=(path, option): assets.add("sound", key, set_volume(sound, key[1]))
+            else:
+                if (path, option) in assets.fonts:
+                    continue
+                finish = lambda data, key=(path, option): assets.add("font", key, pygame.font.Font(io.BytesIO(data), key[1]))
+            self.submit(decode, finish, kind, path, assets.bundle)
+
+    def prepare_level(self, level, game=None, seed=None):
+        """Picks the seed a level will be played with, rolls its formation and redraws the repaired fortifications of the game
+        that will play it.
+
+        The repaired images are drawn on a worker thread and swapped into the fortifications by `poll` on the main thread, so
+        the game must not be stepped until `finish` has been called.
+
+        Args:
+            level (int): The level.
+            game (Game, optional): The game that will be reset to the level. Defaults to None (no fortifications to repair).
+            seed (int, optional): The seed. Defaults to None (a random seed is picked, like `Game.reset` does).
+
+        Returns:
+            int: The seed.
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seeds[level] = seed
+        spec = formations.spec(level)
+        self.submit(roll_formation, lambda formation: formations.add(level, seed, spec, formation), level, random.Random(seed), spec)
+        if game is not None:
+            for fort in game.blocks:
+                if fort.blocks_left() != fort.cells_total:
+                    self.submit(fort.render, lambda rendered, fort=fort: fort.set_cells(fort.intact, rendered), fort.intact)
+        return seed
+
+    def poll(self):
+        """Finishes the jobs that are done. Call this once per frame on the main thread. [No Args]"""
+        if self.jobs and any(future.done() for future, _ in self.jobs):
+            self.jobs = [job for job in self.jobs if not self.finish_job(job)]
+
+    def finish_job(self, job):
+        """Finishes one job if it is done.
+
+        Args:
+            job (tuple): The (future, finish) of the job.
+
+        Returns:
+            bool: True if the job was done (and is now finished).
+        """
+        future, finish = job
+        if not future.done():
+            return False
+        try:
+            finish(future.result())
+        except Exception:
+            self.failed += 1
+        self.finished += 1
+        return True
+
+    def progress(self):
+        """Returns how much of the preloading is done.
+
+        Returns:
+            float: The fraction of the jobs submitted since the preloader was last idle that have been finished, from 0 to 1.
+        """
+        return self.finished / self.total if self.jobs else 1.0
+
+    def wait(self):
+        """Blocks until every job is done and finishes them. [No Args]"""
+        for future, _ in self.jobs:
+            future.exception()
+        self.poll()
+
+    def finish(self, level):
+        """Finishes every job and returns the seed the level was prepared with.
+
+        Args:
+            level (int): The level about to be played.
+
+        Returns:
+            int: The seed, or None if the level was not prepared.
+        """
+        self.wait()
+        seed = self.seeds.get(level)
+        self.seeds = {}
+        return seed
+
+    def stats(self):
+        """Returns the preloader counters.
+
+        Returns:
+            dict: The number of jobs submitted and finished since the preloader was last idle, and the number that failed.
+        """
+        return {"total": self.total, "finished": self.finished, "failed": self.failed}
+
+    def close(self):
+        """Waits for the running jobs and stops the worker threads. [No Args]"""
+        self.wait()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def wake(future):
+    """Posts a `PRELOAD_EVENT`, so a menu waiting for input runs a frame and finishes the job. Runs on the worker thread.
+
+    Args:
+        future (concurrent.futures.Future): The job that is done.
+    """
+    if pygame.display.get_init():
+        try:
+            pygame.event.post(pygame.event.Event(PRELOAD_EVENT))
+        except pygame.error:
+            pass
+
+
+def convert(image):
+    """Converts a decoded image to the display format, when there is a display.
+
+    Args:
+        image (pygame.Surface): The image.
+
+    Returns:
+        pygame.Surface: The converted image.
+    """
+    return image.convert_alpha() if pygame.display.get_surface() is not None else image
+
+
+def set_volume(sound, volume):
+    """Sets the volume of a decoded sound.
+
+    Args:
+        sound (pygame.mixer.Sound): The sound.
+        volume (float): The volume, between 0 and 1.
+
+    Returns:
+        pygame.mixer.Sound: The sound.
+    """
+    sound.set_volume(volume)
+    return sound
+
+
+def measure(repeat):
+    """Measures the latency of the first frame after PLAY is clicked, without and with preloading during the main menu.
+
+    Every run starts with empty asset and formation caches, like a freshly started game. The latency is the time from the
+    click to the end of drawing the first frame of the level (the frame cap is left out). The games are headless, so the
+    music (which is not shipped with the game) is not played; the sound effects are still decoded.
+
+    Args:
+        repeat (int): The number of runs of each method.
+
+    Returns:
+        dict: The mean and best latency in milliseconds of the "cold" and "preloaded" methods.
+    """
+    from audio import audio
+    from scenes import SceneManager, MainMenuScene
+    from SpaceInvaders import init_headless
+    init_headless()
+    #* The dummy audio driver still decodes sounds, so loading the sound effects is part of the measurement
+    pygame.mixer.init()
+    audio.enabled = True
+    screen = pygame.display.set_mode((720, 720))
+    results = {}
+    for method in ("cold", "preloaded"):
+        times = []
+        for _ in range(repeat):
+            assets.clear()
+            formations.cache.clear()
+            audio.reset()
+            manager = SceneManager(screen, headless=True, preload=method == "preloaded")
+            manager.switch(MainMenuScene(manager))
+            manager.running = True
+            menu = time.perf_counter() + 0.2
+            while time.perf_counter() < menu:
+                manager.frame()
+            start = time.perf_counter()
+            manager.scene.activate()
+            scene = manager.scene
+            scene.update()
+            scene.draw(screen)
+            times.append((time.perf_counter() - start) * 1000)
+            audio.stop()
+            manager.scene.exit()
+            if manager.preloader:
+                manager.preloader.close()
+        results[method] = {"mean_ms": sum(times) / repeat, "best_ms": min(times)}
+        print(f"{method:9} first frame mean {results[method]['mean_ms']:7.2f} ms  best {results[method]['best_ms']:7.2f} ms")
+    return results
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 preload.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Measure the first-frame latency of a level with and without preloading.")
+    parser.add_argument("--repeat", type=int, default=10, help="The number of runs of each method. Defaults to 10.")
+    args = parser.parse_args(argv)
+    measure(args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""This file contains the opt-in per-stage profiler and the in-game performance overlay.
+
+When a `FrameProfiler` is assigned to `Game.profiler`, every stage of `Game.step` and `Game.draw` (player update, enemy
+movement, collisions, each draw call, ...) is timed. The profiler keeps a rolling window and a histogram of every stage, counts
+the sprites in each group, records the frames that blew the frame budget along with the stage that took the longest, and can
+dump all of it to a JSON file. `PerformanceOverlay` draws the FPS, a frame-time graph and the slowest stages on top of the game.
+
+Usage:
+
+profiler = FrameProfiler()
+overlay = PerformanceOverlay(profiler)
+game.profiler = profiler
+while True:
+    profiler.begin_frame()
+    ... # game.update(screen) and the rest of the frame
+    overlay.draw(screen)
+    profiler.end_frame(game)
+profiler.dump("profile.json")
+
+In the game, run `py -3 main.py --profile`, then press F3 to toggle the overlay and F4 to dump the data to profile.json.
+"""
+
+
+import json
+import time
+from collections import deque
+import pygame
+from assets import assets
+
+BUDGET_MS = 1000 / 60
+#* The upper bounds (in milliseconds) of the histogram buckets; the last bucket catches everything slower
+BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, BUDGET_MS, 33.3]
+
+
+class StageStats:
+    """The timings of one stage.
+
+    Attributes:
+        recent (collections.deque): The most recent samples, in milliseconds.
+        histogram (list): The number of samples in each of the `BUCKETS`, plus one for slower samples.
+        count (int): The total number of samples.
+        total (float): The sum of all samples, in milliseconds.
+        worst (float): The slowest sample, in milliseconds.
+    """
+
+    def __init__(self, window):
+        """Initializes empty stage statistics.
+
+        Args:
+            window (int): The number of recent samples to keep.
+        """
+        self.recent = deque(maxlen=window)
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, elapsed):
+        """Records one sample.
+
+        Args:
+            elapsed (float): The time the stage took, in milliseconds.
+        """
+        self.recent.append(elapsed)
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.worst:
+            self.worst = elapsed
+        for index, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                self.histogram[index] += 1
+                return
+        self.histogram[-1] += 1
+
+    def recent_mean(self):
+        """Returns the mean of the recent samples, in milliseconds."""
+        return sum(self.recent) / len(self.recent) if self.recent else 0.0
+
+    def summary(self):
+        """Returns the statistics as a dictionary.
+
+        Returns:
+            dict: The sample count, mean, recent mean, p95 of the recent samples, worst sample and histogram.
+        """
+        ordered = sorted(self.recent)
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "recent_mean_ms": self.recent_mean(),
+            "recent_p95_ms": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+            "worst_ms": self.worst,
+            "histogram": dict(zip([str(round(bound, 2)) for bound in BUCKETS] + ["slower"], self.histogram)),
+        }
+
+
+class FrameProfiler:
+    """Times the stages of every frame.
+
+    Attributes:
+        window (int): The number of recent samples kept per stage.
+        stages (dict): The `StageStats` of every stage, keyed on name.
+        frames (StageStats): The statistics of whole frames (from `begin_frame` to `end_frame`).
+        frame_stages (dict): The time of every stage in the current frame, in milliseconds.
+        intervals (collections.deque): The recent times between the start of consecutive frames, in milliseconds.
+        sprite_counts (dict): The number of sprites in each group at the end of the last frame.
+        max_sprite_counts (dict): The largest number of sprites seen in each group.
+        overruns (collections.deque): The recent frames over the budget, as dictionaries of their tick, time and slowest stages.
+    """
+
+    def __init__(self, window=300):
+        """Initializes an empty profiler.
+
+        Args:
+            window (int, optional): The number of recent samples kept per stage. Defaults to 300 (5 seconds at 60 fps).
+        """
+        self.window = window
+        self.stages = {}
+        self.frames = StageStats(window)
+        self.frame_stages = {}
+        self.intervals = deque(maxlen=window)
+        self.sprite_counts = {}
+        self.max_sprite_counts = {}
+        self.overruns = deque(maxlen=100)
+        self.frame_start = None
+
+    def run(self, name, stage, *args):
+        """Runs and times one stage. `Game` calls this for each of its stages while it is being profiled.
+
+        Args:
+            name (str): The name of the stage.
+            stage (callable): The stage to run.
+            *args: The arguments passed to the stage.
+
+        Returns:
+            object: What the stage returned.
+        """
+        start = time.perf_counter()
+        result = stage(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats(self.window)
+        stats.add(elapsed)
+        self.frame_stages[name] = self.frame_stages.get(name, 0.0) + elapsed
+        return result
+
+    def begin_frame(self):
+        """Marks the start of a frame. [No Args]"""
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.intervals.append((now - self.frame_start) * 1000)
+        self.frame_start = now
+        self.frame_stages = {}
+
+    def end_frame(self, game=None):
+        """Marks the end of a frame, recording its total time and the game's sprite counts.
+
+        Args:
+            game (Game, optional): The game, whose sprite groups are counted. Defaults to None.
+        """
+        if self.frame_start is None:
+            return
+        elapsed = (time.perf_counter() - self.frame_start) * 1000
+        self.frames.add(elapsed)
+        if game is not None:
+            self.count_sprites(game)
+        if elapsed > BUDGET_MS:
+            slowest = sorted(self.frame_stages.items(), key=lambda item: item[1], reverse=True)[:3]
+            self.overruns.append({"tick": getattr(game, "tick", None), "frame_ms": elapsed, "slowest": slowest})
+
+    def count_sprites(self, game):
+        """Counts the sprites in each of the game's groups.
+
+        Args:
+            game (Game): The game.
+        """
+        player = game.player.sprite
+        counts = {
+            "enemies": len(game.enemies),
+            "enemy_bullets": len(game.enemy_bullets),
+            "player_bullets": len(player.bullets) if player else 0,
+            "legendary": len(game.legendary),
+            "fortifications": len(game.blocks),
+        }
+        self.sprite_counts = counts
+        for key, value in counts.items():
+            if value > self.max_sprite_counts.get(key, 0):
+                self.max_sprite_counts[key] = value
+
+    def fps(self):
+        """Returns the frame rate over the recent frames.
+
+        Returns:
+            float: The number of frames per second.
+        """
+        if not self.intervals:
+            return 0.0
+        return 1000 * len(self.intervals) / sum(self.intervals)
+
+    def top_stages(self, count=5):
+        """Returns the stages with the highest recent mean time.
+
+        Args:
+            count (int, optional): The number of stages to return. Defaults to 5.
+
+        Returns:
+            list: (name, recent mean in milliseconds) pairs, slowest first.
+        """
+        means = [(name, stats.recent_mean()) for name, stats in self.stages.items()]
+        means.sort(key=lambda item: item[1], reverse=True)
+        return means[:count]
+
+    def report(self):
+        """Returns everything the profiler has recorded.
+
+        Returns:
+            dict: The frame, stage and sprite statistics and the recent budget overruns.
+        """
+        return {
+            "budget_ms": BUDGET_MS,
+            "fps": self.fps(),
+            "frames": self.frames.summary(),
+            "stages": {name: stats.summary() for name, stats in self.stages.items()},
+            "sprite_counts": self.sprite_counts,
+            "max_sprite_counts": self.max_sprite_counts,
+            "overruns": list(self.overruns),
+        }
+
+    def dump(self, path):
+        """Writes the report to a JSON file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        with open(path, "w") as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class PerformanceOverlay:
+    """Draws the profiler's FPS, frame-time graph and slowest stages on top of the game.
+
+    Attributes:
+        profiler (FrameProfiler): The profiler to display.
+        visible (bool): Whether the overlay is drawn.
+        font (pygame.font.Font): The font of the overlay text.
+        panel (pygame.Surface): The translucent background of the overlay.
+    """
+
+    def __init__(self, profiler, visible=False):
+        """Initializes the overlay.
+
+        Args:
+            profiler (FrameProfiler): The profiler to display.
+            visible (bool, optional): Whether the overlay starts visible. Defaults to False.
+        """
+        self.profiler = profiler
+        self.visible = visible
+        self.font = assets.font("Assets/Pixeled.ttf", 7)
+        self.panel = pygame.Surface((240, 190), pygame.SRCALPHA)
+        self.panel.fill((0, 0, 0, 170))
+
+    def toggle(self):
+        """Shows the overlay if it is hidden, and hides it if it is shown. [No Args]"""
+        self.visible = not self.visible
+
+    def draw(self, screen, position=(10, 40)):
+        """Draws the overlay, if it is visible.
+
+        Args:
+            screen (pygame.Surface): The surface to draw on.
+            position (tuple, optional): The top-left corner of the overlay. Defaults to (10, 40).
+        
+        Returns:
+            pygame.Rect: The area of the screen the overlay covers, or None if it is hidden.
+        """
+        if not self.visible:
+            return None
+        x, y = position
+        screen.blit(self.panel, position)
+        profiler = self.profiler
+        text = self.font.render(f"FPS {profiler.fps():5.1f}  frame {profiler.frames.recent_mean():5.2f} ms", False, "white")
+        screen.blit(text, (x + 6, y + 2))
+
+        #* Frame-time graph, with the budget marked by a red line
+        graph = pygame.Rect(x + 6, y + 30, 228, 60)
+        pygame.draw.rect(screen, (60, 60, 60), graph, 1)
+        scale = graph.height / (2 * BUDGET_MS)
+        budget_y = graph.bottom - BUDGET_MS * scale
+        pygame.draw.line(screen, "red", (graph.left, budget_y), (graph.right - 1, budget_y))
+        samples = list(profiler.frames.recent)[-graph.width:]
+        for index, sample in enumerate(samples):
+            height = min(graph.height, sample * scale)
+            colour = "green" if sample <= BUDGET_MS else "orange"
+            px = graph.left + index
+            pygame.draw.line(screen, colour, (px, graph.bottom - 1), (px, graph.bottom - 1 - height))
+
+        for index, (name, mean) in enumerate(profiler.top_stages(5)):
+            line = self.font.render(f"{name[:22]:22} {mean:6.3f} ms", False, "white")
+            screen.blit(line, (x + 6, graph.bottom + 4 + index * 17))
+        return self.panel.get_rect(topleft=position)
@@ -0,0 +1,174 @@
+"""This file contains the dirty-rectangle renderer used by the game loop in place of a full-screen fill and flip.
+
+Every frame, the renderer paints the background back over only the places where moving sprites (bullets, enemies, the
+legendary UFO and the player) were drawn last frame, redraws the scene in the same order as `Game.draw`, and returns the list
+of rectangles that actually changed so they can be pushed to the display with `pygame.display.update(rects)`. The fortifications
+and the score/health text are static most of the time, so they are only pushed when they change.
+
+While the game is being profiled, every drawing step is timed under the same stage name as in `Game.draw`.
+
+When the game runs on a fixed timestep (see the 'timestep' file), `remember` records where the moving sprites were before the
+last tick, and `render` draws them part of the way between there and where they are now.
+
+Usage:
+
+renderer = DirtyRenderer(screen, (30, 30, 30))
+while True:
+    renderer.remember(game)
+    game.step(actions)
+    pygame.display.update(renderer.render(game, alpha=timestep.alpha()))
+"""
+
+
+import pygame
+from SpaceInvaders import run_stage
+
+#* Sprites that moved further than this in one tick (e.g. a bullet recycled by the pool) are drawn where they are, not interpolated
+MAX_INTERPOLATED_DISTANCE = 32
+
+
+class DirtyRenderer:
+    """Draws a `Game` onto the screen and works out which parts of the screen changed.
+
+    Attributes:
+        screen (pygame.Surface): The display surface.
+        background (pygame.Surface): The image behind the game, the same size as the screen.
+        previous (list): The rectangles of the moving sprites and overlays drawn last frame.
+        hud_state (tuple): The (score, lives) the score/health text was last rendered for.
+        hud (list): The (surface, rect) pairs of the score/health text.
+        fortification_versions (dict): The `Fortification.version` of every fortification when it was last pushed.
+        full_redraw (bool): Whether the next frame repaints and pushes the whole screen.
+        positions (dict): The top-left corner of every moving sprite before the last tick, keyed on sprite.
+    """
+
+    def __init__(self, screen, background=(30, 30, 30)):
+        """Initializes the renderer.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            background (tuple/str/pygame.Surface, optional): The background colour or image. Defaults to (30, 30, 30).
+        """
+        self.screen = screen
+        if isinstance(background, pygame.Surface):
+            self.background = background
+        else:
+            self.background = pygame.Surface(screen.get_size())
+            self.background.fill(background)
+        self.invalidate()
+
+    def invalidate(self):
+        """Makes the next frame repaint and push the whole screen, e.g. after a menu was shown. [No Args]"""
+        self.previous = []
+        self.hud_state = None
+        self.hud = []
+        self.fortification_versions = {}
+        self.full_redraw = True
+        self.positions = {}
+
+    def remember(self, game):
+        """Records where the moving sprites are, before the game is stepped, so the next frame can be interpolated.
+
+        Args:
+            game (Game): The game that is about to be stepped.
+        """
+        positions = self.positions
+        positions.clear()
+        groups = [game.enemy_bullets, game.legendary, game.player, game.enemies]
+        if game.player.sprite:
+            groups.append(game.player.sprite.bullets)
+        for group in groups:
+            for sprite in group:
+                positions[sprite] = sprite.rect.topleft
+
+    def render(self, game, overlays=(), alpha=1.0):
+        """Draws one frame of the game and returns the rectangles that changed.
+
+        Args:
+            game (Game): The game to draw.
+            overlays (iterable, optional): Extra drawing functions, each taking the screen and returning the rect it drew
+                over (or None), e.g. `PerformanceOverlay.draw`. They are drawn on top of the game. Defaults to ().
+            alpha (float, optional): How far to draw the moving sprites between their remembered positions (0) and their
+                current ones (1). Defaults to 1.0 (no interpolation).
+
+        Returns:
+            list: The rectangles of the screen to push to the display.
+        """
+        screen = self.screen
+        background = self.background
+        dirty = []
+
+        if self.full_redraw:
+            screen.blit(background, (0, 0))
+            self.previous = []
+        else:
+            for rect in self.previous:
+                screen.blit(background, rect, rect)
+            dirty.extend(self.previous)
+
+        hud_state = (game.score, game.lives)
+        if hud_state != self.hud_state:
+            for _, rect in self.hud:
+                screen.blit(background, rect, rect)
+                dirty.append(rect)
+            self.hud = game.hud()
+            self.hud_state = hud_state
+            dirty.extend(rect for _, rect in self.hud)
+
+        for fort in game.blocks:
+            if self.fortification_versions.get(fort) != fort.version:
+                screen.blit(background, fort.rect, fort.rect)
+                dirty.append(fort.rect.copy())
+                self.fortification_versions[fort] = fort.version
+
+        #* Drawn in the same order as Game.draw, and timed under the same stage names
+        run = game.profiler.run if game.profiler is not None else run_stage
+        if alpha >= 1 or not self.positions:
+            alpha = None
+        moving = []
+        moving.extend(run("draw_enemy_bullets", self.draw_group, game.enemy_bullets, alpha))
+        moving.extend(run("draw_legendary", self.draw_group, game.legendary, alpha))
+        if game.player.sprite:
+            moving.extend(run("draw_player_bullets", self.draw_group, game.player.sprite.bullets, alpha))
+        moving.extend(run("draw_player", self.draw_group, game.player, alpha))
+        run("display_lives_score", screen.blits, self.hud)
+        run("draw_blocks", game.blocks.draw, screen)
+        moving.extend(run("draw_enemies", self.draw_group, game.enemies, alpha))
+        for overlay in overlays:
+            rect = overlay(screen)
+            if rect:
+                moving.append(rect)
+
+        dirty.extend(moving)
+        self.previous = moving
+        if self.full_redraw:
+            self.full_redraw = False
+            return [screen.get_rect()]
+        return dirty
+
+    def draw_group(self, group, alpha=None):
+        """Draws every sprite of a group.
+
+        Args:
+            group (pygame.sprite.AbstractGroup): The sprites to draw.
+            alpha (float, optional): How far to draw each sprite between its remembered and current position. Defaults to
+                None (draw every sprite at its current position).
+
+        Returns:
+            list: The on-screen rectangles that were drawn to.
+        """
+        if alpha is None:
+            return self.screen.blits([(sprite.image, sprite.rect) for sprite in group])
+        positions = self.positions
+        blits = []
+        for sprite in group:
+            rect = sprite.rect
+            previous = positions.get(sprite)
+            if previous is None:
+                blits.append((sprite.image, rect))
+                continue
+            dx, dy = rect.x - previous[0], rect.y - previous[1]
+            if abs(dx) > MAX_INTERPOLATED_DISTANCE or abs(dy) > MAX_INTERPOLATED_DISTANCE:
+                blits.append((sprite.image, rect))
+            else:
+                blits.append((sprite.image, (round(previous[0] + dx * alpha), round(previous[1] + dy * alpha))))
+        return self.screen.blits(blits)
@@ -0,0 +1,587 @@
+"""This file contains the input recorder and replayer used to rerun a game bit-exactly, and the seekable replay format.
+
+Every `Game` owns a seeded random number generator and counts its own ticks, so a game is fully determined by its starting
+level, score, lives and seed plus the player's input on every tick. The recorder stores exactly that, and the replayer feeds
+the stored input back into a fresh headless game.
+
+Input log format: one line of JSON (the header: starting state, seed and the recorded outcome) followed by one byte per tick,
+where bit 0 is left, bit 1 is right and bit 2 is shoot.
+
+Seekable format (written by `KeyframeRecorder`), for archiving matches and jumping around in them:
+- `REPLAY_HEADER`: the magic number b"HIRP", the format version, the keyframe interval, the number of ticks, the position of
+  the index and the length of the JSON header
+- the JSON header, as in the input log format
+- one chunk per keyframe: the `Game.snapshot` taken every `interval` ticks, followed by the input of the ticks up to the next
+  keyframe, both zlib-compressed. A keyframe is stored whole, or as an XOR delta against an earlier whole keyframe when that
+  is less than half the size
+- the index: one `INDEX_ENTRY` per chunk (its position, the compressed sizes of the snapshot and the input, the whole keyframe
+  it is a delta against or `FULL_KEYFRAME`, and the level, score and lives at the keyframe)
+
+Any tick is reached by restoring the keyframe before it (decoding at most one other keyframe) and replaying at most
+`interval - 1` ticks of input, so seeking costs the same whatever the length of the match. The per-tick deltas are the input bytes: the game is deterministic, so the
+state after each tick follows from the state before it and the input, and nothing else needs storing.
+
+Usage:
+
+game = Game(level=0, seed=1234)
+recorder = InputRecorder(game) # Or KeyframeRecorder(game) for the seekable format
+... # Play the game with game.update(screen) or game.step(actions)
+recorder.save("run.replay")
+
+outcome = Replayer("run.replay").run()
+game = ReplayFile("run.replay").seek(1800) # Seekable format only
+
+From the command line:
+
+py -3 replay.py record run.replay --level 2 --seed 7 --frames 3000
+py -3 replay.py verify run.replay
+py -3 replay.py inspect run.replay
+py -3 replay.py seek run.replay 1800
+py -3 replay.py play run.replay --speed 4
+"""
+
+
+import argparse
+import json
+import random
+import struct
+import sys
+import time
+import zlib
+import pygame
+from SpaceInvaders import FPS, SNAPSHOT_RNG_SIZE, Game, Actions, init_headless
+from renderer import DirtyRenderer
+
+LEFT, RIGHT, SHOOT = 1, 2, 4
+REPLAY_MAGIC = b"HIRP"
+REPLAY_VERSION = 2
+REPLAY_HEADER = struct.Struct("<4sBIIQI") #* magic, version, keyframe interval, ticks, index position, JSON header length
+INDEX_ENTRY = struct.Struct("<QIIIiqi") #* chunk position, snapshot size, input size, reference chunk, level, score, lives
+FULL_KEYFRAME = 0xFFFFFFFF #* The reference chunk of a keyframe that is stored whole
+KEYFRAME_INTERVAL = 120 #* 2 seconds of game time
+
+
+def encode_actions(actions):
+    """Packs the player's input for one tick into a byte.
+
+    Args:
+        actions (Actions): The player's input.
+
+    Returns:
+        int: The packed input, between 0 and 7.
+    """
+    return (LEFT if actions.left else 0) | (RIGHT if actions.right else 0) | (SHOOT if actions.shoot else 0)
+
+
+def decode_actions(byte):
+    """Unpacks the player's input for one tick from a byte.
+
+    Args:
+        byte (int): The packed input.
+
+    Returns:
+        Actions: The player's input.
+    """
+    return Actions(bool(byte & LEFT), bool(byte & RIGHT), bool(byte & SHOOT))
+
+
+def xor_delta(data, base):
+    """XORs a snapshot with a base snapshot, cut or zero-padded to the snapshot's length.
+
+    XORing the result with the same base gives the snapshot back.
+
+    Args:
+        data (bytes): The snapshot (or the delta).
+        base (bytes): The base snapshot, or b"" for none.
+
+    Returns:
+        bytes: The delta (or the snapshot).
+    """
+    size = len(data)
+    base = base[:size].ljust(size, b"\0")
+    return (int.from_bytes(data, "little") ^ int.from_bytes(base, "little")).to_bytes(size, "little")
+
+
+def keyframe_delta(snapshot, reference):
+    """XORs a snapshot with a reference snapshot, lining up the random number generator states at their ends.
+
+    The state of the random number generator only changes completely every 624 draws, so it XORs to almost nothing against a
+    recent reference even when the enemies and bullets before it have changed in number. Applying the delta to the same
+    reference gives the snapshot back.
+
+    Args:
+        snapshot (bytes): The snapshot (or the delta).
+        reference (bytes): The reference snapshot.
+
+    Returns:
+        bytes: The delta (or the snapshot).
+    """
+    split = len(snapshot) - SNAPSHOT_RNG_SIZE
+    reference_split = len(reference) - SNAPSHOT_RNG_SIZE
+    return xor_delta(snapshot[:split], reference[:reference_split]) + xor_delta(snapshot[split:], reference[reference_split:])
+
+
+def outcome(game):
+    """Returns the parts of a game's state that a replay must reproduce.
+
+    Args:
+        game (Game): The game.
+
+    Returns:
+        dict: The tick, level, score, lives and game over flag.
+    """
+    return {"tick": game.tick, "level": game.level, "score": game.score, "lives": game.lives, "game_over": game.game_over}
+
+
+class InputRecorder:
+    """Records the input of every tick a game is stepped.
+
+    The recorder attaches itself to the game, so the input is captured whether the game is driven by `Game.update` (the keyboard)
+    or by `Game.step`.
+
+    Attributes:
+        game (Game): The game being recorded.
+        header (dict): The starting level, score, lives and seed of the game.
+        inputs (bytearray): The packed input of every recorded tick.
+    """
+
+    def __init__(self, game):
+        """Initializes the recorder and attaches it to a game that has not been stepped yet.
+
+        Args:
+            game (Game): The game to record.
+        """
+        self.game = game
+        self.header = {"version": 2, "level": game.level, "score": game.score, "lives": game.lives, "seed": game.seed}
+        self.inputs = bytearray()
+        game.recorder = self
+
+    def record(self, actions):
+        """Stores the input of one tick. Called by `Game.step`.
+
+        Args:
+            actions (Actions): The player's input for the tick.
+        """
+        self.inputs.append(encode_actions(actions))
+
+    def save(self, path):
+        """Writes the recording, along with the game's current outcome, to a file.
+
+        Args:
+            path (str): The path of the replay file.
+        """
+        header = dict(self.header, outcome=outcome(self.game))
+        with open(path, "wb") as file:
+            file.write(json.dumps(header).encode() + b"\n")
+            file.write(self.inputs)
+
+
+class KeyframeRecorder(InputRecorder):
+    """Records the input of every tick along with a snapshot of the game every `interval` ticks, for the seekable format.
+
+    Attributes:
+        interval (int): The number of ticks between two keyframes.
+        keyframes (list): The snapshot of the game at every keyframe, the first one taken before the first tick.
+        scores (list): The (level, score, lives) of the game at every keyframe.
+    """
+
+    def __init__(self, game, interval=KEYFRAME_INTERVAL):
+        """Initializes the recorder, attaches it to a game that has not been stepped yet and takes the first keyframe.
+
+        Args:
+            game (Game): The game to record.
+            interval (int, optional): The number of ticks between two keyframes. Defaults to `KEYFRAME_INTERVAL`.
+        """
+        super().__init__(game)
+        self.interval = interval
+        self.keyframes = []
+        self.scores = []
+        self.keyframe()
+
+    def keyframe(self):
+        """Takes a snapshot of the game as it is now. [No Args]"""
+        game = self.game
+        self.keyframes.append(game.snapshot())
+        self.scores.append((game.level, game.score, game.lives))
+
+    def record(self, actions):
+        """Stores the input of one tick, taking a keyframe first if one is due. Called by `Game.step` before the tick.
+
+        Args:
+            actions (Actions): The player's input for the tick.
+        """
+        if self.inputs and len(self.inputs) % self.interval == 0:
+            self.keyframe()
+        super().record(actions)
+
+    def save(self, path):
+        """Writes the recording in the seekable format, along with the game's current outcome.
+
+        Args:
+            path (str): The path of the replay file.
+        """
+        header = json.dumps(dict(self.header, outcome=outcome(self.game))).encode()
+        chunks = []
+        index = []
+        position = REPLAY_HEADER.size + len(header)
+        reference = None
+        for number, (snapshot, (level, score, lives)) in enumerate(zip(self.keyframes, self.scores)):
+            start = number * self.interval
+            keyframe = zlib.compress(snapshot, 9)
+            #* Most of a snapshot is the random number generator state, so a keyframe is usually far smaller as a delta
+            base = FULL_KEYFRAME
+            if reference is not None:
+                delta = zlib.compress(keyframe_delta(snapshot, self.keyframes[reference]), 9)
+                if len(delta) * 2 < len(keyframe):
+                    keyframe, base = delta, reference
+            if base == FULL_KEYFRAME:
+                reference = number
+            inputs = zlib.compress(bytes(self.inputs[start:start + self.interval]), 9)
+            index.append(INDEX_ENTRY.pack(position, len(keyframe), len(inputs), base, level, score, lives))
+            chunks.extend((keyframe, inputs))
+            position += len(keyframe) + len(inputs)
+        with open(path, "wb") as file:
+            file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.interval, len(self.inputs), position, len(header)))
+            file.write(header)
+            file.writelines(chunks)
+            file.writelines(index)
+
+
+def load_replay(path):
+    """Reads a replay file of either format.
+
+    Args:
+        path (str): The path of the replay file.
+
+    Returns:
+        tuple (dict, bytes): The header and the packed input of every tick.
+    """
+    with open(path, "rb") as file:
+        if file.read(len(REPLAY_MAGIC)) == REPLAY_MAGIC:
+            replay = ReplayFile(path)
+            return replay.header, replay.inputs(0, replay.ticks)
+        file.seek(0)
+        header = json.loads(file.readline())
+        inputs = file.read()
+    return header, inputs
+
+
+class Replayer:
+    """Drives a headless game from a recorded input stream.
+
+    Attributes:
+        header (dict): The header of the replay.
+        inputs (bytes): The packed input of every recorded tick.
+    """
+
+    def __init__(self, path):
+        """Loads a replay file.
+
+        Args:
+            path (str): The path of the replay file.
+        """
+        self.header, self.inputs = load_replay(path)
+
+    def new_game(self):
+        """Returns a headless game in the recorded starting state.
+
+        Returns:
+            Game: The game, ready to be stepped.
+        """
+        return Game(level=self.header["level"], score=self.header["score"], lives=self.header["lives"], headless=True, seed=self.header["seed"])
+
+    def run(self, game=None):
+        """Replays every recorded tick.
+
+        Args:
+            game (Game, optional): The game to drive. Defaults to None (a fresh headless game is created).
+
+        Returns:
+            dict: The outcome of the replayed game.
+        """
+        game = game or self.new_game()
+        for byte in self.inputs:
+            game.step(decode_actions(byte))
+        return outcome(game)
+
+    def verify(self):
+        """Replays the recording and checks the outcome matches the recorded one.
+
+        Returns:
+            bool: True if the replay reproduced the recorded outcome exactly.
+        """
+        return self.run() == self.header["outcome"]
+
+
+class ReplayFile:
+    """A replay in the seekable format, which can be played from any tick.
+
+    The whole file is read into memory (a long match is a few hundred KB); the chunks are only decompressed when they are
+    used, and the last few stay cached.
+
+    Attributes:
+        path (str): The path of the replay file.
+        data (bytes): The contents of the file.
+        header (dict): The JSON header: starting level, score, lives and seed, and the recorded outcome.
+        interval (int): The number of ticks between two keyframes.
+        ticks (int): The number of ticks recorded.
+        index (list): The (position, snapshot size, input size, reference chunk, level, score, lives) of every chunk.
+        chunks (dict): The decompressed (snapshot, input) of the chunks used most recently, keyed on chunk number.
+    """
+
+    def __init__(self, path):
+        """Reads a replay file.
+
+        Args:
+            path (str): The path of the replay file.
+
+        Raises:
+            ValueError: If the file is not a seekable replay of this version.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = file.read()
+        magic, version, self.interval, self.ticks, index_position, header_size = REPLAY_HEADER.unpack_from(self.data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} seekable replay")
+        self.header = json.loads(self.data[REPLAY_HEADER.size:REPLAY_HEADER.size + header_size])
+        self.index = list(INDEX_ENTRY.iter_unpack(self.data[index_position:]))
+        self.chunks = {}
+
+    def chunk(self, number):
+        """Returns the keyframe snapshot and the input of one chunk.
+
+        Args:
+            number (int): The number of the chunk (the tick of its keyframe divided by `interval`).
+
+        Returns:
+            tuple (bytes, bytes): The snapshot and the packed input of the chunk's ticks. A keyframe stored as a delta is
+            rebuilt from the whole keyframe it references, so no more than two keyframes are ever decoded.
+        """
+        chunk = self.chunks.get(number)
+        if chunk is None:
+            position, snapshot_size, inputs_size, reference = self.index[number][:4]
+            snapshot = zlib.decompress(self.data[position:position + snapshot_size])
+            if reference != FULL_KEYFRAME:
+                snapshot = keyframe_delta(snapshot, self.chunk(reference)[0])
+            position += snapshot_size
+            inputs = zlib.decompress(self.data[position:position + inputs_size])
+            if len(self.chunks) >= 4:
+                self.chunks.pop(next(iter(self.chunks)))
+            chunk = self.chunks[number] = (snapshot, inputs)
+        return chunk
+
+    def inputs(self, start, end):
+        """Returns the packed input of a range of ticks.
+
+        Args:
+            start (int): The first tick.
+            end (int): The tick after the last one.
+
+        Returns:
+            bytes: The input, one byte per tick.
+        """
+        parts = []
+        while start < end:
+            number, offset = divmod(start, self.interval)
+            inputs = self.chunk(number)[1][offset:offset + end - start]
+            if not inputs:
+                break
+            parts.append(inputs)
+            start += len(inputs)
+        return b"".join(parts)
+
+    def new_game(self):
+        """Returns a headless game in the recorded starting state.
+
+        Returns:
+            Game: The game.
+        """
+        header = self.header
+        return Game(level=header["level"], score=header["score"], lives=header["lives"], headless=True, seed=header["seed"])
+
+    def seek(self, tick, game=None):
+        """Puts a game into the state it was in at a tick: the keyframe before the tick is restored and the input up to the
+        tick is replayed.
+
+        Args:
+            tick (int): The tick, from 0 to `ticks`.
+            game (Game, optional): The game to use. Defaults to None (a new headless game).
+
+        Returns:
+            Game: The game, at the tick.
+        """
+        tick = max(0, min(tick, self.ticks))
+        game = game or self.new_game()
+        number = min(tick // self.interval, len(self.index) - 1)
+        game.restore(self.chunk(number)[0])
+        self.play(game, number * self.interval, tick)
+        return game
+
+    def play(self, game, start, end):
+        """Steps a game through the recorded input of a range of ticks, without drawing it.
+
+        Args:
+            game (Game): The game, at tick `start`.
+            start (int): The first tick.
+            end (int): The tick after the last one.
+        """
+        for byte in self.inputs(start, end):
+            game.step(decode_actions(byte))
+
+    def score_curve(self):
+        """Returns the level, score and lives at every keyframe, straight from the index.
+
+        Returns:
+            list: The (tick, level, score, lives) of every keyframe.
+        """
+        return [(number * self.interval, level, score, lives) for number, (*_, level, score, lives) in enumerate(self.index)]
+
+    def sizes(self):
+        """Returns how the file's bytes are split between its parts.
+
+        Returns:
+            dict: The bytes taken by the headers, the keyframes, the input and the index, and the whole file.
+        """
+        keyframes = sum(entry[1] for entry in self.index)
+        inputs = sum(entry[2] for entry in self.index)
+        index = len(self.index) * INDEX_ENTRY.size
+        return {"header": len(self.data) - keyframes - inputs - index, "keyframes": keyframes, "inputs": inputs, "index": index,
+                "total": len(self.data)}
+
+
+def play(path, speed=1.0, start=0):
+    """Plays a seekable replay in a window.
+
+    Left and right seek 10 seconds back and forward, up and down double and halve the speed, and space pauses. When the speed
+    is above 1, the ticks between two drawn frames are simulated without being drawn.
+
+    Args:
+        path (str): The path of the replay file.
+        speed (float, optional): The playback speed. Defaults to 1.0.
+        start (int, optional): The tick to start at. Defaults to 0.
+    """
+    replay = ReplayFile(path)
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((720, 720))
+    renderer = DirtyRenderer(screen, (30, 30, 30))
+    game = replay.seek(start)
+    tick = min(max(start, 0), replay.ticks)
+    clock = pygame.time.Clock()
+    paused = False
+    owed = 0.0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    tick = max(0, min(replay.ticks, tick + (10 if event.key == pygame.K_RIGHT else -10) * FPS))
+                    game = replay.seek(tick, game)
+                    renderer.invalidate()
+                elif event.key == pygame.K_UP:
+                    speed *= 2
+                elif event.key == pygame.K_DOWN:
+                    speed /= 2
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+        if not paused:
+            owed += speed
+            ticks = min(int(owed), replay.ticks - tick)
+            owed -= int(owed)
+            replay.play(game, tick, tick + ticks)
+            tick += ticks
+        pygame.display.set_caption(f"Replay {tick // FPS // 60}:{tick // FPS % 60:02} / {replay.ticks // FPS // 60}:"
+                                   f"{replay.ticks // FPS % 60:02}  x{speed:g}" + ("  (paused)" if paused else ""))
+        rects = renderer.render(game)
+        if rects:
+            pygame.display.update(rects)
+        clock.tick(FPS)
+    pygame.quit()
+
+
+def random_player(rng):
+    """Returns random input, holding each movement direction for a while like a person would.
+
+    Args:
+        rng (random.Random): The random number generator to use.
+
+    Returns:
+        Actions: The player's input for one tick.
+    """
+    move = rng.choice(["left", "right", None])
+    return Actions(move == "left", move == "right", rng.random() < 0.3)
+
+
+def main(argv=None):
+    """The command-line entry point. Run `py -3 replay.py --help` for the options."""
+    parser = argparse.ArgumentParser(description="Record, verify, inspect and play Space Invaders replays.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="Record a headless game played by a random player.")
+    record.add_argument("path")
+    record.add_argument("--level", type=int, default=0)
+    record.add_argument("--seed", type=int, default=0)
+    record.add_argument("--frames", type=int, default=3600)
+    record.add_argument("--keyframe-interval", type=int, default=KEYFRAME_INTERVAL,
+                        help=f"The ticks between two keyframes of the seekable format. Defaults to {KEYFRAME_INTERVAL}.")
+    record.add_argument("--inputs-only", action="store_true", help="Write the plain input log instead of the seekable format.")
+    verify = commands.add_parser("verify", help="Replay a recording and check it reproduces the same outcome.")
+    verify.add_argument("path")
+    inspect = commands.add_parser("inspect", help="Show the size, length and score curve of a seekable replay.")
+    inspect.add_argument("path")
+    seek = commands.add_parser("seek", help="Jump to a tick of a seekable replay and show the state there.")
+    seek.add_argument("path")
+    seek.add_argument("tick", type=int)
+    play_parser = commands.add_parser("play", help="Play a seekable replay in a window.")
+    play_parser.add_argument("path")
+    play_parser.add_argument("--speed", type=float, default=1.0, help="The playback speed. Defaults to 1.")
+    play_parser.add_argument("--start", type=int, default=0, help="The tick to start at. Defaults to 0.")
+    args = parser.parse_args(argv)
+
+    if args.command == "play":
+        play(args.path, args.speed, args.start)
+        return 0
+    init_headless()
+    if args.command == "record":
+        game = Game(level=args.level, headless=True, seed=args.seed)
+        recorder = InputRecorder(game) if args.inputs_only else KeyframeRecorder(game, args.keyframe_interval)
+        player_rng = random.Random(args.seed)
+        actions = random_player(player_rng)
+        while game.game_over == 0 and game.tick < args.frames:
+            if game.tick % 15 == 0:
+                actions = random_player(player_rng)
+            game.step(actions)
+        recorder.save(args.path)
+        print(json.dumps(outcome(game)))
+    elif args.command == "inspect":
+        replay = ReplayFile(args.path)
+        sizes = replay.sizes()
+        print(f"{args.path}: {sizes['total'] / 1024:.1f} KB, {replay.ticks} ticks ({replay.ticks / FPS:.1f} s), "
+              f"{len(replay.index)} keyframes every {replay.interval} ticks")
+        print(f"bytes: header {sizes['header']}, keyframes {sizes['keyframes']}, input {sizes['inputs']}, index {sizes['index']}")
+        print(f"start: {json.dumps({key: replay.header[key] for key in ('level', 'score', 'lives', 'seed')})}")
+        print(f"outcome: {json.dumps(replay.header['outcome'])}")
+        print("    tick   time  level   score  lives")
+        for tick, level, score, lives in replay.score_curve():
+            print(f"{tick:8} {tick / FPS:6.1f} {level:6} {score:7} {lives:6}")
+    elif args.command == "seek":
+        replay = ReplayFile(args.path)
+        start = time.perf_counter()
+        game = replay.seek(args.tick)
+        print(json.dumps(outcome(game)))
+        print(f"sought in {(time.perf_counter() - start) * 1000:.2f} ms")
+    else:
+        replayer = Replayer(args.path)
+        result = replayer.run()
+        print(json.dumps(result))
+        if result != replayer.header["outcome"]:
+            print("MISMATCH: recorded " + json.dumps(replayer.header["outcome"]))
+            return 1
+        print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
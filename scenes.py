@@ -0,0 +1,665 @@
+"""This file contains the scenes of the game (main menu, playing, victory and defeat) and the scene manager that runs them.
+
+The scene manager owns the one and only game loop. Each frame it hands the events to the current scene, updates it, draws it
+and pushes it to the display. Scenes never call each other; they ask the manager to switch to another scene, and the manager
+calls `exit` on the old scene (which releases its resources) and `enter` on the new one. However long a session runs, the
+call stack stays the same depth and only the current scene is kept alive.
+
+Usage:
+
+manager = SceneManager(screen)
+manager.run(MainMenuScene(manager))
+
+Menus are event-driven: instead of polling the mouse and redrawing as fast as possible, the manager blocks until an input
+event arrives (or a timeout passes), the menu only redraws when the button under the mouse changes, and the menu frame rate is
+capped at `SceneManager.menu_fps`. While playing, the game is simulated at a fixed tick rate whatever the render rate (see the
+'timestep' file), and the frames are drawn interpolated between the last two ticks.
+
+To check that memory stays flat over a long session, or to measure the CPU used while idling on the main menu, run:
+
+py -3 scenes.py --soak 500
+py -3 scenes.py --measure-idle 10
+"""
+
+
+import os
+import struct
+import sys
+import time
+import tracemalloc
+import pygame
+from SpaceInvaders import FPS, Game, Actions, init_headless
+from button import Button
+from assets import assets
+from audio import audio
+from preload import Preloader
+from renderer import DirtyRenderer
+from timestep import FixedTimestep
+
+QUICKSAVE_PATH = "quicksave.bin"
+
+
+class Session:
+    """The progress carried between levels.
+
+    Attributes:
+        level (int): The level to play next.
+        score (int): The player's score.
+        last_score (int): The score at the end of the last level won.
+        lives (int): The player's lives.
+    """
+
+    def __init__(self):
+        """Initializes a new session at level 0. [No Args]"""
+        self.level, self.score, self.last_score, self.lives = 0, 0, 0, 1
+
+
+class Scene:
+    """The base class of every scene.
+
+    Attributes:
+        manager (SceneManager): The manager running the scene.
+        idle (bool): Whether the scene only changes on input, so the manager can block until an event arrives.
+    """
+
+    idle = False
+
+    def __init__(self, manager):
+        """Initializes the scene.
+
+        Args:
+            manager (SceneManager): The manager running the scene.
+        """
+        self.manager = manager
+
+    def enter(self):
+        """Called when the scene becomes the current scene. Loads whatever the scene needs."""
+
+    def exit(self):
+        """Called when the scene stops being the current scene. Releases whatever the scene loaded."""
+
+    def handle_event(self, event):
+        """Handles one input event.
+
+        Args:
+            event (pygame.event.Event): The event.
+        """
+
+    def update(self):
+        """Advances the scene by one frame."""
+
+    def draw(self, screen):
+        """Draws the scene.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+
+        Returns:
+            list: The rectangles of the screen that changed (empty if nothing did), or None to push the whole screen.
+        """
+        return None
+
+
+class MenuScene(Scene):
+    """A menu with a title, some extra lines of text, a primary button and a QUIT button.
+
+    Subclasses set the texts and override `activate`, which is called when the primary button is clicked. The menu is only
+    redrawn when it is first shown and when the mouse moves onto or off a button.
+
+    Attributes:
+        texts (list): The (surface, rect) pairs of the title and extra text.
+        buttons (list): The primary button and the QUIT button.
+        hovered (Button): The button under the mouse, or None.
+        redraw (str): "full" if the whole menu must be drawn next frame, "buttons" if only the buttons must, or None.
+    """
+
+    idle = True
+
+    def __init__(self, manager):
+        """Initializes the menu.
+
+        Args:
+            manager (SceneManager): The manager running the scene.
+        """
+        super().__init__(manager)
+        self.texts = []
+        self.buttons = []
+        self.hovered = None
+        self.redraw = "full"
+
+    def build(self, lines, button_text, button_y, quit_y):
+        """Renders the menu's text and creates its buttons.
+
+        Args:
+            lines (list): The (text, colour, y-coordinate) of every line of text; the first one is the title.
+            button_text (str): The text of the primary button.
+            button_y (int): The y-coordinate of the primary button.
+            quit_y (int): The y-coordinate of the QUIT button.
+        """
+        font = assets.font("Assets/Pixeled.ttf", 40)
+        font2 = assets.font("Assets/Pixeled.ttf", 20)
+        self.texts = []
+        for text, colour, y in lines:
+            surface = assets.text(font, text, False, colour)
+            self.texts.append((surface, surface.get_rect(center=(360, y))))
+        self.buttons = [
+            Button(image=None, pos=(360, button_y), text_input=button_text, font=font2, base_color="lightgreen", hovering_color="White"),
+            Button(image=None, pos=(360, quit_y), text_input="QUIT", font=font2, base_color="lightgreen", hovering_color="red"),
+        ]
+        self.hovered = self.button_at(pygame.mouse.get_pos())
+        self.redraw = "full"
+
+    def exit(self):
+        """Drops the menu's text and buttons."""
+        self.texts = []
+        self.buttons = []
+        self.hovered = None
+
+    def button_at(self, position):
+        """Returns the button at a position.
+
+        Args:
+            position (tuple): The (x, y) position, e.g. of the mouse.
+
+        Returns:
+            Button: The button, or None if there is no button there.
+        """
+        for button in self.buttons:
+            if button.checkForInput(position):
+                return button
+        return None
+
+    def handle_event(self, event):
+        """Clicks on the primary button call `activate`, and clicks on QUIT stop the game. Moving the mouse onto or off a
+        button marks the buttons for redrawing.
+
+        Args:
+            event (pygame.event.Event): The event.
+        """
+        if event.type == pygame.MOUSEMOTION:
+            hovered = self.button_at(event.pos)
+            if hovered is not self.hovered:
+                self.hovered = hovered
+                self.redraw = self.redraw or "buttons"
+        elif event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            self.redraw = "full"
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            play_button, quit_button = self.buttons
+            if play_button.checkForInput(event.pos):
+                self.activate()
+            elif quit_button.checkForInput(event.pos):
+                self.manager.quit()
+
+    def activate(self):
+        """Called when the primary button is clicked."""
+
+    def draw(self, screen):
+        """Draws whatever changed since the last frame, highlighting the button under the mouse.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+
+        Returns:
+            list: The rectangles of the buttons if only they changed, an empty list if nothing did, or None for a full redraw.
+        """
+        redraw = self.redraw
+        if redraw is None:
+            return []
+        self.redraw = None
+        if redraw == "full":
+            for surface, rect in self.texts:
+                screen.blit(surface, rect)
+        for button in self.buttons:
+            if button is self.hovered:
+                button.text = button.hovering_text
+            else:
+                button.text = button.base_text
+            button.update(screen)
+        if redraw == "full":
+            return None
+        return [button.rect for button in self.buttons]
+
+
+class MainMenuScene(MenuScene):
+    """The main menu, with PLAY and QUIT buttons."""
+
+    def enter(self):
+        """Builds the menu and starts preloading the first level."""
+        self.build([("MAIN MENU", "white", 100)], "PLAY", 300, 500)
+        self.manager.preload()
+
+    def activate(self):
+        """Starts playing."""
+        self.manager.switch(PlayScene(self.manager))
+
+
+class VictoryScene(MenuScene):
+    """The screen shown after a level is won, with CONTINUE and QUIT buttons."""
+
+    def enter(self):
+        """Builds the menu and starts preparing the next level."""
+        self.build([("Level " + str(self.manager.session.level) + " Complete!", "green", 100)], "CONTINUE", 300, 500)
+        self.manager.preload()
+
+    def activate(self):
+        """Starts the next level."""
+        self.manager.switch(PlayScene(self.manager))
+
+
+class DefeatScene(MenuScene):
+    """The screen shown after a level is lost, with PLAY AGAIN? and QUIT buttons.
+
+    Attributes:
+        level (int): The level that was lost.
+        score (int): The final score.
+    """
+
+    def __init__(self, manager, level, score):
+        """Initializes the defeat screen.
+
+        Args:
+            manager (SceneManager): The manager running the scene.
+            level (int): The level that was lost.
+            score (int): The final score.
+        """
+        super().__init__(manager)
+        self.level = level
+        self.score = score
+
+    def enter(self):
+        """Builds the menu and starts preparing level 0."""
+        self.build([("Level " + str(self.level+1) + " Failed!", "red", 100), (f"Score: {self.score}", "white", 200)], "PLAY AGAIN?", 450, 550)
+        self.manager.preload()
+
+    def activate(self):
+        """Starts again from level 0."""
+        self.manager.switch(PlayScene(self.manager))
+
+
+class PlayScene(Scene):
+    """Plays one level of the game.
+
+    The manager keeps one `Game` for the whole session; each play scene resets it to the session's level instead of building
+    a new one, so the font, spaceship, fortifications and sprite groups are reused.
+
+    Attributes:
+        game (Game): The game being played, while the scene is current.
+    """
+
+    def __init__(self, manager):
+        """Initializes the scene.
+
+        Args:
+            manager (SceneManager): The manager running the scene.
+        """
+        super().__init__(manager)
+        self.game = None
+
+    def enter(self):
+        """Starts the session's current level, creating the game the first time. The level is played with the seed it was
+        prepared with by the preloader, so its formation is already cached."""
+        manager = self.manager
+        session = manager.session
+        seed = manager.preloader.finish(session.level) if manager.preloader else None
+        if manager.game is None:
+            manager.game = Game(level=session.level, score=session.score, lives=session.lives, headless=manager.headless, seed=seed)
+        else:
+            manager.game.reset(session.level, session.score, session.lives, seed)
+        self.game = manager.game
+        self.game.profiler = manager.profiler
+        self.manager.renderer.invalidate()
+        if self.manager.timestep:
+            self.manager.timestep.reset()
+
+    def exit(self):
+        """Stops the music and lets go of the game, which the manager keeps for the next level."""
+        audio.stop_music()
+        self.game = None
+
+    def handle_event(self, event):
+        """Handles the quick save keys (F5 saves a snapshot of the game to quicksave.bin and F9 loads it) and the profiler
+        keys (F3 toggles the overlay and F4 dumps the profiling data to profile.json). A quick save that cannot be loaded
+        (from an older version of the game, or damaged) is reported and the game carries on as it was.
+
+        Args:
+            event (pygame.event.Event): The event.
+        """
+        manager = self.manager
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+            with open(QUICKSAVE_PATH, "wb") as file:
+                file.write(self.game.snapshot())
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F9 and os.path.exists(QUICKSAVE_PATH):
+            with open(QUICKSAVE_PATH, "rb") as file:
+                blob = file.read()
+            #* A snapshot can fail part of the way through restoring, so the game is put back the way it was
+            backup = self.game.snapshot()
+            try:
+                self.game.restore(blob)
+            except (ValueError, struct.error) as error:
+                self.game.restore(backup)
+                print(f"Could not load {QUICKSAVE_PATH}: {error}", file=sys.stderr)
+            manager.renderer.invalidate()
+        elif manager.profiler and event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_F3:
+                manager.overlay.toggle()
+            elif event.key == pygame.K_F4:
+                manager.profiler.dump("profile.json")
+
+    def update(self):
+        """Steps the game with the keyboard input as many ticks as the real time that passed calls for, and moves on to the
+        victory or defeat screen once the level is over."""
+        game = self.game
+        manager = self.manager
+        ticks = manager.timestep.advance() if manager.timestep else 1
+        actions = manager.read_actions()
+        for index in range(ticks):
+            if game.game_over != 0:
+                break
+            if manager.interpolate and index == ticks - 1:
+                manager.renderer.remember(game)
+            game.step(actions)
+        level, score, lives = game.result()
+        session = self.manager.session
+        if lives == -1:
+            session.level, session.score, session.lives = 0, 0, 1
+            self.manager.switch(DefeatScene(self.manager, level, score))
+        elif level is not None:
+            session.level, session.score, session.lives = level, score, lives
+            if score > session.last_score:
+                session.last_score = score
+            self.manager.switch(VictoryScene(self.manager))
+
+    def draw(self, screen):
+        """Draws the parts of the game that changed.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+
+        Returns:
+            list: The rectangles of the screen that changed.
+        """
+        manager = self.manager
+        overlays = [manager.overlay.draw] if manager.overlay else []
+        alpha = manager.timestep.alpha() if manager.timestep and manager.interpolate else 1.0
+        return manager.renderer.render(self.game, overlays, alpha)
+
+
+class SceneManager:
+    """Runs the game loop and switches between scenes.
+
+    Attributes:
+        screen (pygame.Surface): The display surface.
+        clock (pygame.time.Clock): The clock used to cap the frame rate.
+        session (Session): The progress carried between levels.
+        renderer (DirtyRenderer): The renderer used by the play scene.
+        profiler (FrameProfiler): The profiler, or None when profiling is off.
+        overlay (PerformanceOverlay): The profiler overlay, or None when profiling is off.
+        headless (bool): Whether games are created headless (no music), e.g. for soak tests.
+        game (Game): The game, created by the first play scene and reset for every level after that.
+        render_fps (int): The frame cap while playing, or 0 for no cap. The game itself always runs at `FPS` ticks per second.
+        menu_fps (int): The frame cap of idle scenes (the menus), or 0 for no cap.
+        idle_timeout (int): The longest an idle scene waits for an input event before running a frame anyway, in milliseconds.
+        timestep (FixedTimestep): The clock that decides how many ticks to run each frame, or None for one tick per frame.
+        interpolate (bool): Whether the game is drawn interpolated between the last two ticks.
+        preloader (Preloader): The preloader that gets the next level ready while a menu is shown, or None to load
+            everything when the level starts.
+        scene (Scene): The current scene.
+        running (bool): Whether the loop keeps running.
+        transitions (int): The number of scene switches so far.
+    """
+
+    def __init__(self, screen, profiler=None, overlay=None, headless=False, menu_fps=30, idle_timeout=500, render_fps=FPS,
+                 interpolate=True, max_frame_skip=5, preload=True):
+        """Initializes the scene manager.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            profiler (FrameProfiler, optional): The profiler. Defaults to None.
+            overlay (PerformanceOverlay, optional): The profiler overlay. Defaults to None.
+            headless (bool, optional): Whether games are created headless. Defaults to False.
+            menu_fps (int, optional): The frame cap of the menus. Defaults to 30.
+            idle_timeout (int, optional): The longest the menus wait for an event, in milliseconds. Defaults to 500.
+            render_fps (int, optional): The frame cap while playing, or 0 for no cap. Defaults to `FPS`.
+            interpolate (bool, optional): Whether the game is drawn interpolated between ticks. Defaults to True.
+            max_frame_skip (int, optional): The most ticks run between two rendered frames when the game falls behind.
+                Defaults to 5.
+            preload (bool, optional): Whether to prepare the next level in the background while a menu is shown. Defaults to True.
+        """
+        self.screen = screen
+        self.clock = pygame.time.Clock()
+        self.session = Session()
+        self.renderer = DirtyRenderer(screen, (30,30,30))
+        self.profiler = profiler
+        self.overlay = overlay
+        self.headless = headless
+        self.game = None
+        self.menu_fps = menu_fps
+        self.idle_timeout = idle_timeout
+        self.render_fps = render_fps
+        self.timestep = FixedTimestep(FPS, max_frame_skip)
+        self.interpolate = interpolate
+        self.preloader = Preloader() if preload else None
+        self.scene = None
+        self.running = False
+        self.transitions = 0
+
+    def switch(self, scene):
+        """Makes another scene the current scene, calling `exit` on the old one and `enter` on the new one.
+
+        Args:
+            scene (Scene): The new scene.
+        """
+        if self.scene is not None:
+            self.scene.exit()
+        self.scene = scene
+        self.transitions += 1
+        scene.enter()
+
+    def preload(self):
+        """Starts decoding the assets and preparing the session's next level in the background. [No Args]"""
+        if self.preloader:
+            self.preloader.preload_assets()
+            self.preloader.prepare_level(self.session.level, self.game)
+
+    def quit(self):
+        """Stops the game loop after the current frame. [No Args]"""
+        self.running = False
+
+    def read_actions(self):
+        """Returns the player's input from the keyboard.
+
+        Returns:
+            Actions: The keys held down.
+        """
+        return Actions.from_keys(pygame.key.get_pressed())
+
+    def events(self, scene):
+        """Returns the pending input events. Idle scenes sleep until an event arrives or `idle_timeout` passes.
+
+        Args:
+            scene (Scene): The current scene.
+
+        Returns:
+            list: The events.
+        """
+        if not scene.idle:
+            return pygame.event.get()
+        event = pygame.event.wait(self.idle_timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def frame(self):
+        """Runs one frame of the current scene: events, update, sounds, draw and display. [No Args]"""
+        scene = self.scene
+        profiler = self.profiler if isinstance(scene, PlayScene) else None
+        if profiler:
+            profiler.begin_frame()
+        if self.preloader:
+            self.preloader.poll()
+        for event in self.events(scene):
+            if event.type == pygame.QUIT:
+                self.quit()
+                return
+            scene.handle_event(event)
+            if self.scene is not scene:
+                return
+        scene.update()
+        audio.flush()
+        if self.scene is not scene:
+            return
+        rects = scene.draw(self.screen)
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+        if profiler:
+            profiler.end_frame(scene.game)
+        self.clock.tick(self.menu_fps if scene.idle else self.render_fps)
+
+    def run(self, scene):
+        """Runs the game loop, starting from a scene, until `quit` is called.
+
+        Args:
+            scene (Scene): The first scene.
+        """
+        self.switch(scene)
+        self.running = True
+        while self.running:
+            self.frame()
+        self.scene.exit()
+        self.scene = None
+        if self.preloader:
+            self.preloader.close()
+        if self.game is not None:
+            self.game.close()
+            self.game = None
+
+
+class SoakManager(SceneManager):
+    """A scene manager that plays itself, for checking that memory stays flat over many level transitions.
+
+    Levels are won or lost a few frames after they start and menu buttons are "clicked" straight away, alternating between
+    wins and losses.
+
+    Attributes:
+        target (int): The number of transitions to run before stopping.
+        samples (list): The (transitions, traced memory in bytes, stack depth) measured every 50 transitions.
+    """
+
+    def __init__(self, screen, target):
+        """Initializes the soak test.
+
+        Args:
+            screen (pygame.Surface): The display surface.
+            target (int): The number of transitions to run.
+        """
+        super().__init__(screen, headless=True, render_fps=0)
+        #* One tick per frame, so levels end after the same number of frames however fast the machine is
+        self.timestep = None
+        self.target = target
+        self.samples = []
+
+    def switch(self, scene):
+        """Switches scenes, stopping once the target is reached and sampling memory every 50 transitions.
+
+        Args:
+            scene (Scene): The new scene.
+        """
+        super().switch(scene)
+        if self.transitions % 50 == 0:
+            depth = 0
+            frame = sys._getframe()
+            while frame:
+                depth += 1
+                frame = frame.f_back
+            self.samples.append((self.transitions, tracemalloc.get_traced_memory()[0], depth))
+        if self.transitions >= self.target:
+            self.quit()
+
+    def frame(self):
+        """Runs one frame, forcing the level to end and clicking menu buttons. [No Args]"""
+        scene = self.scene
+        if isinstance(scene, PlayScene) and scene.game.tick >= 5:
+            scene.game.game_over = 1 if self.transitions % 4 == 1 else -1
+            if scene.game.game_over == 1:
+                scene.game.score += 10
+        elif isinstance(scene, MenuScene):
+            scene.activate()
+            return
+        super().frame()
+
+
+def soak(transitions, limit=1024 * 1024):
+    """Plays a number of simulated scene transitions headlessly and prints the memory used along the way.
+
+    Args:
+        transitions (int): The number of transitions to run.
+        limit (int, optional): The most the traced memory may grow after the first sample, in bytes. Defaults to 1 MB.
+
+    Returns:
+        bool: True if memory and stack depth stayed flat (less than `limit` growth after the first sample).
+    """
+    init_headless()
+    screen = pygame.display.set_mode((720, 720))
+    tracemalloc.start()
+    manager = SoakManager(screen, transitions)
+    manager.run(MainMenuScene(manager))
+    tracemalloc.stop()
+    print("transitions   traced KB   stack depth")
+    for count, memory, depth in manager.samples:
+        print(f"{count:11}  {memory / 1024:10.1f}  {depth:12}")
+    if len(manager.samples) < 2:
+        return True
+    first, last = manager.samples[0], manager.samples[-1]
+    return last[1] - first[1] < limit and last[2] == first[2]
+
+
+def measure_idle(seconds, menu_fps=30):
+    """Measures the CPU used while the main menu sits idle, with the old polling loop and with the event-driven one.
+
+    The old loop polled the mouse and redrew the menu as fast as the CPU allowed. The CPU use is the process time divided by
+    the wall-clock time, so 100% is one core kept busy.
+
+    Args:
+        seconds (float): How long to idle with each loop.
+        menu_fps (int, optional): The frame cap of the event-driven loop. Defaults to 30.
+
+    Returns:
+        dict: The (CPU use in percent, frames drawn) of the "polling" and "event_driven" loops.
+    """
+    init_headless()
+    screen = pygame.display.set_mode((720, 720))
+    results = {}
+    for name in ("polling", "event_driven"):
+        manager = SceneManager(screen, headless=True, menu_fps=menu_fps)
+        manager.switch(MainMenuScene(manager))
+        manager.running = True
+        scene = manager.scene
+        frames = 0
+        wall, cpu = time.perf_counter(), time.process_time()
+        end = wall + seconds
+        while time.perf_counter() < end:
+            if name == "polling":
+                #* What the menus used to do every iteration: poll, redraw everything and flip, with no frame cap
+                pygame.event.get()
+                scene.redraw = "full"
+                scene.draw(screen)
+                pygame.display.update()
+                frames += 1
+            else:
+                drawn = scene.redraw is not None
+                manager.frame()
+                frames += drawn
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        manager.scene.exit()
+        results[name] = (100 * cpu / wall, frames)
+        print(f"{name:13} CPU {100 * cpu / wall:6.1f}%  frames drawn {frames}")
+    return results
+
+
+if __name__ == "__main__":
+    if "--soak" in sys.argv:
+        sys.exit(0 if soak(int(sys.argv[sys.argv.index("--soak") + 1])) else 1)
+    if "--measure-idle" in sys.argv:
+        measure_idle(float(sys.argv[sys.argv.index("--measure-idle") + 1]))
@@ -0,0 +1,93 @@
+"""This file contains the uniform-grid spatial hash used as the collision broadphase by the `Game` class.
+
+Sprites are bucketed into square grid cells by their rectangles once per frame. A query then only has to look at the sprites that
+share a cell with the queried rectangle, instead of every sprite in the group.
+
+Usage:
+
+grid = SpatialHash(64)
+grid.build(enemies)
+for enemy in grid.query(bullet.rect):
+    ...
+"""
+
+
+class SpatialHash:
+    """A uniform grid that buckets sprites by the cells their rectangles cover.
+
+    Attributes:
+        cell_size (int): The width and height of one grid cell, in pixels.
+        cells (dict): The sprites in each cell, keyed on the (column, row) of the cell.
+        order (dict): The position of every sprite in the order they were inserted, keyed on sprite.
+    """
+
+    def __init__(self, cell_size=64):
+        """Initializes an empty spatial hash.
+
+        Args:
+            cell_size (int, optional): The width and height of one grid cell, in pixels. Defaults to 64.
+        """
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}
+
+    def clear(self):
+        """Removes every sprite from the grid. [No Args]"""
+        self.cells.clear()
+        self.order.clear()
+
+    def insert(self, sprite):
+        """Adds a sprite to every cell its rectangle covers.
+
+        Args:
+            sprite (pygame.sprite.Sprite): The sprite to add.
+        """
+        rect = sprite.rect
+        size = self.cell_size
+        cells = self.cells
+        self.order.setdefault(sprite, len(self.order))
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                bucket = cells.get((column, row))
+                if bucket is None:
+                    cells[(column, row)] = [sprite]
+                else:
+                    bucket.append(sprite)
+
+    def build(self, group):
+        """Clears the grid and fills it with all of the sprites in a group.
+
+        Args:
+            group (pygame.sprite.AbstractGroup): The sprites to bucket.
+        """
+        self.clear()
+        for sprite in group:
+            self.insert(sprite)
+
+    def query(self, rect):
+        """Returns the sprites that share at least one cell with a rectangle.
+
+        The result is only a list of candidates; callers still have to check the rectangles actually overlap.
+
+        Args:
+            rect (pygame.Rect): The rectangle to look up.
+
+        Returns:
+            list: The candidate sprites, each listed once, in the order they were inserted (so collisions are resolved in the
+            same order as with the brute-force path, whatever the grid layout).
+        """
+        size = self.cell_size
+        cells = self.cells
+        found = {}
+        buckets = 0
+        for column in range(rect.left // size, (rect.right - 1) // size + 1):
+            for row in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                bucket = cells.get((column, row))
+                if bucket:
+                    buckets += 1
+                    for sprite in bucket:
+                        found[sprite] = None
+        #* A single bucket is already in insertion order
+        if buckets > 1:
+            return sorted(found, key=self.order.__getitem__)
+        return list(found)
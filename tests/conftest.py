@@ -0,0 +1,49 @@
+"""Shared test setup: the game's modules are imported from the repository root, and every test runs from there, since the
+game loads its assets from paths relative to it.
+
+The SDL dummy video and audio drivers are selected before pygame is imported, so the tests need no window or audio device.
+"""
+
+
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+@pytest.fixture(autouse=True)
+def repository_root(monkeypatch):
+    """Runs each test from the repository root."""
+    monkeypatch.chdir(ROOT)
+
+
+@pytest.fixture
+def headless():
+    """Starts pygame without a window or audio device."""
+    from SpaceInvaders import init_headless
+    init_headless()
+
+
+def play(game, ticks):
+    """Steps a game with the scripted tracker player, so every run with the same seed plays out the same.
+
+    Args:
+        game (Game): The game.
+        ticks (int): The number of ticks to play, fewer if the game ends first.
+
+    Returns:
+        list: The input of every tick played.
+    """
+    from batch import tracker_player
+    played = []
+    for _ in range(ticks):
+        if game.game_over:
+            break
+        actions = tracker_player(game, None)
+        game.step(actions)
+        played.append(actions)
+    return played
@@ -0,0 +1,49 @@
+"""Tests for the audio manager."""
+
+
+import pygame
+import pytest
+from audio import AudioManager, audio
+from conftest import play
+from SpaceInvaders import Game
+
+
+@pytest.fixture
+def mixer(headless):
+    """The mixer, on the dummy audio driver."""
+    pygame.mixer.init()
+    yield
+    pygame.mixer.quit()
+
+
+def test_identical_requests_play_once(mixer):
+    """Requests for the same sound at the same volume in one frame are merged, and the first flush sets up the channels."""
+    manager = AudioManager(channels=4)
+    for _ in range(3):
+        manager.play("Assets/explosion.wav", 0.3)
+    manager.play("Assets/bullet.wav", 0.3)
+    manager.play("Assets/bullet.wav", 0.5)
+    manager.flush()
+    assert manager.stats() == {"requested": 5, "coalesced": 2, "dropped": 0, "stolen": 0, "played": 3}
+    assert len(manager.channels) == 4 and manager.pending == {}
+
+
+def test_voice_limits_and_channel_stealing(mixer):
+    """Sounds over their voice limit are dropped, and the oldest sound is cut off when every channel is busy."""
+    manager = AudioManager(channels=3, max_voices=2, limits={"Assets/explosion.wav": 1})
+    manager.play("Assets/explosion.wav", 0.3)
+    manager.play("Assets/bullet.wav", 0.3)
+    manager.play("Assets/bullet.wav", 0.5)
+    manager.flush()
+    manager.play("Assets/explosion.wav", 0.3)
+    manager.play("Assets/bullet.wav", 0.2)
+    manager.flush()
+    assert manager.stats() == {"requested": 5, "coalesced": 0, "dropped": 1, "stolen": 1, "played": 4}
+    assert manager.voices[0] == ("Assets/bullet.wav", 0.2)
+
+
+def test_headless_games_queue_no_sounds(headless):
+    """The audio manager is disabled in headless runs, so playing a game requests nothing."""
+    requested = audio.requested
+    play(Game(level=2, headless=True, seed=3), 300)
+    assert audio.requested == requested and audio.pending == {}
@@ -0,0 +1,52 @@
+"""Tests for the bullet pool."""
+
+
+import pygame
+import pytest
+import SpaceInvaders
+from conftest import play
+from SpaceInvaders import BulletPool, Game
+
+
+@pytest.fixture
+def pool(headless, monkeypatch):
+    """A fresh pool in place of the shared one, so the counters only see this test's bullets."""
+    pool = BulletPool()
+    monkeypatch.setattr(SpaceInvaders, "bullet_pool", pool)
+    return pool
+
+
+def test_killed_bullet_is_reused(pool):
+    """A killed bullet serves the next shot, with its position, speed and colour reset."""
+    bullet = pool.acquire((10, 10))
+    group = pygame.sprite.Group(bullet)
+    bullet.kill()
+    assert not group
+    again = pool.acquire((50, 60), speed=-5, colour="red")
+    assert again is bullet
+    assert (again.rect.center, again.speed, again.colour) == ((50, 60), -5, "red")
+    assert again.image is pool.surface("red")
+    assert pool.stats() == {"free": 0, "in_use": 1, "created": 1, "reused": 1, "high_water": 1}
+
+
+def test_bullet_killed_twice_is_pooled_once(pool):
+    """Killing a bullet that is already in the pool does not hand it out twice."""
+    bullet = pool.acquire((10, 10))
+    bullet.kill()
+    bullet.kill()
+    assert pool.free == [bullet]
+    assert pool.in_use == 0
+
+
+def test_bullets_share_one_surface_per_colour(pool):
+    """Bullets of the same colour share their surface, however the colour is given."""
+    assert pool.acquire((0, 0), colour=(255, 196, 0)).image is pool.acquire((0, 0), colour=[255, 196, 0]).image
+    assert pool.acquire((0, 0), colour="red").image is not pool.acquire((0, 0), colour="yellow").image
+
+
+def test_game_recycles_its_bullets(pool):
+    """Over a game, the bullets in flight are all that the pool counts as in use, and most shots reuse a bullet."""
+    game = Game(level=3, headless=True, seed=6)
+    play(game, 600)
+    assert pool.in_use == len(game.enemy_bullets) + len(game.spaceship.bullets)
+    assert pool.reused > pool.created
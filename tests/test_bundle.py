@@ -0,0 +1,85 @@
+"""Tests for the packed asset bundle."""
+
+
+import gc
+import pygame
+import pytest
+import bundle as bundle_module
+from assets import assets
+from bundle import Bundle, bench, build
+from conftest import play
+from SpaceInvaders import Game
+
+
+@pytest.fixture
+def bundle_path(headless, tmp_path):
+    """A bundle of the game's assets, built with the mixer on the dummy audio driver."""
+    path = str(tmp_path / "Assets.bundle")
+    build("Assets", path)
+    yield path
+    pygame.mixer.quit()
+
+
+def test_bundle_round_trips_every_asset(bundle_path):
+    """Every image, sound and font comes back from the bundle as it was decoded from its own file."""
+    with Bundle(bundle_path) as packed:
+        for path, entry in packed.entries.items():
+            if entry["kind"] == "image":
+                image = packed.image(path)
+                assert pygame.image.tobytes(image, "RGBA") == pygame.image.tobytes(pygame.image.load(path), "RGBA")
+            elif entry["kind"] == "sound":
+                assert packed.sound(path).get_raw() == pygame.mixer.Sound(path).get_raw()
+            else:
+                assert packed.font(path, 20).size("SCORE") == pygame.font.Font(path, 20).size("SCORE")
+        del image
+        assert "Assets\\player.png" in packed and "Assets/missing.png" not in packed
+
+
+def test_bundle_images_point_into_the_mapped_file(bundle_path):
+    """Bundle images are not copies: changing the mapped pixels changes the surface."""
+    with Bundle(bundle_path) as packed:
+        image = packed.image("Assets/player.png")
+        packed.data("Assets/player.png")[:4] = bytes((1, 2, 3, 4))
+        assert tuple(image.get_at((0, 0))) == (3, 2, 1, 4)
+        del image
+
+
+def test_game_plays_from_the_bundle(bundle_path):
+    """A game whose assets come from the bundle plays like one loaded from the loose files."""
+    expected = play(Game(level=2, headless=True, seed=8), 300)
+    packed = Bundle(bundle_path)
+    assets.use_bundle(packed)
+    assets.clear()
+    try:
+        game = Game(level=2, headless=True, seed=8)
+        assert game.spaceship.image.get_view("2").raw == packed.data("Assets/player.png").tobytes()
+        assert play(game, 300) == expected
+    finally:
+        assets.use_bundle(None)
+        assets.clear()
+        del game
+        gc.collect()
+        packed.close()
+
+
+class CountingBundle(Bundle):
+    """A bundle that records every bundle opened and closed."""
+
+    opened = []
+    closed = []
+
+    def __init__(self, path):
+        CountingBundle.opened.append(path)
+        super().__init__(path)
+
+    def close(self):
+        CountingBundle.closed.append(self.path)
+        super().close()
+
+
+def test_bench_closes_every_bundle(bundle_path, monkeypatch):
+    """Every bundle the benchmark opens is closed again."""
+    monkeypatch.setattr(bundle_module, "Bundle", CountingBundle)
+    results = bench("Assets", bundle_path, 2)
+    assert set(results) == {"loose", "bundle"}
+    assert CountingBundle.opened == CountingBundle.closed == [bundle_path] * 2
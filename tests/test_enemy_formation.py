@@ -0,0 +1,77 @@
+"""Tests for the array-backed enemy formation."""
+
+
+import pygame
+import pytest
+from SpaceInvaders import EnemyFormation, Game, Rare_Enemy
+
+
+@pytest.fixture
+def game(headless):
+    """A seeded level-5 game with its default formation."""
+    return Game(level=5, headless=True, seed=12)
+
+
+def test_changes_to_an_enemy_rect_move_the_enemy(game):
+    """Setting a formation enemy's rectangle, or changing it in place, writes back into the formation."""
+    enemy = next(iter(game.enemies))
+    x, y = enemy.rect.topleft
+    enemy.rect.x += 5
+    enemy.rect.move_ip(0, 3)
+    assert enemy.rect.topleft == (x + 5, y + 3)
+    assert (game.enemies.x[enemy.index], game.enemies.y[enemy.index]) == (x + 5, y + 3)
+    enemy.rect.center = (200, 300)
+    assert enemy.rect.center == (200, 300)
+    moved = enemy.rect.move(10, 0)
+    moved.x = 0
+    assert enemy.rect.center == (200, 300)
+
+
+def test_enemy_leaving_the_formation_keeps_its_state(game):
+    """A killed enemy takes its position and health with it, and is no longer counted by the formation."""
+    enemy = next(iter(game.enemies))
+    enemy.rect.topleft = (33, 44)
+    enemy.health = 2
+    count = len(game.enemies)
+    enemy.kill()
+    assert enemy.formation is None
+    assert (enemy.rect.topleft, enemy.health) == ((33, 44), 2)
+    assert len(game.enemies) == count - 1
+    assert enemy.index is None and len(game.enemies.live()) == count - 1
+
+
+def test_update_moves_everyone_and_removes_the_dead(game):
+    """One update moves the whole formation sideways and removes every enemy without health."""
+    enemies = list(game.enemies)
+    before = [enemy.rect.x for enemy in enemies]
+    for enemy in enemies[::2]:
+        enemy.health = 0
+    game.enemies.update(-1)
+    assert list(game.enemies) == enemies[1::2]
+    assert [enemy.rect.x for enemy in enemies[1::2]] == [x - 1 for x in before[1::2]]
+
+
+def test_edge_reverses_and_drops_the_formation(game):
+    """An enemy reaching the right edge turns the formation round and drops every enemy."""
+    enemies = list(game.enemies)
+    tops = [enemy.rect.y for enemy in enemies]
+    enemies[3].rect.right = 720
+    game.enemy_direction = 1
+    game.enemy_position_checker()
+    assert game.enemy_direction == -1
+    assert [enemy.rect.y for enemy in enemies] == [top + 2 for top in tops]
+
+
+def test_colliding_matches_colliderect(game):
+    """The array hit test finds exactly the enemies whose rectangles collide with the rectangle."""
+    for rect in (pygame.Rect(100, 100, 4, 20), pygame.Rect(0, 0, 720, 130), pygame.Rect(700, 700, 5, 5)):
+        expected = [enemy.index for enemy in game.enemies if enemy.rect.colliderect(rect)]
+        assert game.enemies.colliding(rect).tolist() == expected
+
+
+def test_formation_can_only_hold_an_enemy_once(headless):
+    """An enemy in one formation cannot be added to another."""
+    enemy = Rare_Enemy(0, 0)
+    EnemyFormation(enemy)
+    with pytest.raises(ValueError):
+        EnemyFormation(enemy)
@@ -0,0 +1,38 @@
+"""Tests for the reinforcement-learning environment."""
+
+
+import numpy
+import pytest
+from conftest import play
+from env import InvadersEnv
+
+
+@pytest.fixture
+def env(headless):
+    """A level-3 environment with three lives."""
+    return InvadersEnv(level=3, lives=3)
+
+
+def test_enemy_observation_matches_the_enemies(env):
+    """The enemy observation holds the health of every live enemy in its slot, and 0 everywhere else."""
+    env.reset(seed=5)
+    play(env.game, 400)
+    enemies = list(env.game.enemies)
+    enemies[0].kill()
+    enemies[1].health = 0
+    expected = numpy.zeros(env.game.formation_shape)
+    for enemy in env.game.enemies:
+        if enemy.slot is not None and enemy.health > 0:
+            expected[enemy.slot] = enemy.health
+    assert numpy.array_equal(env.observe()["enemies"], expected)
+
+
+def test_reset_reuses_the_game(env):
+    """Resetting keeps the same game, and the same seed gives the same first observation."""
+    first = env.reset(seed=9)
+    game = env.game
+    play(game, 200)
+    second = env.reset(seed=9)
+    assert env.game is game
+    for name in first:
+        assert numpy.array_equal(first[name], second[name])
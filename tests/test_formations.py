@@ -0,0 +1,90 @@
+"""Tests for the formation specs and the formation generator."""
+
+
+import random
+import pytest
+from formations import MAX_SIZE, FormationRegistry, FormationSpec, pack_state, roll_formation, unpack_state
+
+
+def test_spec_fills_missing_fields_from_its_base():
+    """Fields left out of a level definition come from the base spec, or from the built-in default."""
+    base = FormationSpec.from_dict({"rows": 20, "columns": 40})
+    spec = FormationSpec.from_dict({"thresholds": [50, 80, 95]}, base)
+    assert spec == FormationSpec(rows=20, columns=40, thresholds=(50, 80, 95))
+    assert FormationSpec.from_dict({}) == FormationSpec()
+
+
+@pytest.mark.parametrize("data", [
+    {"lanes": 3},
+    {"rows": 0},
+    {"columns": MAX_SIZE + 1},
+    {"thresholds": [90, 80, 95]},
+    {"thresholds": [50, 80]},
+])
+def test_spec_rejects_bad_definitions(data):
+    """Unknown fields, empty or oversized formations and thresholds that are not three increasing numbers are refused."""
+    with pytest.raises(ValueError):
+        FormationSpec.from_dict(data)
+
+
+def test_level_file_sets_each_level():
+    """A level file sets the formation of the levels it lists, and the default of every other level."""
+    registry = FormationRegistry()
+    registry.load("Levels/swarm.json")
+    assert registry.spec(5) != registry.default
+    assert registry.spec(1000) == registry.default
+
+
+def test_formation_has_the_spec_shape():
+    """Every row has one tier per column, highest in the middle, the higher tiers are in the higher rows and the legendary
+    enemies come last."""
+    spec = FormationSpec(rows=5, columns=9)
+    rows, _ = roll_formation(9, random.Random(3), spec)
+    *grid, legendaries = rows
+    assert len(grid) == spec.rows
+    for row in grid:
+        assert len(row) == spec.columns
+        assert max(row) == row[len(row) // 2]
+        assert set(row) <= {1, 2, 3}
+    assert set(legendaries) <= {4}
+    for upper, lower in zip(grid, grid[1:]):
+        assert min(upper) >= max(lower)
+
+
+def test_generate_is_memoised_and_deterministic():
+    """A formation is rolled once per (level, seed, spec), and always leaves the generator where a fresh roll would."""
+    registry = FormationRegistry()
+    spec = FormationSpec(rows=4, columns=6)
+    first = registry.generate(3, 42, spec)
+    second = registry.generate(3, 42, spec)
+    assert first == second
+    assert registry.stats() == {"hits": 1, "misses": 1, "cached": 1}
+    rng = random.Random(42)
+    rows, _ = roll_formation(3, rng, spec)
+    assert first == (rows, rng.getstate())
+
+
+def test_cache_keeps_the_most_recent_formations():
+    """The least recently used formation is dropped once the cache is full."""
+    registry = FormationRegistry(cache_size=2)
+    for seed in (1, 2, 1, 3):
+        registry.generate(0, seed)
+    assert [key[1] for key in registry.cache] == [1, 3]
+
+
+def test_packed_generator_state_round_trips():
+    """A generator restored from a packed state draws the same numbers as the original."""
+    rng = random.Random(7)
+    rng.gauss(0, 1)
+    restored = random.Random()
+    restored.setstate(unpack_state(pack_state(rng.getstate())))
+    assert [restored.random() for _ in range(10)] == [rng.random() for _ in range(10)]
+    assert restored.gauss(0, 1) == rng.gauss(0, 1)
+
+
+def test_formation_rolls_are_pinned_to_the_seed():
+    """A seed always rolls the same formation and leaves its generator in the same place."""
+    rng = random.Random(2024)
+    rows, _ = roll_formation(12, rng, FormationSpec(rows=3, columns=5))
+    assert rows == ((3, 3, 3, 3, 2), (1, 2, 2, 1, 1), (1, 1, 1, 1, 1), (4, 4))
+    assert rng.random() == 0.7282642914232076
@@ -0,0 +1,37 @@
+"""Tests for the destructible fortifications."""
+
+
+import pygame
+from SpaceInvaders import Fortification
+
+SHAPE = ["xxx", "x x"]
+
+
+def test_hit_destroys_only_the_overlapping_blocks(headless):
+    """A hit destroys the standing blocks under the rectangle, and clears them from the image."""
+    fort = Fortification(SHAPE, 6, (241, 79, 80), 100, 200)
+    assert fort.blocks_left() == 5
+    assert fort.erode(pygame.Rect(107, 201, 4, 20))
+    assert fort.cells == bytearray([1, 0, 1, 1, 0, 1])
+    assert fort.image.get_at((7, 1)).a == 0
+    assert fort.image.get_at((1, 1)).a == 255
+    #* The gap in the bottom row and the block that is already gone stop nothing
+    assert not fort.erode(pygame.Rect(107, 201, 4, 20))
+
+
+def test_hit_outside_misses(headless):
+    """A rectangle beside the fortification leaves it intact."""
+    fort = Fortification(SHAPE, 6, (241, 79, 80), 100, 200)
+    assert not fort.erode(pygame.Rect(120, 200, 4, 20))
+    assert fort.blocks_left() == 5
+
+
+def test_restore_undoes_the_damage(headless):
+    """Restoring a fortification brings back every block and its image."""
+    fort = Fortification(SHAPE, 6, (241, 79, 80), 100, 200)
+    intact = pygame.image.tobytes(fort.image, "RGBA")
+    fort.erode(pygame.Rect(100, 200, 18, 12))
+    assert fort.blocks_left() == 0
+    fort.restore()
+    assert fort.blocks_left() == 5
+    assert pygame.image.tobytes(fort.image, "RGBA") == intact
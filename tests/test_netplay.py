@@ -0,0 +1,88 @@
+"""Tests for the delta encoding of the states streamed to network clients."""
+
+
+import struct
+import time
+import zlib
+from array import array
+from conftest import play
+from netplay import FRAME_HEADER, NetClient, NetServer, encode_frame, public_snapshot
+from replay import xor_delta
+from SpaceInvaders import SNAPSHOT_SEED, Game
+
+
+def test_xor_delta_round_trips_against_any_base():
+    """XORing with the same base twice gives the data back, whether the base is shorter, longer or missing."""
+    data = bytes(range(200)) * 3
+    for base in (b"", data[:100], data[::-1], data + b"\xff" * 50):
+        assert xor_delta(xor_delta(data, base), base) == data
+
+
+def test_frame_decodes_to_the_state(headless):
+    """A frame holds the compressed delta of a state against its base, which XORs back to the state."""
+    game = Game(level=2, headless=True, seed=5)
+    base = public_snapshot(game)
+    play(game, 120)
+    snapshot = public_snapshot(game)
+    frame = encode_frame(9, snapshot, 4, base)
+    sequence, base_sequence, size, crc, payload_size, _ = FRAME_HEADER.unpack_from(frame)
+    assert (sequence, base_sequence, size, crc) == (9, 4, len(snapshot), zlib.crc32(snapshot))
+    payload = frame[FRAME_HEADER.size:]
+    assert len(payload) == payload_size
+    assert xor_delta(zlib.decompress(payload), base) == snapshot
+
+
+def test_public_snapshot_restores(headless):
+    """The state sent to clients, with its random number generator blanked out, restores into a game that snapshots the same."""
+    game = Game(level=3, headless=True, seed=2)
+    play(game, 200)
+    snapshot = public_snapshot(game)
+    other = Game(headless=True)
+    other.restore(snapshot)
+    assert other.snapshot() == snapshot
+
+
+def test_public_snapshot_hides_the_seed_and_generator(headless):
+    """Neither the seed nor any of the random number generator state gets into the state sent to clients."""
+    seed = 0xC0FFEE42
+    game = Game(level=2, headless=True, seed=seed)
+    play(game, 90)
+    snapshot = public_snapshot(game)
+    assert struct.pack("<I", seed) not in snapshot
+    assert struct.unpack_from("<I", snapshot, SNAPSHOT_SEED) == (0,)
+    _, internal, _ = game.rng.getstate()
+    words = array("I", internal[:-1])
+    assert not any(array("I", [word]).tobytes() in snapshot for word in words if word > 0xFFFFFF)
+    other = Game(headless=True)
+    other.restore(snapshot)
+    assert other.seed == 0
+
+
+def test_spectators_decode_every_state_sent(headless):
+    """Spectators on localhost rebuild exactly the states the server sent, mostly from deltas."""
+    server = NetServer(Game(level=1, headless=True, seed=3), port=0)
+    clients = [NetClient(*server.address) for _ in range(2)]
+    try:
+        deadline = time.perf_counter() + 5
+        while sum(connection.role is not None for connection in server.connections) < len(clients):
+            assert time.perf_counter() < deadline, "the spectators did not connect"
+            server.poll(0.01)
+        sent = {}
+        received = [[] for _ in clients]
+        for _ in range(120):
+            server.step()
+            sent[server.sequence] = server.history[server.sequence]
+            for client, states in zip(clients, received):
+                states.extend(client.poll())
+            server.poll(0)
+        time.sleep(0.05)
+        for client, states in zip(clients, received):
+            states.extend(client.poll())
+        for client, states in zip(clients, received):
+            assert states
+            assert all(snapshot == sent[sequence] for sequence, snapshot in states)
+            assert client.keyframes < client.frames
+    finally:
+        for client in clients:
+            client.close()
+        server.close()
@@ -0,0 +1,45 @@
+"""Tests for the background preloader."""
+
+
+import pytest
+from conftest import play
+from formations import formations
+from preload import Preloader
+from SpaceInvaders import Game
+
+
+@pytest.fixture
+def preloader(headless):
+    """A preloader, closed after the test."""
+    preloader = Preloader()
+    yield preloader
+    preloader.close()
+
+
+def test_prepared_level_is_served_from_the_cache(preloader):
+    """The prepared level's formation is already cached when a game starts it with the prepared seed."""
+    seed = preloader.prepare_level(7)
+    assert preloader.finish(7) == seed and preloader.progress() == 1.0
+    misses = formations.misses
+    game = Game(level=7, headless=True, seed=seed)
+    assert formations.misses == misses
+    assert preloader.finish(7) is None
+    assert game.snapshot() == Game(level=7, headless=True, seed=seed).snapshot()
+
+
+def test_repaired_fortifications_are_swapped_in_on_the_main_thread(preloader):
+    """The repaired fortifications are drawn off the main thread but only swapped in by `poll`, and the reset game then
+    matches a new one."""
+    game = Game(level=4, lives=3, headless=True, seed=6)
+    play(game, 900)
+    damaged = [fort.blocks_left() for fort in game.blocks]
+    assert min(damaged) < game.blocks.sprites()[0].cells_total
+    seed = preloader.prepare_level(5, game, seed=11)
+    for future, _ in preloader.jobs:
+        future.result()
+    assert [fort.blocks_left() for fort in game.blocks] == damaged
+    preloader.poll()
+    assert all(fort.blocks_left() == fort.cells_total for fort in game.blocks)
+    assert preloader.stats()["failed"] == 0
+    game.reset(5, 0, 1, preloader.finish(5))
+    assert game.snapshot() == Game(level=5, headless=True, seed=seed).snapshot()
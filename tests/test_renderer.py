@@ -0,0 +1,36 @@
+"""Tests for the dirty-rectangle renderer."""
+
+
+import pygame
+from batch import tracker_player
+from profiler import FrameProfiler
+from renderer import DirtyRenderer
+from SpaceInvaders import Game
+
+DRAW_STAGES = {"draw_enemy_bullets", "draw_legendary", "draw_player_bullets", "draw_player", "display_lives_score",
+               "draw_blocks", "draw_enemies"}
+
+
+def test_pushed_rectangles_match_a_full_redraw(headless):
+    """Copying only the rectangles the renderer returns gives the same picture as clearing and drawing the whole game."""
+    game = Game(level=5, lives=100, headless=True, seed=2)
+    work, display, reference = (pygame.Surface((720, 720)) for _ in range(3))
+    renderer = DirtyRenderer(work)
+    for _ in range(300):
+        game.step(tracker_player(game, None))
+        for rect in renderer.render(game):
+            display.blit(work, rect, rect)
+        reference.fill((30, 30, 30))
+        game.draw(reference)
+        assert pygame.image.tobytes(display, "RGB") == pygame.image.tobytes(reference, "RGB")
+
+
+def test_profiled_render_times_the_draw_stages(headless):
+    """The renderer times its drawing under the same stage names as `Game.draw`, so the profiler sees real play."""
+    game = Game(level=1, headless=True, seed=2)
+    game.profiler = FrameProfiler()
+    renderer = DirtyRenderer(pygame.Surface((720, 720)))
+    game.profiler.begin_frame()
+    game.step(tracker_player(game, None))
+    renderer.render(game)
+    assert DRAW_STAGES <= set(game.profiler.frame_stages)
@@ -0,0 +1,63 @@
+"""Tests for the input recordings and the seekable replay format."""
+
+
+import pytest
+from conftest import play
+from replay import FULL_KEYFRAME, InputRecorder, KeyframeRecorder, Replayer, ReplayFile, decode_actions, keyframe_delta
+from SpaceInvaders import Game
+
+TICKS = 400
+INTERVAL = 30
+
+
+@pytest.fixture
+def recording(headless, tmp_path):
+    """A seekable replay of a seeded level-3 game, and the snapshot of the game after every tick when replayed from the start."""
+    path = str(tmp_path / "run.replay")
+    game = Game(level=3, headless=True, seed=11)
+    KeyframeRecorder(game, interval=INTERVAL)
+    play(game, TICKS)
+    game.recorder.save(path)
+    replay = ReplayFile(path)
+    game = replay.new_game()
+    snapshots = [game.snapshot()]
+    for byte in replay.inputs(0, replay.ticks):
+        game.step(decode_actions(byte))
+        snapshots.append(game.snapshot())
+    return replay, snapshots
+
+
+def test_seek_matches_linear_replay(recording):
+    """Seeking to a tick gives the same game as replaying every tick up to it, on, just after and between keyframes."""
+    replay, snapshots = recording
+    assert replay.ticks == TICKS
+    for tick in (0, 1, INTERVAL - 1, INTERVAL, INTERVAL + 1, 7 * INTERVAL + 13, TICKS - 1, TICKS):
+        assert replay.seek(tick).snapshot() == snapshots[tick]
+
+
+def test_keyframes_are_stored_as_deltas(recording):
+    """Later keyframes are stored as deltas against a whole one, and rebuild to the snapshots of their ticks."""
+    replay, snapshots = recording
+    assert any(entry[3] != FULL_KEYFRAME for entry in replay.index)
+    for number in range(len(replay.index)):
+        assert replay.chunk(number)[0] == snapshots[number * INTERVAL]
+
+
+def test_keyframe_delta_round_trips(headless):
+    """Applying a keyframe delta to its reference gives the snapshot back, even when the two differ in length."""
+    game = Game(level=3, headless=True, seed=4)
+    reference = game.snapshot()
+    play(game, 240)
+    snapshot = game.snapshot()
+    assert len(snapshot) != len(reference)
+    assert keyframe_delta(keyframe_delta(snapshot, reference), reference) == snapshot
+
+
+def test_input_log_replays_to_the_recorded_outcome(headless, tmp_path):
+    """A plain input log replays to the outcome it recorded."""
+    path = str(tmp_path / "run.log")
+    game = Game(level=1, headless=True, seed=8)
+    recorder = InputRecorder(game)
+    play(game, 300)
+    recorder.save(path)
+    assert Replayer(path).verify()
@@ -0,0 +1,18 @@
+"""Tests for restarting a game in place with `Game.reset`."""
+
+
+from conftest import play
+from SpaceInvaders import Game
+
+
+def test_reset_game_matches_a_new_game(headless):
+    """A played game that is reset is in the same state as a new game, and plays on the same way."""
+    game = Game(level=1, lives=3, headless=True, seed=4)
+    spaceship, enemies = game.spaceship, game.enemies
+    play(game, 600)
+    game.reset(2, 150, 2, seed=7)
+    fresh = Game(level=2, score=150, lives=2, headless=True, seed=7)
+    assert game.spaceship is spaceship and game.enemies is enemies
+    assert game.snapshot() == fresh.snapshot()
+    assert play(game, 300) == play(fresh, 300)
+    assert game.snapshot() == fresh.snapshot()
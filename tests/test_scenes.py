@@ -0,0 +1,51 @@
+"""Tests for the scene manager."""
+
+
+import pygame
+import pytest
+import scenes
+from conftest import play
+from scenes import PlayScene, SceneManager, soak
+
+
+def test_soak_memory_stays_flat():
+    """Hundreds of level transitions neither grow the stack nor keep growing the traced memory."""
+    #* The formation cache fills during the first few hundred transitions and then stays at its limit
+    assert soak(400, limit=512 * 1024)
+
+
+@pytest.fixture
+def scene(headless, tmp_path, monkeypatch):
+    """A play scene on a headless manager, with its quick save in a temporary directory."""
+    monkeypatch.setattr(scenes, "QUICKSAVE_PATH", str(tmp_path / "quicksave.bin"))
+    manager = SceneManager(pygame.display.set_mode((720, 720)), headless=True, preload=False)
+    scene = PlayScene(manager)
+    scene.enter()
+    return scene
+
+
+def press(scene, key):
+    """Sends a key press to a scene."""
+    scene.handle_event(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+
+def test_quick_save_loads_back(scene):
+    """F9 puts the game back to where F5 saved it."""
+    press(scene, pygame.K_F5)
+    saved = scene.game.snapshot()
+    play(scene.game, 60)
+    press(scene, pygame.K_F9)
+    assert scene.game.snapshot() == saved
+
+
+@pytest.mark.parametrize("damage", [lambda blob: blob[:len(blob) // 2], lambda blob: blob[:4] + b"\x01" + blob[5:]])
+def test_bad_quick_save_leaves_the_game_alone(scene, damage, capsys):
+    """A truncated quick save, or one from an older version, is reported and the game carries on unchanged."""
+    play(scene.game, 60)
+    with open(scenes.QUICKSAVE_PATH, "wb") as file:
+        file.write(damage(scene.game.snapshot()))
+    play(scene.game, 30)
+    before = scene.game.snapshot()
+    press(scene, pygame.K_F9)
+    assert scene.game.snapshot() == before
+    assert "Could not load" in capsys.readouterr().err
@@ -0,0 +1,61 @@
+"""Tests for the binary game snapshots."""
+
+
+import pytest
+from conftest import play
+from formations import formations, FormationSpec
+from SpaceInvaders import Game
+
+
+def test_restored_game_snapshots_the_same(headless):
+    """A snapshot restored into another game gives back the same snapshot."""
+    game = Game(level=3, headless=True, seed=7)
+    play(game, 400)
+    blob = game.snapshot()
+    other = Game(level=0, headless=True, seed=1)
+    other.restore(blob)
+    assert other.snapshot() == blob
+
+
+def test_restored_game_plays_on_the_same(headless):
+    """A restored game carries on exactly like the original, tick for tick."""
+    game = Game(level=3, headless=True, seed=7)
+    play(game, 300)
+    other = Game(level=0, headless=True, seed=1)
+    other.restore(game.snapshot())
+    for actions in play(game, 300):
+        other.step(actions)
+    assert other.snapshot() == game.snapshot()
+
+
+def test_wide_formation_slots_round_trip(headless, monkeypatch):
+    """Rows and columns past 255 are stored whole, and are not confused with enemies outside the formation."""
+    monkeypatch.setattr(formations, "levels", {2: FormationSpec(rows=2, columns=300, x_spacing=2, y_spacing=40, x_offset=40)})
+    game = Game(level=2, headless=True, seed=3)
+    other = Game(level=0, headless=True, seed=1)
+    other.restore(game.snapshot())
+    slots = sorted(enemy.slot for enemy in other.enemies)
+    assert slots == sorted(enemy.slot for enemy in game.enemies)
+    assert (1, 299) in slots
+    assert other.formation_shape == (2, 300)
+
+
+def test_restore_rejects_other_blobs(headless):
+    """Anything that is not a snapshot of this version is refused."""
+    game = Game(level=0, headless=True, seed=1)
+    blob = bytearray(game.snapshot())
+    blob[4] += 1
+    with pytest.raises(ValueError):
+        game.restore(bytes(blob))
+
+
+@pytest.mark.parametrize("seed", [-1, 2**32, 2**64 + 5])
+def test_out_of_range_seed_round_trips(headless, seed):
+    """Seeds beyond the 32 bits snapshots store are wrapped into range, so the game can still be snapshotted and restored."""
+    game = Game(level=1, headless=True, seed=seed)
+    assert game.seed == seed % 2**32
+    play(game, 60)
+    other = Game(headless=True)
+    other.restore(game.snapshot())
+    assert other.snapshot() == game.snapshot()
+    assert other.seed == game.seed
@@ -0,0 +1,33 @@
+"""Tests for the spatial-hash collision broadphase."""
+
+
+import pygame
+from conftest import play
+from spatial_hash import SpatialHash
+from SpaceInvaders import Game
+
+
+def sprite(x, y, width=10, height=10):
+    """Returns a bare sprite with the given rectangle."""
+    sprite = pygame.sprite.Sprite()
+    sprite.rect = pygame.Rect(x, y, width, height)
+    return sprite
+
+
+def test_query_returns_candidates_once_in_insertion_order():
+    """Sprites spread over several cells come back once each, in the order they were inserted, not cell by cell."""
+    sprites = [sprite(70, 70), sprite(10, 10), sprite(60, 0, 10, 70), sprite(300, 300)]
+    grid = SpatialHash(64)
+    grid.build(sprites)
+    assert grid.query(pygame.Rect(0, 0, 128, 128)) == sprites[:3]
+    assert grid.query(pygame.Rect(200, 200, 10, 10)) == []
+
+
+def test_broadphase_matches_brute_force(headless):
+    """A game plays out exactly the same with the broadphase as with the brute-force collision checks."""
+    fast = Game(level=4, headless=True, seed=9)
+    slow = Game(level=4, headless=True, seed=9)
+    slow.broadphase = False
+    for actions in play(fast, 600):
+        slow.step(actions)
+    assert fast.snapshot() == slow.snapshot()
@@ -0,0 +1,27 @@
+"""Tests for the fixed-timestep clock."""
+
+
+from timestep import FixedTimestep
+
+
+def test_accumulator_carries_leftover_time():
+    """Whole ticks are taken out of the elapsed time and the remainder carries over to the next frame."""
+    timestep = FixedTimestep(tick_rate=4)
+    assert timestep.advance(10.0) == 1
+    assert timestep.advance(10.125) == 0
+    assert timestep.alpha() == 0.5
+    assert timestep.advance(10.625) == 2
+    assert timestep.accumulator == 0.125
+    assert timestep.advance(10.75) == 1
+    assert timestep.alpha() == 0.0
+
+
+def test_slow_frames_are_clamped():
+    """A frame that falls further behind than `max_ticks` runs only `max_ticks` ticks and drops the rest."""
+    timestep = FixedTimestep(tick_rate=4, max_ticks=3)
+    timestep.advance(0.0)
+    assert timestep.advance(2.125) == 3
+    assert timestep.dropped == 5
+    assert timestep.alpha() == 0.5
+    timestep.reset()
+    assert (timestep.advance(50.0), timestep.dropped, timestep.accumulator) == (1, 0, 0.0)
@@ -0,0 +1,85 @@
+"""This file contains the fixed-timestep clock that decouples the game simulation from the rendering.
+
+`Game.step` always advances the game by exactly one tick (1/`FPS` of a second), and every speed, cooldown and spawn timer in
+the game is measured in ticks. `FixedTimestep` works out how many ticks to run each rendered frame from the real time that has
+passed (an accumulator loop), so the game runs at the same speed whether the display renders at 30, 60, 144 fps or uncapped. A
+slow frame is caught up by running several ticks before the next render (skipping the frames that would have been rendered in
+between), and the leftover fraction of a tick is used to interpolate the drawn positions between the last two ticks.
+
+Usage:
+
+timestep = FixedTimestep()
+while True:
+    for _ in range(timestep.advance()):
+        game.step(actions)
+    draw(game, timestep.alpha())
+"""
+
+
+import time
+from SpaceInvaders import FPS
+
+
+class FixedTimestep:
+    """An accumulator that turns the real time between frames into a whole number of fixed game ticks.
+
+    Attributes:
+        tick_rate (int): The number of ticks per second.
+        tick_seconds (float): The length of one tick, in seconds.
+        max_ticks (int): The most ticks run before a frame is rendered. When the game falls further behind than this (e.g.
+            while the window is dragged), the extra time is dropped and the game slows down instead of spiralling.
+        accumulator (float): The time that has passed but has not been simulated yet, in seconds.
+        last (float): The `time.perf_counter` reading of the last call to `advance`, or None before the first one.
+        dropped (int): The number of ticks dropped because the game fell too far behind.
+    """
+
+    def __init__(self, tick_rate=FPS, max_ticks=5):
+        """Initializes the clock.
+
+        Args:
+            tick_rate (int, optional): The number of ticks per second. Defaults to `FPS`.
+            max_ticks (int, optional): The most ticks run before a frame is rendered. Defaults to 5.
+        """
+        self.tick_rate = tick_rate
+        self.tick_seconds = 1 / tick_rate
+        self.max_ticks = max_ticks
+        self.reset()
+
+    def reset(self):
+        """Forgets the time that has passed, e.g. when a level starts after a menu. [No Args]"""
+        self.accumulator = 0.0
+        self.last = None
+        self.dropped = 0
+
+    def advance(self, now=None):
+        """Adds the time since the last call to the accumulator and takes whole ticks out of it.
+
+        The first call after `reset` runs one tick, so the first frame of a level is never empty.
+
+        Args:
+            now (float, optional): The current `time.perf_counter` reading. Defaults to None (read the clock).
+
+        Returns:
+            int: The number of ticks to run before rendering this frame.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.last is None:
+            self.last = now
+            return 1
+        self.accumulator += now - self.last
+        self.last = now
+        ticks = int(self.accumulator / self.tick_seconds)
+        self.accumulator -= ticks * self.tick_seconds
+        if ticks > self.max_ticks:
+            self.dropped += ticks - self.max_ticks
+            ticks = self.max_ticks
+        return ticks
+
+    def alpha(self):
+        """Returns how far the real time is between the last tick and the next one.
+
+        Returns:
+            float: A fraction from 0 (drawn at the previous tick's positions) to 1 (drawn at the latest tick's positions).
+        """
+        return min(1.0, self.accumulator / self.tick_seconds)